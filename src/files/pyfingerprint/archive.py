@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import os
+import struct
+import threading
+import time
+
+from .imagecodec import IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_PACKED_SIZE, unpackImage
+
+
+## Magic bytes of the archive file
+ARCHIVE_MAGIC = b'PFIA'
+
+## Version of the archive format
+ARCHIVE_VERSION = 1
+
+## Header: magic (4 bytes), version (1 byte), width (2 bytes), height (2 bytes), bits per pixel (1 byte)
+ARCHIVE_HEADER_FORMAT = '>4sBHHB'
+ARCHIVE_HEADER_SIZE = struct.calcsize(ARCHIVE_HEADER_FORMAT)
+
+## Record: capture time (8 bytes, seconds since the epoch) followed by the packed image
+ARCHIVE_RECORD_HEADER_FORMAT = '>d'
+ARCHIVE_RECORD_HEADER_SIZE = struct.calcsize(ARCHIVE_RECORD_HEADER_FORMAT)
+ARCHIVE_RECORD_SIZE = ARCHIVE_RECORD_HEADER_SIZE + IMAGE_PACKED_SIZE
+
+
+def readArchiveHeader(archiveFile):
+    """
+    Reads and validates the header of an archive.
+
+    Arguments:
+        archiveFile (file): The archive opened in binary mode (positioned at the beginning)
+
+    Raises:
+        Exception: if the file is no image archive or has an unsupported format
+    """
+
+    header = archiveFile.read(ARCHIVE_HEADER_SIZE)
+
+    if ( len(header) < ARCHIVE_HEADER_SIZE ):
+        raise Exception('The file is no image archive!')
+
+    (magic, version, width, height, bitsPerPixel) = struct.unpack(ARCHIVE_HEADER_FORMAT, header)
+
+    if ( magic != ARCHIVE_MAGIC ):
+        raise Exception('The file is no image archive!')
+
+    if ( version != ARCHIVE_VERSION or (width, height, bitsPerPixel) != (IMAGE_WIDTH, IMAGE_HEIGHT, 4) ):
+        raise Exception('The image archive has an unsupported format!')
+
+
+class ImageArchiveWriter(object):
+    """
+    Appends images as sent by the sensor (4 bits per pixel) to an archive file.
+
+    The archive consists of a small header followed by records of fixed size, so every image
+    can be accessed directly by its index (see `ImageArchiveReader`). Every image is written
+    with a single `write()` call. An incomplete record at the end of the archive (e.g. after a
+    crash) is ignored by the reader and overwritten by the next appended image.
+
+    Example:
+        archive = ImageArchiveWriter('/var/lib/fingerprint/images.pfia')
+        archive.appendImage(f.downloadPackedImage())
+        archive.close()
+
+    """
+    __file = None
+    __lock = None
+    __imageCount = 0
+
+    def __init__(self, path):
+        """
+        Constructor
+
+        Arguments:
+            path (str): Path to the archive (created if it does not exist)
+
+        Raises:
+            Exception: if the existing file is no image archive
+        """
+
+        self.__lock = threading.Lock()
+
+        if ( os.path.exists(path) == False or os.path.getsize(path) == 0 ):
+            with open(path, 'wb') as archiveFile:
+                archiveFile.write(struct.pack(ARCHIVE_HEADER_FORMAT, ARCHIVE_MAGIC, ARCHIVE_VERSION, IMAGE_WIDTH, IMAGE_HEIGHT, 4))
+
+        self.__file = open(path, 'r+b')
+
+        try:
+            readArchiveHeader(self.__file)
+
+        except Exception:
+            self.__file.close()
+            raise
+
+        ## Append behind the last complete record
+        self.__file.seek(0, os.SEEK_END)
+        self.__imageCount = (self.__file.tell() - ARCHIVE_HEADER_SIZE) // ARCHIVE_RECORD_SIZE
+        self.__file.seek(ARCHIVE_HEADER_SIZE + self.__imageCount * ARCHIVE_RECORD_SIZE)
+        self.__file.truncate()
+
+    def getImageCount(self):
+        """
+        Gets the number of images in the archive.
+
+        Returns:
+            The number of images (int).
+        """
+
+        return self.__imageCount
+
+    def appendImage(self, packedImage, captureTime = None):
+        """
+        Appends an image.
+
+        Arguments:
+            packedImage (bytes): The packed image with 36864 bytes (see `PyFingerprint.downloadPackedImage()`)
+            captureTime (float): The capture time in seconds since the epoch or None for the current time
+
+        Returns:
+            The index of the image (int).
+
+        Raises:
+            ValueError: if the packed image has the wrong size
+        """
+
+        if ( len(packedImage) != IMAGE_PACKED_SIZE ):
+            raise ValueError('The given packed image must have ' + str(IMAGE_PACKED_SIZE) + ' bytes!')
+
+        if ( captureTime is None ):
+            captureTime = time.time()
+
+        record = struct.pack(ARCHIVE_RECORD_HEADER_FORMAT, captureTime) + bytes(packedImage)
+
+        with self.__lock:
+            self.__file.write(record)
+
+            index = self.__imageCount
+            self.__imageCount += 1
+
+        return index
+
+    def flush(self, sync = False):
+        """
+        Writes the buffered images to the file.
+
+        Arguments:
+            sync (bool): Force the images to the disk (fsync)
+        """
+
+        with self.__lock:
+            self.__file.flush()
+
+            if ( sync == True ):
+                os.fsync(self.__file.fileno())
+
+    def close(self):
+        """
+        Writes the buffered images and closes the archive.
+
+        """
+
+        with self.__lock:
+            if ( self.__file is not None ):
+                self.__file.close()
+                self.__file = None
+
+
+class ImageArchiveReader(object):
+    """
+    Reads images from an archive written by `ImageArchiveWriter`.
+
+    """
+    __file = None
+    __lock = None
+
+    def __init__(self, path):
+        """
+        Constructor
+
+        Arguments:
+            path (str): Path to the archive
+
+        Raises:
+            Exception: if the file is no image archive
+        """
+
+        self.__lock = threading.Lock()
+        self.__file = open(path, 'rb')
+
+        try:
+            readArchiveHeader(self.__file)
+
+        except Exception:
+            self.__file.close()
+            raise
+
+    def close(self):
+        """
+        Closes the archive.
+
+        """
+
+        self.__file.close()
+
+    def getImageCount(self):
+        """
+        Gets the number of (complete) images in the archive.
+
+        Returns:
+            The number of images (int).
+        """
+
+        fileSize = os.fstat(self.__file.fileno()).st_size
+        return max(0, (fileSize - ARCHIVE_HEADER_SIZE) // ARCHIVE_RECORD_SIZE)
+
+    def __readRecords(self, index, count):
+        """
+        Reads consecutive records with a single read.
+
+        Arguments:
+            index (int): The index of the first image
+            count (int): The number of images
+
+        Returns:
+            The records (bytes).
+
+        Raises:
+            IndexError: if an index is out of range
+        """
+
+        if ( index < 0 or count < 0 or index + count > self.getImageCount() ):
+            raise IndexError('The given image index is out of range!')
+
+        with self.__lock:
+            self.__file.seek(ARCHIVE_HEADER_SIZE + index * ARCHIVE_RECORD_SIZE)
+            return self.__file.read(count * ARCHIVE_RECORD_SIZE)
+
+    def readPackedImage(self, index):
+        """
+        Reads an image as sent by the sensor (4 bits per pixel).
+
+        Arguments:
+            index (int): The index of the image
+
+        Returns:
+            A tuple that contain the following information:
+            0: float The capture time in seconds since the epoch.
+            1: bytes The packed image.
+
+        Raises:
+            IndexError: if the index is out of range
+        """
+
+        record = self.__readRecords(index, 1)
+        captureTime = struct.unpack_from(ARCHIVE_RECORD_HEADER_FORMAT, record, 0)[0]
+
+        return (captureTime, record[ARCHIVE_RECORD_HEADER_SIZE:])
+
+    def readImage(self, index):
+        """
+        Reads an image with 8 bits per pixel.
+
+        Arguments:
+            index (int): The index of the image
+
+        Returns:
+            The pixels (bytearray) row by row.
+
+        Raises:
+            IndexError: if the index is out of range
+        """
+
+        return unpackImage(self.readPackedImage(index)[1])
+
+    def readImages(self, index = 0, count = None, asNumpy = False):
+        """
+        Reads and decodes several consecutive images at once.
+
+        Arguments:
+            index (int): The index of the first image
+            count (int): The number of images or None for all following images
+            asNumpy (bool): Return a NumPy array with the shape (count, 288, 256) instead of a list
+
+        Returns:
+            A tuple that contain the following information:
+            0: list The capture times (float).
+            1: list The pixels (bytearray) of every image or a NumPy array (uint8).
+
+        Raises:
+            IndexError: if an index is out of range
+        """
+
+        if ( count is None ):
+            count = max(0, self.getImageCount() - index)
+
+        records = self.__readRecords(index, count)
+
+        if ( asNumpy == True ):
+            import numpy
+
+            recordType = numpy.dtype([('captureTime', '>f8'), ('image', 'u1', (IMAGE_HEIGHT, IMAGE_WIDTH // 2))])
+            recordArray = numpy.frombuffer(records, dtype = recordType, count = count)
+            packedImages = recordArray['image']
+
+            images = numpy.empty((count, IMAGE_HEIGHT, IMAGE_WIDTH), dtype = numpy.uint8)
+            numpy.multiply(packedImages >> 4, 17, out = images[:, :, 0::2])
+            numpy.multiply(packedImages & 0x0F, 17, out = images[:, :, 1::2])
+
+            return (recordArray['captureTime'].astype(float).tolist(), images)
+
+        captureTimes = []
+        images = []
+
+        for offset in range(0, len(records), ARCHIVE_RECORD_SIZE):
+            captureTimes.append(struct.unpack_from(ARCHIVE_RECORD_HEADER_FORMAT, records, offset)[0])
+            images.append(unpackImage(records[offset + ARCHIVE_RECORD_HEADER_SIZE:offset + ARCHIVE_RECORD_SIZE]))
+
+        return (captureTimes, images)
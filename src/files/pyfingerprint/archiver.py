@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import os
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .imagecodec import IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_PACKED_SIZE, unpackImage
+
+
+## Policies if the queue is full
+##
+
+ARCHIVER_POLICY_BLOCK = 0
+"""
+Wait until the workers made room (backpressure)
+"""
+
+ARCHIVER_POLICY_DROP_NEWEST = 1
+"""
+Drop the submitted image
+"""
+
+ARCHIVER_POLICY_DROP_OLDEST = 2
+"""
+Drop the oldest waiting image to make room for the submitted image
+"""
+
+
+class ImageArchiver(object):
+    """
+    Writes downloaded images in the background, so the sensor is free for the next finger.
+
+    Submitted images (as sent by the sensor, see `PyFingerprint.downloadPackedImage()`) are
+    put into a bounded queue. Worker threads take up to `batchSize` images at once, write them
+    and force the whole batch to the disk with grouped fsync calls. The destination is either
+    an `ImageArchiveWriter` or a directory, in which every image is encoded as a file (e.g.
+    PNG) with PIL. If the queue is full, the policy decides whether `submitImage()` waits or
+    an image is dropped.
+
+    Example:
+        archiver = ImageArchiver('/var/lib/fingerprint/images', policy = ARCHIVER_POLICY_DROP_OLDEST)
+
+        while ( f.readImage() == False ):
+            pass
+
+        archiver.submitImage(f.downloadPackedImage())
+        archiver.close()
+
+    """
+    __archive = None
+    __directory = None
+    __imageFormat = None
+    __queue = None
+    __policy = ARCHIVER_POLICY_BLOCK
+    __batchSize = 8
+    __sync = True
+    __errorCallback = None
+    __workers = None
+    __lock = None
+    __submitLock = None
+    __closed = False
+    __sequence = 0
+    __writtenCount = 0
+    __droppedCount = 0
+    __failedCount = 0
+
+    def __init__(self, destination, queueSize = 16, workerCount = 1, batchSize = 8, policy = ARCHIVER_POLICY_BLOCK, imageFormat = 'png', sync = True, errorCallback = None):
+        """
+        Constructor
+
+        Arguments:
+            destination (object): An `ImageArchiveWriter` or the path to a directory
+            queueSize (int): The maximum number of images waiting to be written
+            workerCount (int): The number of worker threads
+            batchSize (int): The maximum number of images written before the disk is synchronized
+            policy (int): The policy if the queue is full. Use one of `ARCHIVER_POLICY_*` constants.
+            imageFormat (str): The file extension of the images written into a directory
+            sync (bool): Force every batch to the disk (fsync)
+            errorCallback (function): Called with the name of the image (None if a batch could not be synchronized) and the exception (errors of the callback are ignored)
+
+        Raises:
+            ValueError: if any passed argument is invalid
+        """
+
+        if ( queueSize < 1 ):
+            raise ValueError('The given queue size is invalid!')
+
+        if ( workerCount < 1 ):
+            raise ValueError('The given number of workers is invalid!')
+
+        if ( batchSize < 1 ):
+            raise ValueError('The given batch size is invalid!')
+
+        if ( policy not in (ARCHIVER_POLICY_BLOCK, ARCHIVER_POLICY_DROP_NEWEST, ARCHIVER_POLICY_DROP_OLDEST) ):
+            raise ValueError('The given policy is invalid!')
+
+        if ( isinstance(destination, str) ):
+            if ( os.access(destination, os.W_OK) == False ):
+                raise ValueError('The given destination directory "' + destination + '" is not writable!')
+
+            self.__directory = destination
+
+        else:
+            self.__archive = destination
+
+        self.__imageFormat = imageFormat.lstrip('.').lower()
+        self.__queue = queue.Queue(queueSize)
+        self.__policy = policy
+        self.__batchSize = batchSize
+        self.__sync = sync
+        self.__errorCallback = errorCallback
+        self.__lock = threading.Lock()
+        self.__submitLock = threading.Lock()
+        self.__workers = []
+
+        for i in range(0, workerCount):
+            worker = threading.Thread(target = self.__work)
+            worker.daemon = True
+            worker.start()
+
+            self.__workers.append(worker)
+
+    def getWrittenCount(self):
+        """
+        Gets the number of written images.
+
+        Returns:
+            The number of images (int).
+        """
+
+        with self.__lock:
+            return self.__writtenCount
+
+    def getDroppedCount(self):
+        """
+        Gets the number of images which were dropped because the queue was full.
+
+        Returns:
+            The number of images (int).
+        """
+
+        with self.__lock:
+            return self.__droppedCount
+
+    def getFailedCount(self):
+        """
+        Gets the number of images which could not be written.
+
+        Returns:
+            The number of images (int).
+        """
+
+        with self.__lock:
+            return self.__failedCount
+
+    def getQueueSize(self):
+        """
+        Gets the number of images waiting to be written.
+
+        Returns:
+            The number of images (int).
+        """
+
+        return self.__queue.qsize()
+
+    def submitImage(self, packedImage, name = None, captureTime = None, timeout = None):
+        """
+        Hands an image over to the workers.
+
+        Arguments:
+            packedImage (bytes): The packed image with 36864 bytes (see `PyFingerprint.downloadPackedImage()`)
+            name (str): The file name (without extension) if written into a directory or None for a sequential name
+            captureTime (float): The capture time in seconds since the epoch or None for the current time
+            timeout (float): The maximum time in seconds to wait for room with `ARCHIVER_POLICY_BLOCK` or None to wait forever
+
+        Returns:
+            True if the image was queued or False if it was dropped.
+
+        Raises:
+            ValueError: if the packed image has the wrong size
+            Exception: if the archiver is closed
+        """
+
+        if ( len(packedImage) != IMAGE_PACKED_SIZE ):
+            raise ValueError('The given packed image must have ' + str(IMAGE_PACKED_SIZE) + ' bytes!')
+
+        if ( captureTime is None ):
+            captureTime = time.time()
+
+        ## Hold the submit lock until the image is queued, so the stop markers of
+        ## close() are always queued after the last image (and never dropped)
+        with self.__submitLock:
+            with self.__lock:
+                if ( self.__closed == True ):
+                    raise Exception('The archiver is closed!')
+
+                if ( name is None ):
+                    name = 'image-%08d' % self.__sequence
+
+                self.__sequence += 1
+
+            item = (name, bytes(packedImage), captureTime)
+
+            if ( self.__policy == ARCHIVER_POLICY_BLOCK ):
+                try:
+                    self.__queue.put(item, True, timeout)
+                    return True
+
+                except queue.Full:
+                    self.__countDropped()
+                    return False
+
+            while ( True ):
+                try:
+                    self.__queue.put_nowait(item)
+                    return True
+
+                except queue.Full:
+                    if ( self.__policy == ARCHIVER_POLICY_DROP_NEWEST ):
+                        self.__countDropped()
+                        return False
+
+                ## Make room by dropping the oldest waiting image (the queue contains no stop marker yet)
+                try:
+                    self.__queue.get_nowait()
+                    self.__countDropped()
+
+                except queue.Empty:
+                    pass
+
+    def downloadImage(self, fingerprint, name = None):
+        """
+        Downloads the image from the image buffer of a sensor and hands it over to the workers.
+
+        Arguments:
+            fingerprint (PyFingerprint): The sensor
+            name (str): The file name (without extension) if written into a directory or None for a sequential name
+
+        Returns:
+            True if the image was queued or False if it was dropped.
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        return self.submitImage(fingerprint.downloadPackedImage(), name)
+
+    def close(self):
+        """
+        Writes all waiting images and stops the workers.
+
+        The destination archive is not closed.
+
+        """
+
+        with self.__submitLock:
+            with self.__lock:
+                if ( self.__closed == True ):
+                    return
+
+                self.__closed = True
+
+            for worker in self.__workers:
+                self.__queue.put(None)
+
+        for worker in self.__workers:
+            worker.join()
+
+    def __countDropped(self):
+        """
+        Counts a dropped image.
+
+        """
+
+        with self.__lock:
+            self.__droppedCount += 1
+
+    def __work(self):
+        """
+        Writes batches of queued images until the archiver is closed.
+
+        """
+
+        stopped = False
+
+        while ( stopped == False ):
+            batch = []
+
+            ## Take the images which are already waiting into the same batch
+            while ( len(batch) < self.__batchSize ):
+                try:
+                    item = self.__queue.get(len(batch) == 0)
+
+                except queue.Empty:
+                    break
+
+                ## Every worker takes exactly one stop marker (after all images)
+                if ( item is None ):
+                    stopped = True
+                    break
+
+                batch.append(item)
+
+            if ( len(batch) > 0 ):
+                self.__writeBatch(batch)
+
+    def __writeBatch(self, batch):
+        """
+        Writes a batch of images and synchronizes the disk once.
+
+        Arguments:
+            batch (list): Tuples of name, packed image and capture time
+        """
+
+        writtenCount = 0
+        openFiles = []
+
+        for (name, packedImage, captureTime) in batch:
+            try:
+                if ( self.__archive is not None ):
+                    self.__archive.appendImage(packedImage, captureTime)
+                else:
+                    openFiles.append(self.__writeImageFile(name, packedImage))
+
+                writtenCount += 1
+
+            except Exception as e:
+                self.__reportError(name, e)
+
+        ## Synchronize the whole batch at once
+        try:
+            if ( self.__archive is not None ):
+                self.__archive.flush(self.__sync)
+
+            else:
+                for imageFile in openFiles:
+                    imageFile.flush()
+
+                    if ( self.__sync == True ):
+                        os.fsync(imageFile.fileno())
+
+                if ( self.__sync == True and len(openFiles) > 0 ):
+                    self.__syncDirectory()
+
+        except Exception as e:
+            self.__callErrorCallback(None, e)
+
+        finally:
+            for imageFile in openFiles:
+                imageFile.close()
+
+        with self.__lock:
+            self.__writtenCount += writtenCount
+
+    def __writeImageFile(self, name, packedImage):
+        """
+        Encodes an image into a file of the destination directory.
+
+        Arguments:
+            name (str): The file name without extension
+            packedImage (bytes): The packed image
+
+        Returns:
+            The still opened file (file).
+        """
+
+        ## PIL is only imported when needed because its import is slow
+        from PIL import Image
+
+        Image.init()
+        imageFormat = Image.EXTENSION.get('.' + self.__imageFormat)
+
+        if ( imageFormat is None ):
+            raise ValueError('The image format "' + self.__imageFormat + '" is not supported!')
+
+        image = Image.frombytes('L', (IMAGE_WIDTH, IMAGE_HEIGHT), bytes(unpackImage(packedImage)))
+        imageFile = open(os.path.join(self.__directory, name + '.' + self.__imageFormat), 'wb')
+
+        try:
+            image.save(imageFile, format = imageFormat)
+
+        except Exception:
+            imageFile.close()
+            raise
+
+        return imageFile
+
+    def __syncDirectory(self):
+        """
+        Forces the directory entries of the written files to the disk (not supported on Windows).
+
+        """
+
+        try:
+            directoryDescriptor = os.open(self.__directory, os.O_RDONLY)
+
+        except OSError:
+            return
+
+        try:
+            os.fsync(directoryDescriptor)
+
+        except OSError:
+            pass
+
+        finally:
+            os.close(directoryDescriptor)
+
+    def __reportError(self, name, error):
+        """
+        Counts a failed image and calls the error callback.
+
+        Arguments:
+            name (str): The name of the image
+            error (Exception): The error
+        """
+
+        with self.__lock:
+            self.__failedCount += 1
+
+        self.__callErrorCallback(name, error)
+
+    def __callErrorCallback(self, name, error):
+        """
+        Calls the error callback (if any) without letting its errors stop the worker.
+
+        Arguments:
+            name (str): The name of the image or None
+            error (Exception): The error
+        """
+
+        if ( self.__errorCallback is None ):
+            return
+
+        ## A stopped worker would never take its stop marker and close() would wait forever
+        try:
+            self.__errorCallback(name, error)
+
+        except Exception:
+            pass
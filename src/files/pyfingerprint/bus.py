@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import serial
+import threading
+
+from .pyfingerprint import PyFingerprint
+from .scheduler import CommandScheduler
+
+
+class SerialBus(object):
+    """
+    Shares one serial port (e.g. a RS-485 bus) between several sensors with different addresses.
+
+    Every sensor is accessed with its own `PyFingerprint` instance (see `getDevice()`). The
+    transactions of all sensors are arbitrated by one `CommandScheduler`, so only one sensor
+    uses the line at a time and interactive operations are preferred over long transfers.
+
+    """
+    __serial = None
+    __scheduler = None
+    __devices = None
+    __lastPort = None
+    __lock = None
+
+    def __init__(self, port = '/dev/ttyUSB0', baudRate = 57600, scheduler = None):
+        """
+        Constructor
+
+        Arguments:
+            port (str): The port to use or an already opened serial-like object
+            baudRate (int): The baud rate to use. Must be a multiple of 9600!
+            scheduler (CommandScheduler): The scheduler which arbitrates the line (a new one per default)
+
+        Raises:
+            ValueError: if baud rate is invalid
+        """
+
+        if ( baudRate < 9600 or baudRate > 115200 or baudRate % 9600 != 0 ):
+            raise ValueError('The given baud rate is invalid!')
+
+        if ( hasattr(port, 'read') and hasattr(port, 'write') ):
+            self.__serial = port
+
+        else:
+            self.__serial = serial.Serial(port = port, baudrate = baudRate, bytesize = serial.EIGHTBITS, timeout = 2)
+
+            if ( self.__serial.isOpen() == False ):
+                self.__serial.open()
+
+        if ( scheduler is None ):
+            scheduler = CommandScheduler()
+
+        self.__scheduler = scheduler
+        self.__devices = {}
+        self.__lock = threading.Lock()
+
+    def getScheduler(self):
+        """
+        Gets the scheduler which arbitrates the line.
+
+        Returns:
+            The scheduler (CommandScheduler).
+        """
+
+        return self.__scheduler
+
+    def getDevice(self, address = 0xFFFFFFFF, password = 0x00000000):
+        """
+        Gets the sensor with the given address (the instance is created on first use).
+
+        Arguments:
+            address (int): The sensor address
+            password (int): The sensor password
+
+        Returns:
+            The sensor (PyFingerprint).
+
+        Raises:
+            ValueError: if address or password are invalid
+        """
+
+        with self.__lock:
+            if ( address not in self.__devices ):
+                fingerprint = PyFingerprint(BusPort(self), address = address, password = password)
+                fingerprint.setScheduler(self.__scheduler)
+                self.__devices[address] = fingerprint
+
+            return self.__devices[address]
+
+    def write(self, busPort, data):
+        """
+        Writes data of a sensor to the line.
+
+        Replies which were left on the line by an other sensor (e.g. after a timeout) are
+        discarded before a different sensor starts writing.
+
+        Arguments:
+            busPort (BusPort): The port of the writing sensor
+            data (bytes): The data
+
+        Returns:
+            The number of written bytes (int).
+        """
+
+        if ( self.__lastPort is not busPort ):
+            self.__lastPort = busPort
+            self.flushInput()
+
+        return self.__serial.write(data)
+
+    def read(self, size = 1):
+        return self.__serial.read(size)
+
+    def flushInput(self):
+        if ( hasattr(self.__serial, 'reset_input_buffer') ):
+            self.__serial.reset_input_buffer()
+        else:
+            self.__serial.flushInput()
+
+    def getSerial(self):
+        """
+        Gets the serial port of the line.
+
+        Returns:
+            The serial port (serial.Serial).
+        """
+
+        return self.__serial
+
+    def close(self):
+        """
+        Closes the serial port.
+
+        """
+
+        if ( self.__serial.isOpen() == True ):
+            self.__serial.close()
+
+
+class BusPort(object):
+    """
+    Serial-like view of a `SerialBus` for a single sensor.
+
+    """
+    __bus = None
+
+    def __init__(self, bus):
+        """
+        Constructor
+
+        Arguments:
+            bus (SerialBus): The bus
+        """
+
+        self.__bus = bus
+
+    @property
+    def timeout(self):
+        return self.__bus.getSerial().timeout
+
+    @timeout.setter
+    def timeout(self, timeout):
+        self.__bus.getSerial().timeout = timeout
+
+    def write(self, data):
+        return self.__bus.write(self, data)
+
+    def read(self, size = 1):
+        return self.__bus.read(size)
+
+    def flushInput(self):
+        self.__bus.flushInput()
+
+    reset_input_buffer = flushInput
+
+    def isOpen(self):
+        return self.__bus.getSerial().isOpen()
+
+    def open(self):
+        pass
+
+    def close(self):
+        ## The port is closed by the bus
+        pass
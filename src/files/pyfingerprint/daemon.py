@@ -0,0 +1,1004 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import contextlib
+import functools
+import os
+import socket
+import stat
+import struct
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+from .pyfingerprint import PacketChecksumError, PacketTimeoutError
+
+
+## Methods of PyFingerprint which can be called by clients
+DAEMON_METHODS = (
+    'verifyPassword',
+    'getSystemParameters',
+    'getStorageCapacity',
+    'getSecurityLevel',
+    'getMaxPacketSize',
+    'getBaudRate',
+    'getAddress',
+    'getTemplateIndex',
+    'getTemplateCount',
+    'clearTemplateIndexCache',
+    'readImage',
+    'uploadImage',
+    'downloadPackedImage',
+    'convertImage',
+    'createTemplate',
+    'storeTemplate',
+    'searchTemplate',
+    'loadTemplate',
+    'deleteTemplate',
+    'clearDatabase',
+    'compareCharacteristics',
+    'uploadCharacteristics',
+    'downloadCharacteristics',
+    'generateRandomNumber',
+)
+
+## Methods of the daemon which open and close a transaction of a sensor for a connection
+DAEMON_TRANSACTION_METHODS = (
+    'beginTransaction',
+    'endTransaction',
+)
+
+## The maximum size of a received frame (protects the daemon against garbage)
+DAEMON_MAX_FRAME_SIZE = 1024 * 1024
+
+## Status of a response
+DAEMON_STATUS_OK = 0x00
+DAEMON_STATUS_ERROR = 0x01
+
+## Tags of the encoded values
+##
+
+DAEMON_TAG_NONE = ord('N')
+DAEMON_TAG_TRUE = ord('T')
+DAEMON_TAG_FALSE = ord('F')
+DAEMON_TAG_INTEGER = ord('i')
+DAEMON_TAG_LONG = ord('q')
+DAEMON_TAG_FLOAT = ord('d')
+DAEMON_TAG_TEXT = ord('s')
+DAEMON_TAG_BYTES = ord('b')
+DAEMON_TAG_LIST = ord('l')
+DAEMON_TAG_TUPLE = ord('t')
+DAEMON_TAG_DICT = ord('m')
+
+## Exceptions which are raised again by the client with their original type
+DAEMON_EXCEPTIONS = {
+    'PacketChecksumError': PacketChecksumError,
+    'PacketTimeoutError': PacketTimeoutError,
+    'ValueError': ValueError,
+}
+
+try:
+    integerTypes = (int, long)
+except NameError:
+    integerTypes = (int,)
+
+textType = type(u'')
+
+
+def encodeValue(value, output):
+    """
+    Appends a value in the compact binary format of the daemon protocol.
+
+    Every value starts with a tag byte. Integers, floats, lengths and counts are big endian.
+
+    Arguments:
+        value (object): None, bool, int, float, str, bytes, list, tuple or dict of these types
+        output (bytearray): The buffer to append the value to
+
+    Raises:
+        ValueError: if the value can not be encoded
+    """
+
+    if ( value is None ):
+        output.append(DAEMON_TAG_NONE)
+
+    elif ( value is True ):
+        output.append(DAEMON_TAG_TRUE)
+
+    elif ( value is False ):
+        output.append(DAEMON_TAG_FALSE)
+
+    elif ( isinstance(value, integerTypes) ):
+        if ( -0x80000000 <= value <= 0x7FFFFFFF ):
+            output.append(DAEMON_TAG_INTEGER)
+            output.extend(struct.pack('>i', value))
+
+        elif ( -0x8000000000000000 <= value <= 0x7FFFFFFFFFFFFFFF ):
+            output.append(DAEMON_TAG_LONG)
+            output.extend(struct.pack('>q', value))
+
+        else:
+            raise ValueError('The given integer is too large!')
+
+    elif ( isinstance(value, float) ):
+        output.append(DAEMON_TAG_FLOAT)
+        output.extend(struct.pack('>d', value))
+
+    ## Native strings (also on Python 2) are sent as text
+    elif ( isinstance(value, (textType, str)) ):
+        if ( isinstance(value, textType) ):
+            value = value.encode('utf-8')
+
+        output.append(DAEMON_TAG_TEXT)
+        output.extend(struct.pack('>I', len(value)))
+        output.extend(value)
+
+    elif ( isinstance(value, (bytes, bytearray, memoryview)) ):
+        value = bytes(value)
+        output.append(DAEMON_TAG_BYTES)
+        output.extend(struct.pack('>I', len(value)))
+        output.extend(value)
+
+    elif ( isinstance(value, (list, tuple)) ):
+        output.append(DAEMON_TAG_TUPLE if isinstance(value, tuple) else DAEMON_TAG_LIST)
+        output.extend(struct.pack('>I', len(value)))
+
+        for item in value:
+            encodeValue(item, output)
+
+    elif ( isinstance(value, dict) ):
+        output.append(DAEMON_TAG_DICT)
+        output.extend(struct.pack('>I', len(value)))
+
+        for (key, item) in value.items():
+            encodeValue(key, output)
+            encodeValue(item, output)
+
+    else:
+        raise ValueError('The given value of type "' + type(value).__name__ + '" can not be encoded!')
+
+def decodeValue(data, offset = 0):
+    """
+    Decodes a value in the compact binary format of the daemon protocol.
+
+    Arguments:
+        data (bytearray): The encoded data
+        offset (int): The position of the value in the data
+
+    Returns:
+        A tuple that contain the following information:
+        0: object The value.
+        1: integer The position behind the value.
+
+    Raises:
+        ValueError: if the data is invalid
+    """
+
+    if ( offset >= len(data) ):
+        raise ValueError('The encoded value is incomplete!')
+
+    tag = data[offset]
+    offset += 1
+
+    try:
+        if ( tag == DAEMON_TAG_NONE ):
+            return (None, offset)
+
+        if ( tag == DAEMON_TAG_TRUE ):
+            return (True, offset)
+
+        if ( tag == DAEMON_TAG_FALSE ):
+            return (False, offset)
+
+        if ( tag == DAEMON_TAG_INTEGER ):
+            return (struct.unpack_from('>i', data, offset)[0], offset + 4)
+
+        if ( tag == DAEMON_TAG_LONG ):
+            return (struct.unpack_from('>q', data, offset)[0], offset + 8)
+
+        if ( tag == DAEMON_TAG_FLOAT ):
+            return (struct.unpack_from('>d', data, offset)[0], offset + 8)
+
+        if ( tag in (DAEMON_TAG_TEXT, DAEMON_TAG_BYTES) ):
+            length = struct.unpack_from('>I', data, offset)[0]
+            offset += 4
+
+            if ( offset + length > len(data) ):
+                raise ValueError('The encoded value is incomplete!')
+
+            value = bytes(data[offset:offset + length])
+
+            if ( tag == DAEMON_TAG_TEXT ):
+                value = value.decode('utf-8')
+
+            return (value, offset + length)
+
+        if ( tag in (DAEMON_TAG_LIST, DAEMON_TAG_TUPLE) ):
+            count = struct.unpack_from('>I', data, offset)[0]
+            offset += 4
+            items = []
+
+            for i in range(0, count):
+                (item, offset) = decodeValue(data, offset)
+                items.append(item)
+
+            if ( tag == DAEMON_TAG_TUPLE ):
+                items = tuple(items)
+
+            return (items, offset)
+
+        if ( tag == DAEMON_TAG_DICT ):
+            count = struct.unpack_from('>I', data, offset)[0]
+            offset += 4
+            items = {}
+
+            for i in range(0, count):
+                (key, offset) = decodeValue(data, offset)
+                (items[key], offset) = decodeValue(data, offset)
+
+            return (items, offset)
+
+    except struct.error:
+        raise ValueError('The encoded value is incomplete!')
+
+    raise ValueError('The encoded value has the unknown tag ' + hex(tag) + '!')
+
+def sendFrame(connection, body):
+    """
+    Sends a frame (length and body) over a socket.
+
+    Arguments:
+        connection (socket): The socket
+        body (bytearray): The body
+    """
+
+    connection.sendall(bytes(struct.pack('>I', len(body)) + body))
+
+def receiveFrame(connection):
+    """
+    Receives a frame (length and body) from a socket.
+
+    Arguments:
+        connection (socket): The socket
+
+    Returns:
+        The body (bytearray) or None if the connection was closed.
+
+    Raises:
+        ValueError: if the frame is too large
+        Exception: if the connection was closed within a frame
+    """
+
+    header = receiveBytes(connection, 4)
+
+    if ( len(header) == 0 ):
+        return None
+
+    if ( len(header) < 4 ):
+        raise Exception('The connection was closed within a frame!')
+
+    frameSize = struct.unpack('>I', bytes(header))[0]
+
+    if ( frameSize > DAEMON_MAX_FRAME_SIZE ):
+        raise ValueError('The received frame is too large!')
+
+    body = receiveBytes(connection, frameSize)
+
+    if ( len(body) < frameSize ):
+        raise Exception('The connection was closed within a frame!')
+
+    return body
+
+def receiveBytes(connection, size):
+    """
+    Receives the given number of bytes from a socket.
+
+    Arguments:
+        connection (socket): The socket
+        size (int): The number of bytes
+
+    Returns:
+        The received bytes (bytearray). Fewer bytes if the connection was closed.
+    """
+
+    data = bytearray()
+
+    while ( len(data) < size ):
+        fragment = connection.recv(size - len(data))
+
+        if ( len(fragment) == 0 ):
+            break
+
+        data.extend(fragment)
+
+    return data
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Internally used by `FingerprintDaemon` to accept the connections of the clients.
+
+    """
+    daemon_threads = True
+    fingerprintDaemon = None
+
+
+class DaemonRequestHandler(socketserver.BaseRequestHandler):
+    """
+    Internally used by `FingerprintDaemon` to serve a connection.
+
+    """
+
+    def handle(self):
+        self.server.fingerprintDaemon.handleConnection(self.request)
+
+
+class DaemonTransaction(object):
+    """
+    Internally used by `FingerprintDaemon` to execute the requests of a connection within one transaction of a sensor.
+
+    The transaction is owned by a thread of its own which executes the requests one after another,
+    because the requests of a connection are executed by different threads.
+
+    """
+    __queue = None
+    __thread = None
+    __lock = None
+    __depth = 1
+    __error = None
+
+    def __init__(self, fingerprint, operation = None, deadline = None):
+        """
+        Constructor (waits until the transaction is started)
+
+        Arguments:
+            fingerprint (PyFingerprint): The sensor
+            operation (str): The name of the operation (used by a scheduler to prioritize it)
+            deadline (float): The maximum duration of the transaction in seconds or None
+
+        Raises:
+            Exception: if the transaction could not be started (e.g. the deadline expired)
+        """
+
+        self.__queue = queue.Queue()
+        self.__lock = threading.Lock()
+
+        started = threading.Event()
+
+        self.__thread = threading.Thread(target = self.__run, args = (fingerprint, operation, deadline, started))
+        self.__thread.daemon = True
+        self.__thread.start()
+
+        started.wait()
+
+        if ( self.__error is not None ):
+            self.__thread.join()
+            raise self.__error
+
+    def __run(self, fingerprint, operation, deadline, started):
+        """
+        Owns the transaction and executes the queued requests until `end()` is called.
+
+        Arguments:
+            fingerprint (PyFingerprint): The sensor
+            operation (str): The name of the operation
+            deadline (float): The maximum duration of the transaction in seconds or None
+            started (Event): The event which is set when the transaction is started
+        """
+
+        try:
+            with fingerprint.transaction(operation, deadline):
+                started.set()
+
+                while ( True ):
+                    request = self.__queue.get()
+
+                    if ( request is None ):
+                        break
+
+                    (function, args, kwargs, response) = request
+
+                    try:
+                        response[1] = function(*args, **kwargs)
+
+                    except Exception as e:
+                        response[2] = e
+
+                    response[0].set()
+
+        except Exception as e:
+            self.__error = e
+            started.set()
+
+    def begin(self):
+        """
+        Opens a nested transaction.
+
+        """
+
+        with self.__lock:
+            self.__depth += 1
+
+    def execute(self, function, args, kwargs):
+        """
+        Calls a function within the transaction and waits for the result.
+
+        Arguments:
+            function (callable): The function (e.g. a method of the sensor)
+            args (list): The arguments
+            kwargs (dict): The keyword arguments
+
+        Returns:
+            The result of the function.
+
+        Raises:
+            Exception: if the function raised an exception or the transaction is already ended
+        """
+
+        ## The event, result and exception of the request
+        response = [threading.Event(), None, None]
+
+        with self.__lock:
+            if ( self.__depth == 0 ):
+                raise Exception('The transaction is already ended!')
+
+            self.__queue.put((function, args, kwargs, response))
+
+        response[0].wait()
+
+        if ( response[2] is not None ):
+            raise response[2]
+
+        return response[1]
+
+    def end(self, force = False):
+        """
+        Closes the (nested) transaction.
+
+        Arguments:
+            force (bool): Close all nested transactions (e.g. if the connection is closed)
+
+        Returns:
+            True if the transaction of the sensor is released or False if it is still nested.
+        """
+
+        with self.__lock:
+            if ( self.__depth == 0 ):
+                return True
+
+            self.__depth = 0 if force else self.__depth - 1
+
+            if ( self.__depth > 0 ):
+                return False
+
+            self.__queue.put(None)
+
+        self.__thread.join()
+        return True
+
+
+class FingerprintDaemon(object):
+    """
+    Long-running process which owns the sensors and exposes their API over a local Unix socket.
+
+    Clients (see `FingerprintClient`) skip the port setup and the password verification, and
+    several processes can share one sensor including its caches (e.g. the template index).
+    Every request is executed in its own thread, so requests to different sensors run
+    concurrently while requests to the same sensor are serialized by its transactions.
+
+    Only the methods listed in `DAEMON_METHODS` can be called.
+
+    A client can group several requests to a sensor with the methods `beginTransaction` (with the
+    optional arguments operation and deadline, see `PyFingerprint.transaction()`) and
+    `endTransaction`, e.g. to identify a finger without requests of other clients between its
+    commands (see `RemoteFingerprint.transaction()`). The transaction is pinned to the connection:
+    all requests of the connection to the sensor are executed within it, and it is ended when the
+    connection is closed. Other connections wait for the sensor until then.
+
+    Protocol: Every frame consists of its length (4 bytes, big endian) and its body. The body
+    of a request is the request id (4 bytes) followed by the encoded tuple of sensor name,
+    method name, arguments and keyword arguments (see `encodeValue()`). The body of a response
+    is the request id, the status (1 byte) and the encoded result or the encoded tuple of
+    exception type and message. Responses are sent as soon as their request is completed, so
+    their order may differ from the order of the requests.
+
+    """
+    __socketPath = None
+    __sensors = None
+    __methods = None
+    __server = None
+    __transactionsLock = None
+
+    def __init__(self, socketPath, sensors, socketMode = 0o660, methods = DAEMON_METHODS):
+        """
+        Constructor
+
+        Arguments:
+            socketPath (str): Path of the Unix socket
+            sensors (dict): The sensors (PyFingerprint) by name
+            socketMode (int): The file permissions of the socket
+            methods (tuple): The names of the methods which can be called
+
+        Raises:
+            ValueError: if no sensor is given
+            Exception: if the socket path is used by an other file
+        """
+
+        if ( len(sensors) == 0 ):
+            raise ValueError('At least one sensor is required!')
+
+        ## Remove the socket of a previous daemon
+        if ( os.path.exists(socketPath) ):
+            if ( stat.S_ISSOCK(os.stat(socketPath).st_mode) == False ):
+                raise Exception('The given socket path "' + socketPath + '" is used by an other file!')
+
+            os.unlink(socketPath)
+
+        self.__socketPath = socketPath
+        self.__sensors = dict(sensors)
+        self.__methods = frozenset(methods)
+        self.__transactionsLock = threading.Lock()
+
+        self.__server = DaemonServer(socketPath, DaemonRequestHandler)
+        self.__server.fingerprintDaemon = self
+
+        os.chmod(socketPath, socketMode)
+
+    def serveForever(self):
+        """
+        Serves the clients until `shutdown()` is called.
+
+        """
+
+        self.__server.serve_forever()
+
+    def shutdown(self):
+        """
+        Stops `serveForever()` (must be called from an other thread).
+
+        """
+
+        self.__server.shutdown()
+
+    def close(self):
+        """
+        Closes the socket and removes its file.
+
+        """
+
+        self.__server.server_close()
+
+        if ( os.path.exists(self.__socketPath) ):
+            os.unlink(self.__socketPath)
+
+    def handleConnection(self, connection):
+        """
+        Serves the requests of a client connection until it is closed.
+
+        Arguments:
+            connection (socket): The connection
+        """
+
+        writeLock = threading.Lock()
+        threads = []
+
+        ## The open transactions (DaemonTransaction) of the connection by sensor name
+        transactions = {}
+
+        try:
+            while ( True ):
+                body = receiveFrame(connection)
+
+                if ( body is None ):
+                    break
+
+                thread = threading.Thread(target = self.__handleRequest, args = (connection, writeLock, transactions, body))
+                thread.daemon = True
+                thread.start()
+
+                threads.append(thread)
+                threads = [thread for thread in threads if thread.is_alive()]
+
+        except Exception:
+            ## The connection is broken or sent garbage
+            pass
+
+        ## The connection is closed by the server after the last response was sent
+        for thread in threads:
+            thread.join()
+
+        ## Release the sensors of the transactions which were not ended by the client
+        with self.__transactionsLock:
+            openTransactions = list(transactions.values())
+            transactions.clear()
+
+        for transaction in openTransactions:
+            transaction.end(force = True)
+
+    def __handleRequest(self, connection, writeLock, transactions, body):
+        """
+        Executes a request and sends the response.
+
+        Arguments:
+            connection (socket): The connection
+            writeLock (Lock): The lock for sending on the connection
+            transactions (dict): The open transactions of the connection
+            body (bytearray): The body of the request
+        """
+
+        if ( len(body) < 4 ):
+            return
+
+        requestId = struct.unpack_from('>I', body, 0)[0]
+
+        try:
+            (request, offset) = decodeValue(body, 4)
+            (sensorName, methodName, args, kwargs) = request
+
+            result = self.__execute(sensorName, methodName, args, kwargs, transactions)
+
+            response = bytearray(struct.pack('>IB', requestId, DAEMON_STATUS_OK))
+            encodeValue(result, response)
+
+        except Exception as e:
+            response = bytearray(struct.pack('>IB', requestId, DAEMON_STATUS_ERROR))
+            encodeValue((type(e).__name__, str(e)), response)
+
+        try:
+            with writeLock:
+                sendFrame(connection, response)
+
+        except (socket.error, OSError):
+            ## The client is gone
+            pass
+
+    def __execute(self, sensorName, methodName, args, kwargs, transactions):
+        """
+        Calls a method of a sensor (within the open transaction of the connection if any).
+
+        Arguments:
+            sensorName (str): The name of the sensor or None to get the names of all sensors
+            methodName (str): The name of the method
+            args (list): The arguments
+            kwargs (dict): The keyword arguments
+            transactions (dict): The open transactions of the connection
+
+        Returns:
+            The result of the method.
+
+        Raises:
+            ValueError: if the sensor or method is unknown
+        """
+
+        if ( sensorName is None ):
+            return sorted(self.__sensors.keys())
+
+        if ( sensorName not in self.__sensors ):
+            raise ValueError('The sensor "' + str(sensorName) + '" is unknown!')
+
+        if ( methodName not in self.__methods and methodName not in DAEMON_TRANSACTION_METHODS ):
+            raise ValueError('The method "' + str(methodName) + '" can not be called!')
+
+        ## Keyword arguments must be native strings on Python 2
+        kwargs = dict((str(key), value) for (key, value) in kwargs.items())
+
+        if ( methodName == 'beginTransaction' ):
+            return self.__beginTransaction(sensorName, transactions, *args, **kwargs)
+
+        if ( methodName == 'endTransaction' ):
+            return self.__endTransaction(sensorName, transactions)
+
+        method = getattr(self.__sensors[sensorName], str(methodName))
+
+        with self.__transactionsLock:
+            transaction = transactions.get(sensorName)
+
+        if ( transaction is not None ):
+            return transaction.execute(method, args, kwargs)
+
+        return method(*args, **kwargs)
+
+    def __beginTransaction(self, sensorName, transactions, operation = None, deadline = None):
+        """
+        Opens a transaction of a sensor for a connection (nested if it is already open).
+
+        Arguments:
+            sensorName (str): The name of the sensor
+            transactions (dict): The open transactions of the connection
+            operation (str): The name of the operation (used by a scheduler to prioritize it)
+            deadline (float): The maximum duration of the transaction in seconds or None
+
+        Returns:
+            True if the transaction was opened.
+
+        Raises:
+            PacketTimeoutError: if the deadline expired while waiting for the sensor
+        """
+
+        with self.__transactionsLock:
+            transaction = transactions.get(sensorName)
+
+            if ( transaction is not None ):
+                transaction.begin()
+                return True
+
+        ## Wait for the sensor outside of the lock (other transactions of the connection may be ended meanwhile)
+        transaction = DaemonTransaction(self.__sensors[sensorName], operation, deadline)
+
+        with self.__transactionsLock:
+            transactions[sensorName] = transaction
+
+        return True
+
+    def __endTransaction(self, sensorName, transactions):
+        """
+        Closes the (nested) transaction of a sensor for a connection.
+
+        Arguments:
+            sensorName (str): The name of the sensor
+            transactions (dict): The open transactions of the connection
+
+        Returns:
+            True if the sensor was released or False if the transaction is still nested.
+
+        Raises:
+            ValueError: if no transaction of the sensor is open
+        """
+
+        with self.__transactionsLock:
+            transaction = transactions.get(sensorName)
+
+            if ( transaction is None ):
+                raise ValueError('No transaction of the sensor "' + str(sensorName) + '" is open!')
+
+            released = transaction.end()
+
+            if ( released == True ):
+                del transactions[sensorName]
+
+        return released
+
+
+class FingerprintClient(object):
+    """
+    Calls the methods of the sensors of a `FingerprintDaemon`.
+
+    The client is thread-safe: the requests of several threads are multiplexed over one
+    connection and every thread waits for its own response.
+
+    Example:
+        client = FingerprintClient('/run/pyfingerprint.sock')
+        f = client.getSensor('door')
+
+        with f.transaction(deadline = 5):
+            if ( f.readImage() == True ):
+                f.convertImage(FINGERPRINT_CHARBUFFER1)
+                print(f.searchTemplate())
+
+    """
+    __socket = None
+    __writeLock = None
+    __pendingLock = None
+    __pendingRequests = None
+    __nextRequestId = 0
+    __closedError = None
+    __readerThread = None
+
+    def __init__(self, socketPath):
+        """
+        Constructor
+
+        Arguments:
+            socketPath (str): Path of the Unix socket of the daemon
+        """
+
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.connect(socketPath)
+
+        self.__writeLock = threading.Lock()
+        self.__pendingLock = threading.Lock()
+        self.__pendingRequests = {}
+
+        self.__readerThread = threading.Thread(target = self.__readResponses)
+        self.__readerThread.daemon = True
+        self.__readerThread.start()
+
+    def close(self):
+        """
+        Closes the connection to the daemon.
+
+        """
+
+        try:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+
+        except (socket.error, OSError):
+            pass
+
+        self.__socket.close()
+        self.__readerThread.join()
+
+    def __readResponses(self):
+        """
+        Receives the responses and hands them to the waiting threads.
+
+        """
+
+        error = Exception('The connection to the daemon was closed!')
+
+        try:
+            while ( True ):
+                body = receiveFrame(self.__socket)
+
+                if ( body is None ):
+                    break
+
+                (requestId, status) = struct.unpack_from('>IB', body, 0)
+                (value, offset) = decodeValue(body, 5)
+
+                with self.__pendingLock:
+                    pendingRequest = self.__pendingRequests.pop(requestId, None)
+
+                if ( pendingRequest is not None ):
+                    pendingRequest[1] = status
+                    pendingRequest[2] = value
+                    pendingRequest[0].set()
+
+        except Exception as e:
+            error = e
+
+        ## Wake up all threads which are still waiting
+        with self.__pendingLock:
+            self.__closedError = error
+            pendingRequests = list(self.__pendingRequests.values())
+            self.__pendingRequests.clear()
+
+        for pendingRequest in pendingRequests:
+            pendingRequest[0].set()
+
+    def call(self, sensorName, methodName, *args, **kwargs):
+        """
+        Calls a method of a sensor of the daemon and waits for the result.
+
+        Arguments:
+            sensorName (str): The name of the sensor
+            methodName (str): The name of the method
+            *args: The arguments of the method
+            **kwargs: The keyword arguments of the method (e.g. `deadline`)
+
+        Returns:
+            The result of the method.
+
+        Raises:
+            Exception: if the method raised an exception or the connection was closed
+        """
+
+        request = bytearray()
+        encodeValue((sensorName, methodName, args, kwargs), request)
+
+        ## The event, status and value of the response
+        pendingRequest = [threading.Event(), None, None]
+
+        with self.__pendingLock:
+            if ( self.__closedError is not None ):
+                raise self.__closedError
+
+            requestId = self.__nextRequestId
+            self.__nextRequestId = (self.__nextRequestId + 1) & 0xFFFFFFFF
+            self.__pendingRequests[requestId] = pendingRequest
+
+        with self.__writeLock:
+            sendFrame(self.__socket, bytearray(struct.pack('>I', requestId)) + request)
+
+        pendingRequest[0].wait()
+
+        (event, status, value) = pendingRequest
+
+        if ( status is None ):
+            raise self.__closedError
+
+        if ( status != DAEMON_STATUS_OK ):
+            (errorType, errorMessage) = value
+            raise DAEMON_EXCEPTIONS.get(errorType, Exception)(errorMessage)
+
+        return value
+
+    def getSensorNames(self):
+        """
+        Gets the names of the sensors of the daemon.
+
+        Returns:
+            The names (list).
+        """
+
+        return self.call(None, None)
+
+    def getSensor(self, sensorName):
+        """
+        Gets a proxy which calls the methods of a sensor of the daemon like a `PyFingerprint`.
+
+        Arguments:
+            sensorName (str): The name of the sensor
+
+        Returns:
+            The proxy (RemoteFingerprint).
+        """
+
+        return RemoteFingerprint(self, sensorName)
+
+
+class RemoteFingerprint(object):
+    """
+    Proxy of a sensor of a `FingerprintDaemon` (see `FingerprintClient.getSensor()`).
+
+    Only the methods listed in `DAEMON_METHODS` and `transaction()` are available.
+
+    """
+    __client = None
+    __sensorName = None
+
+    def __init__(self, client, sensorName):
+        """
+        Constructor
+
+        Arguments:
+            client (FingerprintClient): The client
+            sensorName (str): The name of the sensor
+        """
+
+        self.__client = client
+        self.__sensorName = sensorName
+
+    def __getattr__(self, name):
+        if ( name not in DAEMON_METHODS ):
+            raise AttributeError(name)
+
+        return functools.partial(self.__client.call, self.__sensorName, name)
+
+    @contextlib.contextmanager
+    def transaction(self, operation = None, deadline = None):
+        """
+        Context manager which gives the connection of the client exclusive access to the sensor.
+
+        All requests of the connection (also of other threads of the client) to the sensor are
+        executed within the transaction. Nested transactions are allowed.
+
+        Example:
+            with f.transaction(deadline = 5):
+                f.readImage()
+                f.convertImage(FINGERPRINT_CHARBUFFER1)
+                f.searchTemplate()
+
+        Arguments:
+            operation (str): The name of the operation (used by a scheduler to prioritize it)
+            deadline (float): The maximum duration of the transaction in seconds or None
+
+        Returns:
+            This proxy (RemoteFingerprint) as context.
+
+        Raises:
+            PacketTimeoutError: if the deadline expired while waiting for the sensor
+        """
+
+        self.__client.call(self.__sensorName, 'beginTransaction', operation, deadline)
+
+        try:
+            yield self
+
+        finally:
+            self.__client.call(self.__sensorName, 'endTransaction')
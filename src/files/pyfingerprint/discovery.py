@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import serial
+import threading
+
+from .pyfingerprint import PyFingerprint, FINGERPRINT_VERIFYPASSWORD, FINGERPRINT_GETSYSTEMPARAMETERS
+
+
+## Baud rates which are probed (the most common first)
+DISCOVERY_BAUD_RATES = (57600, 115200, 9600, 19200, 38400, 28800, 48000, 67200, 76800, 86400, 96000, 105600)
+
+
+def listPorts():
+    """
+    Lists the serial ports of the system.
+
+    Returns:
+        The names of the ports (list).
+    """
+
+    ## Only imported when needed because it is not used otherwise
+    import serial.tools.list_ports
+
+    return sorted(port.device for port in serial.tools.list_ports.comports())
+
+def probePort(port, baudRates = DISCOVERY_BAUD_RATES, address = 0xFFFFFFFF, password = 0x00000000, timeout = 0.5):
+    """
+    Probes the baud rates of a port one after another until a sensor replies.
+
+    Note: The probes are sent to every device connected to the port.
+
+    Arguments:
+        port (str): The port
+        baudRates (tuple): The baud rates to probe
+        address (int): The sensor address
+        password (int): The sensor password
+        timeout (float): The time in seconds to wait for a reply at each baud rate
+
+    Returns:
+        A tuple that contain the following information or None if no sensor was found:
+        0: str The port.
+        1: integer The baud rate.
+        2: tuple The system parameters (see `PyFingerprint.getSystemParameters()`).
+    """
+
+    for baudRate in baudRates:
+        try:
+            connection = serial.Serial(port = port, baudrate = baudRate, bytesize = serial.EIGHTBITS, timeout = timeout)
+
+        except (serial.SerialException, OSError, ValueError):
+            ## The port can not be used at all
+            return None
+
+        try:
+            fingerprint = PyFingerprint(connection, baudRate, address, password)
+            fingerprint.setCommandRetries(0)
+            fingerprint.setCommandTimeout(FINGERPRINT_VERIFYPASSWORD, timeout)
+            fingerprint.setCommandTimeout(FINGERPRINT_GETSYSTEMPARAMETERS, timeout)
+
+            ## The sensor replied but the password is wrong: no other baud rate will work
+            if ( fingerprint.verifyPassword() == False ):
+                return None
+
+            return (port, baudRate, fingerprint.getSystemParameters())
+
+        except Exception:
+            ## No (valid) reply at this baud rate
+            continue
+
+        finally:
+            connection.close()
+
+    return None
+
+def discover(ports = None, baudRates = DISCOVERY_BAUD_RATES, address = 0xFFFFFFFF, password = 0x00000000, timeout = 0.5):
+    """
+    Finds the sensors connected to the serial ports.
+
+    All ports are probed concurrently (one thread per port) and the baud rates of each port
+    one after another with short timeouts (see `probePort()`).
+
+    Note: The probes are sent to every device connected to the ports.
+
+    Arguments:
+        ports (list): The ports to probe or None to probe all ports of the system
+        baudRates (tuple): The baud rates to probe
+        address (int): The sensor address
+        password (int): The sensor password
+        timeout (float): The time in seconds to wait for a reply at each baud rate
+
+    Returns:
+        A list (in order of the ports) of tuples that contain the following information:
+        0: str The port.
+        1: integer The baud rate.
+        2: tuple The system parameters (see `PyFingerprint.getSystemParameters()`).
+    """
+
+    if ( ports is None ):
+        ports = listPorts()
+
+    ports = list(ports)
+    results = [None] * len(ports)
+
+    def probe(portIndex):
+        results[portIndex] = probePort(ports[portIndex], baudRates, address, password, timeout)
+
+    threads = [threading.Thread(target = probe, args = (portIndex,)) for portIndex in range(0, len(ports))]
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return [result for result in results if result is not None]
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import operator
+
+
+## Size of the images of the sensor
+IMAGE_WIDTH = 256
+IMAGE_HEIGHT = 288
+
+## Number of bytes of an image with 8 bits per pixel
+IMAGE_SIZE = IMAGE_WIDTH * IMAGE_HEIGHT
+
+## Number of bytes of an image with 4 bits per pixel (as transferred by the sensor)
+IMAGE_PACKED_SIZE = IMAGE_SIZE // 2
+
+## Lookup tables for bytes.translate()
+##
+
+## Pixel to the upper 4 bits of a packed byte
+PACK_HIGH_TABLE = bytes(bytearray((pixel & 0xF0) for pixel in range(256)))
+
+## Pixel to the lower 4 bits of a packed byte
+PACK_LOW_TABLE = bytes(bytearray((pixel >> 4) for pixel in range(256)))
+
+## Packed byte to the left pixel (multiplied with 17 to use the full range of 0 to 255)
+UNPACK_HIGH_TABLE = bytes(bytearray((packedByte >> 4) * 17 for packedByte in range(256)))
+
+## Packed byte to the right pixel
+UNPACK_LOW_TABLE = bytes(bytearray((packedByte & 0x0F) * 17 for packedByte in range(256)))
+
+
+def isNumpyArray(image):
+    """
+    Checks if the given object is a NumPy array without importing NumPy.
+
+    Arguments:
+        image (object): The object
+
+    Returns:
+        True if it is a NumPy array or False otherwise.
+    """
+
+    return type(image).__module__ == 'numpy' and hasattr(image, 'shape')
+
+def isPilImage(image):
+    """
+    Checks if the given object is a PIL image without importing PIL.
+
+    Arguments:
+        image (object): The object
+
+    Returns:
+        True if it is a PIL image or False otherwise.
+    """
+
+    return hasattr(image, 'convert') and hasattr(image, 'tobytes') and hasattr(image, 'size')
+
+def getPixels(image):
+    """
+    Gets the 8-bit grayscale pixels of an image.
+
+    Arguments:
+        image (object): A PIL image, a NumPy array or bytes with IMAGE_WIDTH x IMAGE_HEIGHT pixels
+
+    Returns:
+        The pixels (bytes) row by row.
+
+    Raises:
+        ValueError: if the image has the wrong size
+    """
+
+    if ( isPilImage(image) ):
+        if ( tuple(image.size) != (IMAGE_WIDTH, IMAGE_HEIGHT) ):
+            raise ValueError('The given image must have ' + str(IMAGE_WIDTH) + 'x' + str(IMAGE_HEIGHT) + ' pixels!')
+
+        pixels = image.convert('L').tobytes()
+
+    elif ( isNumpyArray(image) ):
+        if ( image.size != IMAGE_SIZE ):
+            raise ValueError('The given image must have ' + str(IMAGE_WIDTH) + 'x' + str(IMAGE_HEIGHT) + ' pixels!')
+
+        pixels = image.astype('uint8').tobytes()
+
+    else:
+        pixels = bytes(bytearray(image))
+
+    if ( len(pixels) != IMAGE_SIZE ):
+        raise ValueError('The given image must have ' + str(IMAGE_WIDTH) + 'x' + str(IMAGE_HEIGHT) + ' pixels!')
+
+    return pixels
+
+def packImage(image):
+    """
+    Packs an image to 4 bits per pixel as expected by the sensor.
+
+    Arguments:
+        image (object): A PIL image, a NumPy array or bytes with IMAGE_WIDTH x IMAGE_HEIGHT pixels
+
+    Returns:
+        The packed image (bytes) with IMAGE_PACKED_SIZE bytes.
+
+    Raises:
+        ValueError: if the image has the wrong size
+    """
+
+    ## Pack the image with NumPy directly
+    if ( isNumpyArray(image) and image.size == IMAGE_SIZE ):
+        pixels = image.reshape((IMAGE_HEIGHT, IMAGE_WIDTH)).astype('uint8')
+        return ((pixels[:, 0::2] & 0xF0) | (pixels[:, 1::2] >> 4)).tobytes()
+
+    pixels = bytearray(getPixels(image))
+
+    ## The left pixel is stored in the upper 4 bits and the right pixel in the lower 4 bits
+    highBits = bytes(pixels[0::2].translate(PACK_HIGH_TABLE))
+    lowBits = bytes(pixels[1::2].translate(PACK_LOW_TABLE))
+
+    ## Combine both halves with one big integer operation if available
+    if ( hasattr(int, 'from_bytes') ):
+        packedImage = int.from_bytes(highBits, 'big') | int.from_bytes(lowBits, 'big')
+        return packedImage.to_bytes(IMAGE_PACKED_SIZE, 'big')
+
+    return bytes(bytearray(map(operator.or_, bytearray(highBits), bytearray(lowBits))))
+
+def unpackImage(packedImage):
+    """
+    Unpacks an image with 4 bits per pixel (as sent by the sensor) to 8 bits per pixel.
+
+    Arguments:
+        packedImage (bytes): The packed image with IMAGE_PACKED_SIZE bytes
+
+    Returns:
+        The pixels (bytearray) row by row.
+
+    Raises:
+        ValueError: if the packed image has the wrong size
+    """
+
+    packedImage = bytearray(packedImage)
+
+    if ( len(packedImage) != IMAGE_PACKED_SIZE ):
+        raise ValueError('The given packed image must have ' + str(IMAGE_PACKED_SIZE) + ' bytes!')
+
+    pixels = bytearray(IMAGE_SIZE)
+    pixels[0::2] = packedImage.translate(UNPACK_HIGH_TABLE)
+    pixels[1::2] = packedImage.translate(UNPACK_LOW_TABLE)
+    return pixels
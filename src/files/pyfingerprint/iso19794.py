@@ -0,0 +1,391 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import struct
+
+from .imagecodec import IMAGE_WIDTH, IMAGE_HEIGHT
+from .minutiae import MINUTIAE_COLUMN_X, MINUTIAE_COLUMN_Y, MINUTIAE_COLUMN_ANGLE, MINUTIAE_COLUMN_TYPE, MINUTIAE_COLUMN_QUALITY, extractMinutiae
+
+
+## Format identifier and version of a record (ISO/IEC 19794-2:2005)
+ISO_FORMAT_IDENTIFIER = b'FMR\x00'
+ISO_VERSION = b' 20\x00'
+
+## Header: format identifier (4 bytes), version (4 bytes), record length (4 bytes), capture equipment (2 bytes),
+## image width and height (2 bytes each), horizontal and vertical resolution (2 bytes each), number of finger views (1 byte), reserved (1 byte)
+ISO_HEADER_FORMAT = '>4s4sIHHHHHBB'
+ISO_HEADER_SIZE = struct.calcsize(ISO_HEADER_FORMAT)
+
+## Finger view header: finger position, view number and impression type (4 bits each), finger quality, number of minutiae
+ISO_VIEW_HEADER_FORMAT = '>BBBB'
+ISO_VIEW_HEADER_SIZE = struct.calcsize(ISO_VIEW_HEADER_FORMAT)
+
+## Minutia: type (2 bits) and x (14 bits), reserved (2 bits) and y (14 bits), angle (1 byte), quality (1 byte)
+ISO_MINUTIA_SIZE = 6
+
+## Length of the (empty) extended data block behind the minutiae
+ISO_EXTENDED_DATA_LENGTH_SIZE = 2
+
+## Maximum number of minutiae of a finger view
+ISO_MAX_MINUTIAE = 255
+
+## Resolution of the sensor in pixels per centimeter (500 dpi)
+ISO_RESOLUTION = 197
+
+
+def getMinutiaType():
+    """
+    Gets the NumPy data type of a minutia in a record.
+
+    Returns:
+        The data type (NumPy dtype).
+    """
+
+    import numpy
+
+    return numpy.dtype([('typeX', '>u2'), ('y', '>u2'), ('angle', 'u1'), ('quality', 'u1')])
+
+def packMinutiae(minutiae):
+    """
+    Converts minutiae to their representation in a record.
+
+    Arguments:
+        minutiae (NumPy array): The minutiae (see `extractMinutiae()`)
+
+    Returns:
+        The packed minutiae (NumPy array of `getMinutiaType()`).
+
+    Raises:
+        ValueError: if any minutia is invalid
+    """
+
+    import numpy
+
+    minutiae = numpy.asarray(minutiae, dtype = numpy.int64).reshape((-1, 5))
+
+    x = minutiae[:, MINUTIAE_COLUMN_X]
+    y = minutiae[:, MINUTIAE_COLUMN_Y]
+    types = minutiae[:, MINUTIAE_COLUMN_TYPE]
+    qualities = minutiae[:, MINUTIAE_COLUMN_QUALITY]
+
+    if ( ((x < 0) | (x > 0x3FFF) | (y < 0) | (y > 0x3FFF)).any() ):
+        raise ValueError('The position of a minutia is out of range!')
+
+    if ( ((types < 0) | (types > 2)).any() or ((qualities < 0) | (qualities > 100)).any() ):
+        raise ValueError('The type or quality of a minutia is invalid!')
+
+    packedMinutiae = numpy.empty(len(minutiae), dtype = getMinutiaType())
+    packedMinutiae['typeX'] = (types << 14) | x
+    packedMinutiae['y'] = y
+
+    ## The angle is stored in units of 360/256 degrees
+    packedMinutiae['angle'] = numpy.round(minutiae[:, MINUTIAE_COLUMN_ANGLE] * (256 / 360.0)).astype(numpy.int64) % 256
+    packedMinutiae['quality'] = qualities
+
+    return packedMinutiae
+
+def unpackMinutiae(packedMinutiae):
+    """
+    Converts minutiae of a record to the minutiae array of `extractMinutiae()`.
+
+    Arguments:
+        packedMinutiae (NumPy array): The packed minutiae (of `getMinutiaType()`)
+
+    Returns:
+        The minutiae (NumPy array of uint16).
+    """
+
+    import numpy
+
+    typeX = packedMinutiae['typeX'].astype(numpy.int64)
+
+    minutiae = numpy.empty((len(packedMinutiae), 5), dtype = numpy.uint16)
+    minutiae[:, MINUTIAE_COLUMN_X] = typeX & 0x3FFF
+    minutiae[:, MINUTIAE_COLUMN_Y] = packedMinutiae['y'] & 0x3FFF
+    minutiae[:, MINUTIAE_COLUMN_ANGLE] = numpy.round(packedMinutiae['angle'] * (360 / 256.0)).astype(numpy.int64) % 360
+    minutiae[:, MINUTIAE_COLUMN_TYPE] = typeX >> 14
+    minutiae[:, MINUTIAE_COLUMN_QUALITY] = packedMinutiae['quality']
+
+    return minutiae
+
+def selectMinutiae(minutiae):
+    """
+    Gets the minutiae of the best quality which fit into a finger view (see `ISO_MAX_MINUTIAE`).
+
+    Arguments:
+        minutiae (NumPy array): The minutiae
+
+    Returns:
+        The minutiae (NumPy array) in their original order.
+    """
+
+    import numpy
+
+    if ( len(minutiae) <= ISO_MAX_MINUTIAE ):
+        return minutiae
+
+    best = numpy.argsort(-minutiae[:, MINUTIAE_COLUMN_QUALITY].astype(numpy.int64), kind = 'mergesort')[:ISO_MAX_MINUTIAE]
+    return minutiae[numpy.sort(best)]
+
+def encodeMinutiaeRecords(minutiaeList, fingerPositions = None, imageSize = (IMAGE_WIDTH, IMAGE_HEIGHT), resolution = ISO_RESOLUTION, equipmentId = 0):
+    """
+    Encodes the minutiae of many fingers as ISO/IEC 19794-2:2005 records (NumPy is required).
+
+    Every finger gets its own record with one finger view (a plain live-scan). The records are
+    concatenated; every record contains its length, so they can be decoded with
+    `decodeMinutiaeRecords()`. The minutiae of all fingers are packed at once.
+
+    Arguments:
+        minutiaeList (list): The minutiae of every finger (see `extractMinutiae()`)
+        fingerPositions (list): The ISO finger position of every finger (0 for unknown, 1 to 10 from the right thumb to the left little finger) or None for unknown
+        imageSize (tuple): The width and height of the images
+        resolution (int): The resolution of the images in pixels per centimeter
+        equipmentId (int): The ID of the capture equipment (12 bits)
+
+    Returns:
+        The records (bytes).
+
+    Raises:
+        ValueError: if any passed argument is invalid
+    """
+
+    import numpy
+
+    minutiaeList = [selectMinutiae(numpy.asarray(minutiae).reshape((-1, 5))) for minutiae in minutiaeList]
+
+    if ( fingerPositions is None ):
+        fingerPositions = [0] * len(minutiaeList)
+
+    if ( len(fingerPositions) != len(minutiaeList) ):
+        raise ValueError('The number of finger positions does not match the number of fingers!')
+
+    if ( equipmentId < 0 or equipmentId > 0x0FFF ):
+        raise ValueError('The given capture equipment ID is invalid!')
+
+    if ( len(minutiaeList) == 0 ):
+        return bytes()
+
+    packedMinutiae = packMinutiae(numpy.concatenate(minutiaeList)).tobytes()
+
+    records = []
+    minutiaOffset = 0
+
+    for (minutiae, fingerPosition) in zip(minutiaeList, fingerPositions):
+        if ( fingerPosition < 0 or fingerPosition > 10 ):
+            raise ValueError('The given finger position is invalid!')
+
+        minutiaeCount = len(minutiae)
+        minutiaeSize = minutiaeCount * ISO_MINUTIA_SIZE
+
+        recordLength = ISO_HEADER_SIZE + ISO_VIEW_HEADER_SIZE + minutiaeSize + ISO_EXTENDED_DATA_LENGTH_SIZE
+
+        ## The quality of the finger is the mean quality of its minutiae
+        if ( minutiaeCount > 0 ):
+            fingerQuality = int(round(minutiae[:, MINUTIAE_COLUMN_QUALITY].mean()))
+        else:
+            fingerQuality = 0
+
+        records.append(struct.pack(ISO_HEADER_FORMAT, ISO_FORMAT_IDENTIFIER, ISO_VERSION, recordLength, equipmentId, imageSize[0], imageSize[1], resolution, resolution, 1, 0))
+        records.append(struct.pack(ISO_VIEW_HEADER_FORMAT, fingerPosition, 0, fingerQuality, minutiaeCount))
+        records.append(packedMinutiae[minutiaOffset:minutiaOffset + minutiaeSize])
+        records.append(struct.pack('>H', 0))
+
+        minutiaOffset += minutiaeSize
+
+    return bytes().join(records)
+
+def encodeMinutiaeRecord(minutiae, fingerPosition = 0, imageSize = (IMAGE_WIDTH, IMAGE_HEIGHT), resolution = ISO_RESOLUTION, equipmentId = 0):
+    """
+    Encodes the minutiae of a finger as ISO/IEC 19794-2:2005 record (NumPy is required).
+
+    Arguments:
+        minutiae (NumPy array): The minutiae (see `extractMinutiae()`)
+        fingerPosition (int): The ISO finger position (0 for unknown, 1 to 10 from the right thumb to the left little finger)
+        imageSize (tuple): The width and height of the image
+        resolution (int): The resolution of the image in pixels per centimeter
+        equipmentId (int): The ID of the capture equipment (12 bits)
+
+    Returns:
+        The record (bytes).
+
+    Raises:
+        ValueError: if any passed argument is invalid
+    """
+
+    return encodeMinutiaeRecords([minutiae], [fingerPosition], imageSize, resolution, equipmentId)
+
+def readRecordLayout(data, offset = 0):
+    """
+    Reads the headers of a record and locates the minutiae of its finger views.
+
+    Arguments:
+        data (bytes): The data which contains the record
+        offset (int): The position of the record
+
+    Returns:
+        A tuple that contain the following information:
+        0: integer The length of the record.
+        1: list The finger views as tuples of finger position, finger quality, position of the minutiae and number of minutiae.
+
+    Raises:
+        ValueError: if the data is no valid record
+    """
+
+    if ( len(data) - offset < ISO_HEADER_SIZE ):
+        raise ValueError('The record is incomplete!')
+
+    header = struct.unpack_from(ISO_HEADER_FORMAT, data, offset)
+
+    if ( header[0] != ISO_FORMAT_IDENTIFIER or header[1] != ISO_VERSION ):
+        raise ValueError('The data is no ISO/IEC 19794-2 record!')
+
+    recordLength = header[2]
+    viewCount = header[8]
+
+    if ( recordLength < ISO_HEADER_SIZE or offset + recordLength > len(data) ):
+        raise ValueError('The record is incomplete!')
+
+    recordEnd = offset + recordLength
+    position = offset + ISO_HEADER_SIZE
+    views = []
+
+    for i in range(0, viewCount):
+        if ( position + ISO_VIEW_HEADER_SIZE > recordEnd ):
+            raise ValueError('The record is incomplete!')
+
+        (fingerPosition, viewImpression, fingerQuality, minutiaeCount) = struct.unpack_from(ISO_VIEW_HEADER_FORMAT, data, position)
+        position += ISO_VIEW_HEADER_SIZE
+
+        views.append((fingerPosition, fingerQuality, position, minutiaeCount))
+        position += minutiaeCount * ISO_MINUTIA_SIZE
+
+        ## Skip the extended data
+        if ( position + ISO_EXTENDED_DATA_LENGTH_SIZE > recordEnd ):
+            raise ValueError('The record is incomplete!')
+
+        position += ISO_EXTENDED_DATA_LENGTH_SIZE + struct.unpack_from('>H', data, position)[0]
+
+    if ( position > recordEnd ):
+        raise ValueError('The record is incomplete!')
+
+    return (recordLength, views)
+
+def decodeMinutiaeRecords(data):
+    """
+    Decodes concatenated ISO/IEC 19794-2:2005 records (e.g. an exported database) (NumPy is required).
+
+    Only the headers are parsed record by record: the minutiae of all records are decoded at once.
+
+    Arguments:
+        data (bytes): The records
+
+    Returns:
+        The list of records. Every record is a list of finger views and every finger view
+        a tuple that contain the following information:
+        0: integer The ISO finger position.
+        1: integer The finger quality (0 to 100).
+        2: NumPy array The minutiae (see `extractMinutiae()`).
+
+    Raises:
+        ValueError: if the data contains an invalid record
+    """
+
+    import numpy
+
+    data = bytes(data)
+
+    recordViewCounts = []
+    viewHeaders = []
+    minutiaOffsets = []
+    minutiaeCounts = []
+
+    offset = 0
+
+    while ( offset < len(data) ):
+        (recordLength, views) = readRecordLayout(data, offset)
+
+        for (fingerPosition, fingerQuality, minutiaOffset, minutiaeCount) in views:
+            viewHeaders.append((fingerPosition, fingerQuality))
+            minutiaOffsets.append(minutiaOffset)
+            minutiaeCounts.append(minutiaeCount)
+
+        recordViewCounts.append(len(views))
+        offset += recordLength
+
+    ## Gather the minutiae of all finger views
+    minutiaOffsets = numpy.array(minutiaOffsets, dtype = numpy.int64)
+    minutiaeCounts = numpy.array(minutiaeCounts, dtype = numpy.int64)
+    totalCount = int(minutiaeCounts.sum())
+
+    viewStarts = numpy.cumsum(minutiaeCounts) - minutiaeCounts
+    minutiaIndexes = numpy.arange(totalCount) - numpy.repeat(viewStarts, minutiaeCounts)
+    positions = numpy.repeat(minutiaOffsets, minutiaeCounts) + minutiaIndexes * ISO_MINUTIA_SIZE
+
+    rawMinutiae = numpy.frombuffer(data, dtype = numpy.uint8)[positions[:, None] + numpy.arange(ISO_MINUTIA_SIZE)]
+    allMinutiae = unpackMinutiae(rawMinutiae.reshape(-1).view(getMinutiaType()))
+
+    viewMinutiae = numpy.split(allMinutiae, numpy.cumsum(minutiaeCounts)[:-1]) if len(viewHeaders) > 0 else []
+
+    records = []
+    viewIndex = 0
+
+    for viewCount in recordViewCounts:
+        views = []
+
+        for i in range(viewIndex, viewIndex + viewCount):
+            views.append((viewHeaders[i][0], viewHeaders[i][1], viewMinutiae[i]))
+
+        records.append(views)
+        viewIndex += viewCount
+
+    return records
+
+def decodeMinutiaeRecord(record):
+    """
+    Decodes an ISO/IEC 19794-2:2005 record (NumPy is required).
+
+    Arguments:
+        record (bytes): The record
+
+    Returns:
+        The list of finger views (see `decodeMinutiaeRecords()`).
+
+    Raises:
+        ValueError: if the record is invalid
+    """
+
+    records = decodeMinutiaeRecords(record)
+
+    if ( len(records) != 1 ):
+        raise ValueError('The data must contain exactly one record!')
+
+    return records[0]
+
+def downloadMinutiaeRecord(fingerprint, fingerPosition = 0, **kwargs):
+    """
+    Downloads the image from the image buffer of a sensor and encodes its minutiae as ISO/IEC 19794-2:2005 record.
+
+    The characteristics of the sensor (see `PyFingerprint.downloadCharacteristics()`) can not
+    be converted because their layout is not documented: the minutiae are extracted from the
+    image on the host (see `extractMinutiae()`).
+
+    Arguments:
+        fingerprint (PyFingerprint): The sensor
+        fingerPosition (int): The ISO finger position (0 for unknown, 1 to 10 from the right thumb to the left little finger)
+        **kwargs: The further arguments of `extractMinutiae()`
+
+    Returns:
+        The record (bytes).
+
+    Raises:
+        Exception: if any error occurs
+    """
+
+    return encodeMinutiaeRecord(extractMinutiae(fingerprint.downloadPackedImage(), **kwargs), fingerPosition)
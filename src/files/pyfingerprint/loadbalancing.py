@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import threading
+
+from .pyfingerprint import FINGERPRINT_CHARBUFFER1
+
+
+class SearchScheduler(object):
+    """
+    Distributes searches over several sensors with the same (mirrored) template database.
+
+    Every search is executed on the sensor with the fewest pending searches, so a sensor
+    which is busy with a slow search does not delay the next one.
+
+    WARNING: A search uploads the characteristics to char buffer 1 of the chosen sensor and
+    OVERWRITES ITS CONTENT. Every flow which uses the char buffers of one of the sensors (e.g. a
+    local identification or enrollment between `readImage()` and `searchTemplate()` or
+    `storeTemplate()`) MUST run inside `PyFingerprint.transaction()`, otherwise a search of the
+    scheduler can replace its characteristics between two commands:
+
+        with sensorB.transaction():
+            sensorB.readImage()
+            sensorB.convertImage(FINGERPRINT_CHARBUFFER1)
+            sensorB.searchTemplate()
+
+    """
+    __sensors = None
+    __queueDepths = None
+    __nextIndex = 0
+    __lock = None
+
+    def __init__(self, sensors):
+        """
+        Constructor
+
+        Arguments:
+            sensors (list): The sensors (PyFingerprint) which store the same templates at the same positions
+
+        Raises:
+            ValueError: if no sensor is given
+        """
+
+        if ( len(sensors) == 0 ):
+            raise ValueError('At least one sensor is required!')
+
+        self.__sensors = list(sensors)
+        self.__queueDepths = [0] * len(self.__sensors)
+        self.__lock = threading.Lock()
+
+    def getQueueDepths(self):
+        """
+        Gets the number of pending searches of every sensor.
+
+        Returns:
+            The list of queue depths (in order of the sensors).
+        """
+
+        with self.__lock:
+            return list(self.__queueDepths)
+
+    def __acquireSensor(self):
+        """
+        Chooses the least loaded sensor and counts the new search.
+
+        Returns:
+            The index of the sensor (int).
+        """
+
+        with self.__lock:
+            sensorCount = len(self.__sensors)
+
+            ## Start at a rotating index so that equally loaded sensors are used in turn
+            candidates = [(self.__nextIndex + i) % sensorCount for i in range(0, sensorCount)]
+            sensorIndex = min(candidates, key = lambda index: self.__queueDepths[index])
+
+            self.__queueDepths[sensorIndex] += 1
+            self.__nextIndex = (sensorIndex + 1) % sensorCount
+
+            return sensorIndex
+
+    def __releaseSensor(self, sensorIndex):
+        """
+        Counts a finished search.
+
+        Arguments:
+            sensorIndex (int): The index of the sensor
+        """
+
+        with self.__lock:
+            self.__queueDepths[sensorIndex] -= 1
+
+    def searchCharacteristics(self, characteristics, positionStart = 0, count = -1):
+        """
+        Searches the given characteristics on the least loaded sensor.
+
+        Note: Char buffer 1 of the chosen sensor is overwritten (see the warning of the class).
+
+        Arguments:
+            characteristics (bytes): The characteristics (see `PyFingerprint.downloadCharacteristics()`)
+            positionStart (int): The position to start the search
+            count (int): The number of templates
+
+        Returns:
+            A tuple that contain the following information:
+            0: integer(2 bytes) The position number of found template.
+            1: integer(2 bytes) The accuracy score of found template.
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        sensorIndex = self.__acquireSensor()
+        sensor = self.__sensors[sensorIndex]
+
+        try:
+            with sensor.transaction('searchTemplate'):
+                sensor.uploadCharacteristics(FINGERPRINT_CHARBUFFER1, characteristics, verify = False)
+                return sensor.searchTemplate(FINGERPRINT_CHARBUFFER1, positionStart, count)
+
+        finally:
+            self.__releaseSensor(sensorIndex)
+
+    def offloadSearch(self, sourceSensor, charBufferNumber = FINGERPRINT_CHARBUFFER1, positionStart = 0, count = -1):
+        """
+        Searches the characteristics of a char buffer of an other sensor on the least loaded sensor.
+
+        Note: Do not call it within a transaction of the source sensor, because two offloads in
+        opposite directions would wait for each other. Download the characteristics within the
+        transaction and use `searchCharacteristics()` instead:
+
+            with sensorA.transaction():
+                sensorA.readImage()
+                sensorA.convertImage(FINGERPRINT_CHARBUFFER1)
+                characteristics = sensorA.downloadCharacteristics(FINGERPRINT_CHARBUFFER1, asBytes = True)
+
+            scheduler.searchCharacteristics(characteristics)
+
+        Arguments:
+            sourceSensor (PyFingerprint): The sensor which contains the characteristics (e.g. after `convertImage()`)
+            charBufferNumber (int): The char buffer. Use `FINGERPRINT_CHARBUFFER1` or `FINGERPRINT_CHARBUFFER2`.
+            positionStart (int): The position to start the search
+            count (int): The number of templates
+
+        Returns:
+            A tuple that contain the following information:
+            0: integer(2 bytes) The position number of found template.
+            1: integer(2 bytes) The accuracy score of found template.
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        characteristics = sourceSensor.downloadCharacteristics(charBufferNumber, asBytes = True)
+        return self.searchCharacteristics(characteristics, positionStart, count)
@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import functools
+import multiprocessing
+
+from .quality import QUALITY_FOREGROUND_THRESHOLD, getImageArray, getBlocks
+
+
+## Types of minutiae (the same codes as ISO/IEC 19794-2)
+##
+
+MINUTIAE_TYPE_ENDING = 1
+"""
+Ridge ending
+"""
+
+MINUTIAE_TYPE_BIFURCATION = 2
+"""
+Ridge bifurcation
+"""
+
+## Columns of the minutiae array
+MINUTIAE_COLUMN_X = 0
+MINUTIAE_COLUMN_Y = 1
+MINUTIAE_COLUMN_ANGLE = 2
+MINUTIAE_COLUMN_TYPE = 3
+MINUTIAE_COLUMN_QUALITY = 4
+
+
+def shiftImage(pixels, offsetY, offsetX):
+    """
+    Gets the neighbors of all pixels in one direction (pixels outside of the image are 0).
+
+    Arguments:
+        pixels (NumPy array): The image with two dimensions
+        offsetY (int): The vertical offset of the neighbor (-1, 0 or 1)
+        offsetX (int): The horizontal offset of the neighbor (-1, 0 or 1)
+
+    Returns:
+        The neighbors (NumPy array) with the shape of the image.
+    """
+
+    import numpy
+
+    padded = numpy.pad(pixels, 1, mode = 'constant')
+    (height, width) = pixels.shape
+
+    return padded[1 + offsetY:1 + offsetY + height, 1 + offsetX:1 + offsetX + width]
+
+def getNeighbors(pixels):
+    """
+    Gets the 8 neighbors of all pixels clockwise starting at the top.
+
+    Arguments:
+        pixels (NumPy array): The image with two dimensions
+
+    Returns:
+        The list of the neighbors (NumPy arrays) in the order N, NE, E, SE, S, SW, W, NW.
+    """
+
+    offsets = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+    return [shiftImage(pixels, offsetY, offsetX) for (offsetY, offsetX) in offsets]
+
+def expandBlocks(blockValues, blockSize, shape):
+    """
+    Expands values of blocks to the pixels of an image.
+
+    Arguments:
+        blockValues (NumPy array): The values of the blocks
+        blockSize (int): The width and height of a block
+        shape (tuple): The shape of the image
+
+    Returns:
+        The values of the pixels (NumPy array).
+    """
+
+    import numpy
+
+    pixels = numpy.repeat(numpy.repeat(blockValues, blockSize, axis = 0), blockSize, axis = 1)
+    padding = ((0, shape[0] - pixels.shape[0]), (0, shape[1] - pixels.shape[1]))
+
+    return numpy.pad(pixels, padding, mode = 'edge')
+
+def smoothBlocks(blockValues):
+    """
+    Averages every block with its 8 neighbors.
+
+    Arguments:
+        blockValues (NumPy array): The values of the blocks
+
+    Returns:
+        The smoothed values (NumPy array).
+    """
+
+    import numpy
+
+    padded = numpy.pad(blockValues, 1, mode = 'edge')
+    (rows, columns) = blockValues.shape
+
+    return sum(padded[y:y + rows, x:x + columns] for y in range(0, 3) for x in range(0, 3)) / 9.0
+
+def normalizeImage(pixels):
+    """
+    Normalizes an image to the mean 0 and the variance 1.
+
+    Arguments:
+        pixels (NumPy array): The image
+
+    Returns:
+        The normalized image (NumPy array).
+    """
+
+    return (pixels - pixels.mean()) / max(float(pixels.std()), 1e-6)
+
+def getForegroundMask(pixels, blockSize = 16):
+    """
+    Gets the blocks which are covered by the finger.
+
+    Arguments:
+        pixels (NumPy array): The image (0 to 255)
+        blockSize (int): The width and height of a block
+
+    Returns:
+        The mask of the blocks (NumPy array of bool).
+    """
+
+    return getBlocks(pixels, blockSize).std(axis = (2, 3)) > QUALITY_FOREGROUND_THRESHOLD
+
+def erodeBlocks(mask):
+    """
+    Removes the blocks at the border of a mask.
+
+    Arguments:
+        mask (NumPy array): The mask of the blocks (bool)
+
+    Returns:
+        The eroded mask (NumPy array of bool).
+    """
+
+    eroded = mask.copy()
+
+    for neighbor in getNeighbors(mask):
+        eroded &= neighbor
+
+    return eroded
+
+def getOrientationField(pixels, blockSize = 16):
+    """
+    Estimates the ridge orientation and its coherence of every block.
+
+    Arguments:
+        pixels (NumPy array): The normalized image
+        blockSize (int): The width and height of a block
+
+    Returns:
+        A tuple that contain the following information:
+        0: NumPy array The ridge orientation of every block in radians (0 to pi).
+        1: NumPy array The coherence of every block (0 to 1).
+    """
+
+    import numpy
+
+    (gradientY, gradientX) = numpy.gradient(pixels)
+
+    gxx = getBlocks(gradientX * gradientX, blockSize).sum(axis = (2, 3))
+    gyy = getBlocks(gradientY * gradientY, blockSize).sum(axis = (2, 3))
+    gxy = getBlocks(gradientX * gradientY, blockSize).sum(axis = (2, 3))
+
+    ## Smooth the doubled angles, so opposite gradients do not cancel each other out
+    doubledCos = smoothBlocks(gxx - gyy)
+    doubledSin = smoothBlocks(2 * gxy)
+
+    coherence = numpy.sqrt(doubledCos ** 2 + doubledSin ** 2) / numpy.maximum(smoothBlocks(gxx + gyy), 1e-6)
+
+    ## The ridges are perpendicular to the gradients
+    orientation = (0.5 * numpy.arctan2(doubledSin, doubledCos) + numpy.pi / 2) % numpy.pi
+
+    return (orientation, coherence)
+
+def binarizeImage(pixels, foreground, blockSize = 16, darkRidges = True):
+    """
+    Separates ridges and valleys with a threshold of the local mean.
+
+    Arguments:
+        pixels (NumPy array): The normalized image
+        foreground (NumPy array): The mask of the foreground blocks
+        blockSize (int): The width and height of a block
+        darkRidges (bool): The ridges are darker than the valleys
+
+    Returns:
+        The ridge pixels (NumPy array of bool).
+    """
+
+    ## Suppress noise with a 3x3 mean filter
+    smoothed = (pixels + sum(getNeighbors(pixels))) / 9.0
+    localMean = expandBlocks(getBlocks(smoothed, blockSize).mean(axis = (2, 3)), blockSize, pixels.shape)
+
+    if ( darkRidges == True ):
+        ridges = smoothed < localMean
+    else:
+        ridges = smoothed > localMean
+
+    return ridges & expandBlocks(foreground, blockSize, pixels.shape)
+
+def thinRidges(ridges):
+    """
+    Thins the ridges to a width of one pixel (Zhang-Suen algorithm).
+
+    Arguments:
+        ridges (NumPy array): The ridge pixels (bool)
+
+    Returns:
+        The skeleton (NumPy array of bool).
+    """
+
+    import numpy
+
+    skeleton = ridges.copy()
+
+    while ( True ):
+        changed = False
+
+        for step in (0, 1):
+            (p2, p3, p4, p5, p6, p7, p8, p9) = [neighbor.astype(numpy.uint8) for neighbor in getNeighbors(skeleton)]
+
+            neighborCount = p2 + p3 + p4 + p5 + p6 + p7 + p8 + p9
+
+            ## Number of transitions from background to ridge around the pixel
+            sequence = (p2, p3, p4, p5, p6, p7, p8, p9, p2)
+            transitionCount = sum(((sequence[i] == 0) & (sequence[i + 1] == 1)).astype(numpy.uint8) for i in range(0, 8))
+
+            if ( step == 0 ):
+                condition = ((p2 * p4 * p6) == 0) & ((p4 * p6 * p8) == 0)
+            else:
+                condition = ((p2 * p4 * p8) == 0) & ((p2 * p6 * p8) == 0)
+
+            removable = skeleton & (neighborCount >= 2) & (neighborCount <= 6) & (transitionCount == 1) & condition
+
+            if ( removable.any() ):
+                skeleton &= ~removable
+                changed = True
+
+        if ( changed == False ):
+            return skeleton
+
+def detectMinutiae(skeleton):
+    """
+    Detects ridge endings and bifurcations with the crossing number.
+
+    Arguments:
+        skeleton (NumPy array): The skeleton (bool)
+
+    Returns:
+        A tuple that contain the following information:
+        0: NumPy array The y coordinates.
+        1: NumPy array The x coordinates.
+        2: NumPy array The types (`MINUTIAE_TYPE_ENDING` or `MINUTIAE_TYPE_BIFURCATION`).
+    """
+
+    import numpy
+
+    neighbors = [neighbor.astype(numpy.int8) for neighbor in getNeighbors(skeleton)]
+    crossingNumber = sum(numpy.abs(neighbors[i] - neighbors[(i + 1) % 8]) for i in range(0, 8)) // 2
+
+    endings = skeleton & (crossingNumber == 1)
+    bifurcations = skeleton & (crossingNumber == 3)
+
+    (endingY, endingX) = numpy.nonzero(endings)
+    (bifurcationY, bifurcationX) = numpy.nonzero(bifurcations)
+
+    types = numpy.concatenate((numpy.full(len(endingY), MINUTIAE_TYPE_ENDING), numpy.full(len(bifurcationY), MINUTIAE_TYPE_BIFURCATION)))
+
+    return (numpy.concatenate((endingY, bifurcationY)), numpy.concatenate((endingX, bifurcationX)), types)
+
+def getMinutiaeAngles(skeleton, orientation, y, x, blockSize = 16, radius = 4):
+    """
+    Gets the direction of minutiae: the ridge orientation pointing away from the ridge pixels next to the minutia.
+
+    Endings point away from their ridge and bifurcations point along the single ridge away
+    from the branches (the same as the ending of the valley between the branches).
+
+    Arguments:
+        skeleton (NumPy array): The skeleton (bool)
+        orientation (NumPy array): The ridge orientation of every block in radians
+        y (NumPy array): The y coordinates of the minutiae
+        x (NumPy array): The x coordinates of the minutiae
+        blockSize (int): The width and height of a block
+        radius (int): The radius of the analyzed neighborhood
+
+    Returns:
+        The angles in radians (NumPy array) between 0 and 2 pi (counterclockwise, 0 points to the right).
+    """
+
+    import numpy
+
+    ## The mean position of the ridge pixels next to every minutia
+    (offsetY, offsetX) = numpy.mgrid[-radius:radius + 1, -radius:radius + 1]
+    padded = numpy.pad(skeleton, radius, mode = 'constant')
+
+    windows = padded[(y + radius)[:, None, None] + offsetY[None], (x + radius)[:, None, None] + offsetX[None]]
+    ridgeX = (windows * offsetX[None]).sum(axis = (1, 2))
+    ridgeY = (windows * offsetY[None]).sum(axis = (1, 2))
+
+    blockY = numpy.minimum(y // blockSize, orientation.shape[0] - 1)
+    blockX = numpy.minimum(x // blockSize, orientation.shape[1] - 1)
+    angles = orientation[blockY, blockX]
+
+    ## Image coordinates point down: the angle is counterclockwise on screen
+    directionX = numpy.cos(angles)
+    directionY = -numpy.sin(angles)
+
+    ## Point away from the ridge
+    opposite = (directionX * ridgeX + directionY * ridgeY) > 0
+    angles = numpy.where(opposite, angles + numpy.pi, angles)
+
+    return angles % (2 * numpy.pi)
+
+def getIsolatedMinutiae(y, x, minDistance, chunkSize = 256):
+    """
+    Finds the minutiae which are not close to an other minutia.
+
+    The minutiae are sorted by their y coordinate and compared in chunks with the minutiae
+    within the vertical distance only, so no matrix of all pairs is built.
+
+    Arguments:
+        y (NumPy array): The y coordinates of the minutiae
+        x (NumPy array): The x coordinates of the minutiae
+        minDistance (int): The minimum distance in pixels to the nearest other minutia
+        chunkSize (int): The number of minutiae compared at once
+
+    Returns:
+        The mask (NumPy array of bool) of the isolated minutiae.
+    """
+
+    import numpy
+
+    order = numpy.argsort(y, kind = 'mergesort')
+    sortedY = y[order].astype(numpy.int64)
+    sortedX = x[order].astype(numpy.int64)
+
+    isolated = numpy.empty(len(y), dtype = bool)
+
+    for start in range(0, len(y), chunkSize):
+        end = min(start + chunkSize, len(y))
+
+        ## Only the minutiae within the vertical distance can be close
+        first = numpy.searchsorted(sortedY, sortedY[start] - minDistance, 'right')
+        last = numpy.searchsorted(sortedY, sortedY[end - 1] + minDistance, 'left')
+
+        distances = (sortedY[start:end, None] - sortedY[None, first:last]) ** 2 + (sortedX[start:end, None] - sortedX[None, first:last]) ** 2
+
+        ## A minutia is not close to itself
+        distances[numpy.arange(0, end - start), numpy.arange(start - first, end - first)] = minDistance ** 2
+
+        isolated[order[start:end]] = distances.min(axis = 1) >= minDistance ** 2
+
+    return isolated
+
+def extractMinutiae(image, blockSize = 16, minDistance = 6, darkRidges = True):
+    """
+    Extracts the minutiae of a fingerprint image on the host (NumPy is required).
+
+    The image is normalized, the orientation field is estimated and the ridges are separated,
+    thinned and searched for endings and bifurcations. Minutiae at the border of the finger
+    and minutiae which are closer than `minDistance` to each other (e.g. of broken ridges)
+    are discarded.
+
+    Arguments:
+        image (object): A packed image with 36864 bytes (see `PyFingerprint.downloadPackedImage()`), a PIL image, a NumPy array or bytes with 256x288 pixels
+        blockSize (int): The width and height of the blocks of the orientation field
+        minDistance (int): The minimum distance in pixels between two minutiae
+        darkRidges (bool): The ridges are darker than the valleys
+
+    Returns:
+        The minutiae (NumPy array of uint16) with one row per minutia and the columns
+        `MINUTIAE_COLUMN_X`, `MINUTIAE_COLUMN_Y`, `MINUTIAE_COLUMN_ANGLE` (degrees, 0 to 359),
+        `MINUTIAE_COLUMN_TYPE` and `MINUTIAE_COLUMN_QUALITY` (0 to 100).
+
+    Raises:
+        ValueError: if the image is invalid
+    """
+
+    import numpy
+
+    pixels = getImageArray(image)
+
+    foreground = getForegroundMask(pixels, blockSize)
+    normalizedPixels = normalizeImage(pixels)
+
+    (orientation, coherence) = getOrientationField(normalizedPixels, blockSize)
+
+    ridges = binarizeImage(normalizedPixels, foreground, blockSize, darkRidges)
+    skeleton = thinRidges(ridges)
+
+    (y, x, types) = detectMinutiae(skeleton)
+
+    ## Ridges are cut at the border of the finger: discard the minutiae of the border blocks
+    inner = expandBlocks(erodeBlocks(foreground), blockSize, pixels.shape)[y, x]
+    (y, x, types) = (y[inner], x[inner], types[inner])
+
+    ## Discard minutiae which are close to an other minutia
+    if ( len(y) > 1 ):
+        isolated = getIsolatedMinutiae(y, x, minDistance)
+        (y, x, types) = (y[isolated], x[isolated], types[isolated])
+
+    angles = getMinutiaeAngles(skeleton, orientation, y, x, blockSize)
+
+    blockY = numpy.minimum(y // blockSize, coherence.shape[0] - 1)
+    blockX = numpy.minimum(x // blockSize, coherence.shape[1] - 1)
+    qualities = numpy.clip(coherence[blockY, blockX] * 100, 0, 100)
+
+    minutiae = numpy.empty((len(y), 5), dtype = numpy.uint16)
+    minutiae[:, MINUTIAE_COLUMN_X] = x
+    minutiae[:, MINUTIAE_COLUMN_Y] = y
+    minutiae[:, MINUTIAE_COLUMN_ANGLE] = numpy.round(numpy.degrees(angles)).astype(numpy.int64) % 360
+    minutiae[:, MINUTIAE_COLUMN_TYPE] = types
+    minutiae[:, MINUTIAE_COLUMN_QUALITY] = numpy.round(qualities)
+
+    return minutiae
+
+def extractMinutiaeBatch(images, processCount = None, chunkSize = 4, **kwargs):
+    """
+    Extracts the minutiae of many images with a pool of processes.
+
+    Arguments:
+        images (iterable): The images (see `extractMinutiae()`)
+        processCount (int): The number of processes or None for the number of CPUs
+        chunkSize (int): The number of images handed to a process at once
+        **kwargs: The further arguments of `extractMinutiae()`
+
+    Returns:
+        The list of minutiae arrays in order of the images.
+    """
+
+    extract = functools.partial(extractMinutiae, **kwargs)
+    pool = multiprocessing.Pool(processCount)
+
+    try:
+        return pool.map(extract, images, chunkSize)
+
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import threading
+
+from .pyfingerprint import FINGERPRINT_CHARBUFFER1, encodeDataPackets
+
+
+def encodeTemplates(templates, address, maxPacketSize):
+    """
+    Encodes templates into data packets for sensors with the given address and maximum packet size.
+
+    Arguments:
+        templates (list): Tuples of position and characteristics (bytes)
+        address (int): The sensor address
+        maxPacketSize (int): The maximum size of a single packet
+
+    Returns:
+        A list of tuples that contain the following information:
+        0: integer The position.
+        1: list The encoded data packets.
+    """
+
+    return [(positionNumber, encodeDataPackets(address, characteristics, maxPacketSize)) for (positionNumber, characteristics) in templates]
+
+def provisionSensors(sensors, templates, progressCallback = None):
+    """
+    Stores the same templates on several sensors at once.
+
+    Every template is encoded into data packets only once per combination of sensor address
+    and maximum packet size. Afterwards the packets are written to all sensors concurrently
+    (one thread per sensor) and each template is stored with `storeTemplate()`.
+
+    Arguments:
+        sensors (list): The sensors (PyFingerprint)
+        templates (object): Dictionary or list of tuples of position and characteristics (bytes)
+        progressCallback (function): Called with the index of the sensor, the position and the exception (or None) after every template
+
+    Returns:
+        A list (in order of the sensors) of dictionaries which contain the result of every position:
+        True if the template was stored or the exception otherwise.
+
+    Raises:
+        Exception: if the parameters of a sensor could not be read
+    """
+
+    if ( isinstance(templates, dict) ):
+        templates = sorted(templates.items())
+    else:
+        templates = list(templates)
+
+    ## Encode the templates only once for each combination of address and packet size
+    encodedTemplatesByKey = {}
+    sensorEncodedTemplates = []
+
+    for sensor in sensors:
+        key = (sensor.getAddress(), sensor.getMaxPacketSize())
+
+        if ( key not in encodedTemplatesByKey ):
+            encodedTemplatesByKey[key] = encodeTemplates(templates, key[0], key[1])
+
+        sensorEncodedTemplates.append(encodedTemplatesByKey[key])
+
+    results = [{} for sensor in sensors]
+    callbackLock = threading.Lock()
+
+    def provisionSensor(sensorIndex):
+        sensor = sensors[sensorIndex]
+
+        for (positionNumber, encodedPackets) in sensorEncodedTemplates[sensorIndex]:
+            try:
+                with sensor.transaction():
+                    sensor.uploadEncodedCharacteristics(FINGERPRINT_CHARBUFFER1, encodedPackets)
+                    sensor.storeTemplate(positionNumber, FINGERPRINT_CHARBUFFER1)
+
+                result = True
+
+            except Exception as e:
+                result = e
+
+            results[sensorIndex][positionNumber] = result
+
+            if ( progressCallback is not None ):
+                with callbackLock:
+                    progressCallback(sensorIndex, positionNumber, None if result is True else result)
+
+    threads = [threading.Thread(target = provisionSensor, args = (sensorIndex,)) for sensorIndex in range(0, len(sensors))]
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return results
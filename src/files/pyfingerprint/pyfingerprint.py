@@ -8,14 +8,23 @@ All rights reserved.
 
 """
 
+import binascii
+import contextlib
+import functools
+import json
 import os
 import serial
-from PIL import Image
 import struct
+import threading
+import time
+
+from .imagecodec import IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_PACKED_SIZE, packImage, unpackImage
+from .trace import TRACE_DIRECTION_WRITE, TRACE_DIRECTION_READ
 
 
 ## Baotou start byte
 FINGERPRINT_STARTCODE = 0xEF01
+FINGERPRINT_STARTCODE_BYTES = bytearray((0xEF, 0x01))
 
 ## Packet identification
 ##
@@ -26,6 +35,11 @@ FINGERPRINT_ACKPACKET = 0x07
 FINGERPRINT_DATAPACKET = 0x02
 FINGERPRINT_ENDDATAPACKET = 0x08
 
+FINGERPRINT_REPLY_PACKETS = (FINGERPRINT_ACKPACKET, FINGERPRINT_DATAPACKET, FINGERPRINT_ENDDATAPACKET)
+
+## Largest value of the length field of a packet (256 bytes payload + 2 bytes checksum)
+FINGERPRINT_MAX_PACKET_LENGTH = 256 + 2
+
 ## Instruction codes
 ##
 
@@ -42,6 +56,9 @@ FINGERPRINT_READIMAGE = 0x01
 ## Note: The documentation mean upload to host computer.
 FINGERPRINT_DOWNLOADIMAGE = 0x0A
 
+## Note: The documentation mean download from host computer.
+FINGERPRINT_UPLOADIMAGE = 0x0B
+
 FINGERPRINT_CONVERTIMAGE = 0x02
 
 FINGERPRINT_CREATETEMPLATE = 0x05
@@ -60,6 +77,65 @@ FINGERPRINT_UPLOADCHARACTERISTICS = 0x09
 ## Note: The documentation mean upload to host computer.
 FINGERPRINT_DOWNLOADCHARACTERISTICS = 0x08
 
+## Instructions which are followed by data packets (never repeated on errors)
+FINGERPRINT_TRANSFER_INSTRUCTIONS = (
+    FINGERPRINT_DOWNLOADIMAGE,
+    FINGERPRINT_UPLOADIMAGE,
+    FINGERPRINT_UPLOADCHARACTERISTICS,
+    FINGERPRINT_DOWNLOADCHARACTERISTICS,
+)
+
+## Instructions of the methods which send exactly one command and can be pipelined by executeBatch()
+FINGERPRINT_PIPELINE_INSTRUCTIONS = {
+    'verifyPassword': FINGERPRINT_VERIFYPASSWORD,
+    'getSystemParameters': FINGERPRINT_GETSYSTEMPARAMETERS,
+    'getSecurityLevel': FINGERPRINT_GETSYSTEMPARAMETERS,
+    'getMaxPacketSize': FINGERPRINT_GETSYSTEMPARAMETERS,
+    'getBaudRate': FINGERPRINT_GETSYSTEMPARAMETERS,
+    'getTemplateIndex': FINGERPRINT_TEMPLATEINDEX,
+    'getTemplateCount': FINGERPRINT_TEMPLATECOUNT,
+    'readImage': FINGERPRINT_READIMAGE,
+    'convertImage': FINGERPRINT_CONVERTIMAGE,
+    'createTemplate': FINGERPRINT_CREATETEMPLATE,
+    'storeTemplate': FINGERPRINT_STORETEMPLATE,
+    'loadTemplate': FINGERPRINT_LOADTEMPLATE,
+    'deleteTemplate': FINGERPRINT_DELETETEMPLATE,
+    'clearDatabase': FINGERPRINT_CLEARDATABASE,
+    'compareCharacteristics': FINGERPRINT_COMPARECHARACTERISTICS,
+    'generateRandomNumber': FINGERPRINT_GENERATERANDOMNUMBER,
+}
+
+## Timeouts in seconds to wait for the reply of an instruction (see `setCommandTimeout()`)
+FINGERPRINT_COMMAND_TIMEOUTS = {
+    FINGERPRINT_VERIFYPASSWORD: 0.5,
+    FINGERPRINT_GETSYSTEMPARAMETERS: 0.5,
+    FINGERPRINT_TEMPLATEINDEX: 0.5,
+    FINGERPRINT_TEMPLATECOUNT: 0.5,
+    FINGERPRINT_GENERATERANDOMNUMBER: 0.5,
+    FINGERPRINT_READIMAGE: 1.0,
+    FINGERPRINT_CONVERTIMAGE: 1.0,
+    FINGERPRINT_CREATETEMPLATE: 1.0,
+    FINGERPRINT_COMPARECHARACTERISTICS: 1.0,
+    FINGERPRINT_LOADTEMPLATE: 1.0,
+    FINGERPRINT_STORETEMPLATE: 2.0,
+    FINGERPRINT_DELETETEMPLATE: 2.0,
+    FINGERPRINT_SETPASSWORD: 2.0,
+    FINGERPRINT_SETADDRESS: 2.0,
+    FINGERPRINT_SETSYSTEMPARAMETER: 2.0,
+    FINGERPRINT_SEARCHTEMPLATE: 3.0,
+    FINGERPRINT_CLEARDATABASE: 5.0,
+    FINGERPRINT_DOWNLOADIMAGE: 2.0,
+    FINGERPRINT_UPLOADIMAGE: 2.0,
+    FINGERPRINT_DOWNLOADCHARACTERISTICS: 2.0,
+    FINGERPRINT_UPLOADCHARACTERISTICS: 2.0,
+}
+
+## Timeout in seconds for instructions which are not listed above
+FINGERPRINT_DEFAULT_COMMAND_TIMEOUT = 2.0
+
+## Timeout in seconds to wait for each data packet of a transfer
+FINGERPRINT_DATAPACKET_TIMEOUT = 2.0
+
 ## Parameters of setSystemParameter()
 ##
 
@@ -126,21 +202,262 @@ FINGERPRINT_CHARBUFFER2 = 0x02
 Char buffer 2
 """
 
+## Clock to measure timeouts (not affected by changes of the system time if available)
+monotonicTime = getattr(time, 'monotonic', time.time)
+
+## Interval in seconds to check the cached template index against the template count of the sensor
+FINGERPRINT_TEMPLATEINDEX_CHECK_INTERVAL = 60
+
+class PacketChecksumError(Exception):
+    """
+    Raised if a received packet is corrupted (the checksum is wrong).
+
+    """
+    errorCode = FINGERPRINT_ERROR_BADPACKET
+
+class PacketTimeoutError(Exception):
+    """
+    Raised if the sensor does not reply in time (see `PyFingerprint.setCommandTimeout()`) or the deadline of an operation expired.
+
+    """
+    errorCode = FINGERPRINT_ERROR_TIMEOUT
+
+def encodePacket(address, packetType, packetPayload):
+    """
+    Encodes a packet (header, payload and checksum) as it is sent to the sensor.
+
+    Arguments:
+        address (int): The sensor address
+        packetType (int): The packet type (either `FINGERPRINT_COMMANDPACKET`, `FINGERPRINT_DATAPACKET` or `FINGERPRINT_ENDDATAPACKET`)
+        packetPayload (tuple): The payload (any sequence of byte values)
+
+    Returns:
+        The packet (bytearray).
+    """
+
+    ## The packet length = package payload (n bytes) + checksum (2 bytes)
+    packetLength = len(packetPayload) + 2
+
+    ## The packet checksum = packet type (1 byte) + packet length (2 bytes) + payload (n bytes)
+    packetChecksum = packetType + (packetLength >> 8 & 0xFF) + (packetLength & 0xFF) + sum(bytearray(packetPayload))
+
+    packet = bytearray(struct.pack('>HIBH', FINGERPRINT_STARTCODE, address, packetType, packetLength))
+    packet.extend(packetPayload)
+    packet.append(packetChecksum >> 8 & 0xFF)
+    packet.append(packetChecksum & 0xFF)
+
+    return packet
+
+def encodeDataPackets(address, data, maxPacketSize):
+    """
+    Encodes data split into data packets (the last one is marked as end data packet).
+
+    The result can be sent to several sensors with the same address and maximum packet size
+    (see `PyFingerprint.uploadEncodedCharacteristics()`).
+
+    Arguments:
+        address (int): The sensor address
+        data (bytes): The data
+        maxPacketSize (int): The maximum size of a single packet
+
+    Returns:
+        The list of packets (bytes).
+    """
+
+    data = bytearray(data)
+    encodedPackets = []
+
+    for lfrom in range(0, len(data), maxPacketSize):
+        lto = lfrom + maxPacketSize
+
+        if ( lto >= len(data) ):
+            packetType = FINGERPRINT_ENDDATAPACKET
+        else:
+            packetType = FINGERPRINT_DATAPACKET
+
+        encodedPackets.append(bytes(encodePacket(address, packetType, data[lfrom:lto])))
+
+    return encodedPackets
+
+def acquireLock(lock, timeout = None):
+    """
+    Acquires a lock within a timeout.
+
+    Arguments:
+        lock (threading.RLock): The lock
+        timeout (float): The maximum time in seconds to wait or None to wait forever
+
+    Returns:
+        True if the lock was acquired or False if the timeout expired.
+    """
+
+    if ( timeout is None ):
+        return lock.acquire()
+
+    try:
+        return lock.acquire(True, max(timeout, 0))
+
+    ## Python 2 does not support a timeout: poll the lock
+    except TypeError:
+        timeoutTime = monotonicTime() + timeout
+
+        while ( lock.acquire(False) == False ):
+            if ( monotonicTime() >= timeoutTime ):
+                return False
+
+            time.sleep(0.001)
+
+        return True
+
+def synchronized(method):
+    """
+    Decorator which executes a method of `PyFingerprint` within a transaction.
+
+    The decorated method accepts an additional keyword argument `deadline`: the maximum
+    number of seconds the whole method may take (see `PyFingerprint.transaction()`).
+
+    Arguments:
+        method (function): The method
+
+    Returns:
+        The decorated method (function).
+    """
+
+    @functools.wraps(method)
+    def synchronizedMethod(self, *args, **kwargs):
+        deadline = kwargs.pop('deadline', None)
+
+        with self.transaction(method.__name__, deadline):
+            return method(self, *args, **kwargs)
+
+    return synchronizedMethod
+
+def writeJournalEntry(journal, entry):
+    """
+    Appends an entry to a journal of template moves and forces it to disk.
+
+    Arguments:
+        journal (file): The journal file
+        entry (dict): The entry
+    """
+
+    journal.write(json.dumps(entry, sort_keys = True) + '\n')
+    journal.flush()
+    os.fsync(journal.fileno())
+
+def readJournal(journalPath):
+    """
+    Reads a journal of template moves (see `PyFingerprint.compactTemplates()`).
+
+    Every move is journaled with the characteristics of the template before it is started
+    and marked as done after the original was deleted.
+
+    Arguments:
+        journalPath (str): Path to the journal
+
+    Returns:
+        A tuple that contain the following information:
+        0: dict The mapping of the old to the new positions of all moves in the journal.
+        1: dict The entry of the interrupted move or None.
+    """
+
+    positionMapping = {}
+    pendingMove = None
+
+    if ( os.path.exists(journalPath) == False ):
+        return (positionMapping, pendingMove)
+
+    with open(journalPath, 'r') as journal:
+        for line in journal:
+            ## Ignore an entry which was not completely written
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+
+            if ( 'done' in entry ):
+                pendingMove = None
+            else:
+                pendingMove = entry
+                positionMapping[entry['from']] = entry['to']
+
+    return (positionMapping, pendingMove)
+
+class PipelineCapture(Exception):
+    """
+    Internally used by `PyFingerprint.executeBatch()` to capture the command packet of a method.
+
+    """
+    packet = None
+
+    def __init__(self, packet):
+        Exception.__init__(self, 'Captured command packet')
+        self.packet = packet
+
 class PyFingerprint(object):
     """
     Manages ZhianTec fingerprint sensors.
 
+    All methods which communicate with the sensor are thread-safe. Use `transaction()` to
+    execute several methods without being interrupted by other threads.
+
+    Every method which communicates with the sensor accepts the keyword argument `deadline`
+    (the maximum duration in seconds), e.g. `f.searchTemplate(deadline = 1.5)`. If it expires
+    or the sensor does not reply in time, `PacketTimeoutError` is raised.
+
     """
+    __lock = None
+    __scheduler = None
     __address = None
     __password = None
+
+    ## Address which is set by setAddress() (the reply may already use it)
+    __newAddress = None
     __serial = None
+    __port = None
+    __baudRate = None
+    __traceRecorder = None
+    __readBuffer = None
+    __pendingCommand = None
+    __commandRetries = 2
+    __storageCapacity = None
+
+    ## Timeouts of the instructions (instruction -> seconds)
+    __commandTimeouts = None
+
+    ## Instruction of the last sent command which is not yet answered
+    __awaitedInstruction = None
+
+    ## Thread which executes the current transaction
+    __transactionOwner = None
+
+    ## Point in time (see monotonicTime()) at which the current transaction expires or None
+    __deadline = None
+
+    ## A reply may still arrive after a timeout and has to be discarded
+    __staleInput = False
+
+    ## The password was verified once, so it can be verified again if the sensor requests it
+    __passwordVerified = False
+
+    ## Cached pages of the template index (page number -> list of usage indicators)
+    __templateIndexPages = None
+
+    ## Point in time (see monotonicTime()) at which the cached template index was checked or None
+    __templateIndexCheckTime = None
+
+    ## State of executeBatch(): None, 'capture' or 'replay'
+    __pipelineState = None
+    __pipelinedPacket = None
+    __pipelineFailed = False
+    __pipeliningSupported = True
 
     def __init__(self, port = '/dev/ttyUSB0', baudRate = 57600, address = 0xFFFFFFFF, password = 0x00000000):
         """
         Constructor
 
         Arguments:
-            port (str): The port to use
+            port (str): The port to use or an already opened serial-like object (e.g. a `TraceReplayer`)
             baudRate (int): The baud rate to use. Must be a multiple of 9600!
             address (int): The sensor address
             password (int): The sensor password
@@ -158,17 +475,85 @@ class PyFingerprint(object):
         if ( password < 0x00000000 or password > 0xFFFFFFFF ):
             raise ValueError('The given password is invalid!')
 
+        self.__lock = threading.RLock()
         self.__address = address
         self.__password = password
+        self.__readBuffer = bytearray()
+        self.__templateIndexPages = {}
+        self.__commandTimeouts = dict(FINGERPRINT_COMMAND_TIMEOUTS)
+
+        ## Use an already opened serial-like object as it is
+        if ( hasattr(port, 'read') and hasattr(port, 'write') ):
+            self.__serial = port
+
+        else:
+            self.__port = port
+            self.__baudRate = baudRate
+            self.__openSerial()
+
+    def __openSerial(self):
+        """
+        Opens the PySerial connection to the configured port.
+
+        """
 
         ## Initialize PySerial connection
-        self.__serial = serial.Serial(port = port, baudrate = baudRate, bytesize = serial.EIGHTBITS, timeout = 2)
+        self.__serial = serial.Serial(port = self.__port, baudrate = self.__baudRate, bytesize = serial.EIGHTBITS, timeout = 2)
 
         if ( self.__serial.isOpen() == True ):
             self.__serial.close()
 
         self.__serial.open()
 
+    def __reopenSerial(self):
+        """
+        Closes and reopens the PySerial connection and discards all unprocessed data.
+
+        The cached system parameters and template index are kept.
+
+        """
+
+        try:
+            self.__serial.close()
+
+        except (serial.SerialException, OSError, IOError):
+            ## The device may already be gone
+            pass
+
+        self.__readBuffer = bytearray()
+        self.__staleInput = False
+        self.__openSerial()
+
+    def __canReconnect(self):
+        """
+        Checks if the connection can be reopened automatically.
+
+        Returns:
+            True if the sensor was initialized with a port name and no batch is executed or False otherwise.
+        """
+
+        return self.__port is not None and self.__pipelineState is None
+
+    @synchronized
+    def reconnect(self):
+        """
+        Reopens the port after a connection problem (e.g. a hiccup of a USB-serial adapter).
+
+        The cached system parameters and template index are kept, so no further round trip is
+        needed. If the password was verified before, it is verified again as soon as the sensor
+        requests it (it replies `FINGERPRINT_PASSVERIFY` to a command). Read and write errors
+        of the port trigger a reconnect automatically.
+
+        Raises:
+            Exception: if the sensor was initialized with a serial-like object or the port could not be opened
+        """
+
+        if ( self.__port is None ):
+            raise Exception('A sensor initialized with a serial-like object can not be reconnected!')
+
+        self.__reopenSerial()
+        self.__pendingCommand = None
+
     def __del__(self):
         """
         Destructor
@@ -227,141 +612,650 @@ class PyFingerprint(object):
         result = n & twoP
         return int(result > 0)
 
-    def __byteToString(self, byte):
+    def __writePacket(self, packetType, packetPayload):
         """
-        Converts a byte to string.
+        Sends a packet to the sensor.
 
         Arguments:
-            byte (int): The byte
-
-        Returns:
-            The string (str)
+            packetType (int): The packet type (either `FINGERPRINT_COMMANDPACKET`, `FINGERPRINT_DATAPACKET` or `FINGERPRINT_ENDDATAPACKET`)
+            packetPayload (tuple): The payload (any sequence of byte values)
         """
 
-        return struct.pack('@B', byte)
+        packet = encodePacket(self.__address, packetType, packetPayload)
+
+        ## The packet is only captured to be sent within a batch
+        if ( self.__pipelineState == 'capture' ):
+            raise PipelineCapture(packet)
+
+        ## The packet was already sent within a batch
+        if ( self.__pipelineState == 'replay' ):
+            if ( self.__pipelinedPacket != packet ):
+                raise Exception('The command could not be pipelined!')
+
+            self.__pipelinedPacket = None
+            self.__awaitedInstruction = packet[9]
+            return
+
+        ## Discard a late reply of a command which timed out
+        if ( self.__staleInput == True and packetType == FINGERPRINT_COMMANDPACKET ):
+            self.__flushInput()
+            self.__staleInput = False
 
-    def __stringToByte(self, string):
+        self.__writeRawPacket(packet, packetType == FINGERPRINT_COMMANDPACKET)
+
+        ## Remember the command to be able to repeat it if the reply is corrupted
+        if ( packetType == FINGERPRINT_COMMANDPACKET ):
+            self.__pendingCommand = packet
+            self.__awaitedInstruction = packet[9]
+        else:
+            self.__pendingCommand = None
+
+    def __writeRawPacket(self, packet, reconnect = False):
         """
-        Convert one "string" byte (like '0xFF') to real integer byte (0xFF).
+        Writes an encoded packet to the port.
 
         Arguments:
-            string (str): The string
+            packet (bytearray): The packet
+            reconnect (bool): Reopen the port and write the packet again if writing fails
+        """
 
-        Returns:
-            The byte (int)
+        try:
+            self.__serial.write(bytes(packet))
+
+        except (serial.SerialException, OSError, IOError):
+            if ( reconnect == False or self.__canReconnect() == False ):
+                raise
+
+            self.__reopenSerial()
+            self.__serial.write(bytes(packet))
+
+        if ( self.__traceRecorder is not None ):
+            self.__traceRecorder.recordPacket(TRACE_DIRECTION_WRITE, packet)
+
+    def __verifyPasswordAgain(self):
+        """
+        Verifies the password which was verified before (e.g. after the sensor was restarted).
+
+        Raises:
+            Exception: if the password is not accepted anymore
         """
 
-        return struct.unpack('@B', string)[0]
+        packet = encodePacket(self.__address, FINGERPRINT_COMMANDPACKET, bytearray(struct.pack('>BI', FINGERPRINT_VERIFYPASSWORD, self.__password)))
 
-    def __writePacket(self, packetType, packetPayload):
+        self.__flushInput()
+        self.__writeRawPacket(packet)
+
+        receivedPacket = self.__receivePacket()
+
+        if ( receivedPacket[0] != FINGERPRINT_ACKPACKET or receivedPacket[1][:1] != bytearray((FINGERPRINT_OK,)) ):
+            raise Exception('The sensor does not accept the password anymore!')
+
+    def __writeDataPackets(self, data, maxPacketSize):
         """
-        Sends a packet to the sensor.
+        Sends data split into data packets (the last one is marked as end data packet).
 
         Arguments:
-            packetType (int): The packet type (either `FINGERPRINT_COMMANDPACKET`, `FINGERPRINT_DATAPACKET` or `FINGERPRINT_ENDDATAPACKET`)
-            packetPayload (tuple): The payload
+            data (bytearray): The data
+            maxPacketSize (int): The maximum size of a single packet
+        """
+
+        self.__writeEncodedPackets(encodeDataPackets(self.__address, data, maxPacketSize))
+
+    def __writeEncodedPackets(self, encodedPackets):
         """
+        Sends already encoded packets at once.
 
-        ## Write header (one byte at once)
-        self.__serial.write(self.__byteToString(self.__rightShift(FINGERPRINT_STARTCODE, 8)))
-        self.__serial.write(self.__byteToString(self.__rightShift(FINGERPRINT_STARTCODE, 0)))
+        Arguments:
+            encodedPackets (list): The packets (bytes)
+        """
 
-        self.__serial.write(self.__byteToString(self.__rightShift(self.__address, 24)))
-        self.__serial.write(self.__byteToString(self.__rightShift(self.__address, 16)))
-        self.__serial.write(self.__byteToString(self.__rightShift(self.__address, 8)))
-        self.__serial.write(self.__byteToString(self.__rightShift(self.__address, 0)))
+        self.__serial.write(b''.join([bytes(packet) for packet in encodedPackets]))
 
-        self.__serial.write(self.__byteToString(packetType))
+        if ( self.__traceRecorder is not None ):
+            for packet in encodedPackets:
+                self.__traceRecorder.recordPacket(TRACE_DIRECTION_WRITE, bytearray(packet))
 
-        ## The packet length = package payload (n bytes) + checksum (2 bytes)
-        packetLength = len(packetPayload) + 2
+        self.__pendingCommand = None
 
-        self.__serial.write(self.__byteToString(self.__rightShift(packetLength, 8)))
-        self.__serial.write(self.__byteToString(self.__rightShift(packetLength, 0)))
+    def __flushInput(self):
+        """
+        Discards all received but not yet processed data.
 
-        ## The packet checksum = packet type (1 byte) + packet length (2 bytes) + payload (n bytes)
-        packetChecksum = packetType + self.__rightShift(packetLength, 8) + self.__rightShift(packetLength, 0)
+        """
 
-        ## Write payload
-        for i in range(0, len(packetPayload)):
-            self.__serial.write(self.__byteToString(packetPayload[i]))
-            packetChecksum += packetPayload[i]
+        self.__readBuffer = bytearray()
 
-        ## Write checksum (2 bytes)
-        self.__serial.write(self.__byteToString(self.__rightShift(packetChecksum, 8)))
-        self.__serial.write(self.__byteToString(self.__rightShift(packetChecksum, 0)))
+        if ( hasattr(self.__serial, 'reset_input_buffer') ):
+            self.__serial.reset_input_buffer()
+        else:
+            self.__serial.flushInput()
 
     def __readPacket(self):
         """
         Receives a packet from the sensor.
 
+        Garbage in front of a packet is discarded until a valid header is found. If the
+        reply to a command is corrupted or the port failed, the command is sent again (see
+        `setCommandRetries()`). If the sensor requests the password verification, the password
+        is verified again and the command is repeated.
+
         Returns:
             A tuple that contain the following information:
             0: integer(1 byte) The packet type.
             1: integer(n bytes) The packet payload.
 
         Raises:
-            Exception: if checksum is wrong
+            PacketChecksumError: if checksum is wrong
+            PacketTimeoutError: if the sensor does not reply in time
         """
 
-        receivedPacketData = []
-        i = 0
+        retries = self.__commandRetries
+        passwordVerifiedAgain = False
 
         while ( True ):
+            try:
+                receivedPacket = self.__receivePacket()
 
-            ## Read one byte
-            receivedFragment = self.__serial.read()
+            except (PacketChecksumError, serial.SerialException, OSError, IOError) as e:
+                pendingCommand = self.__pendingCommand
 
-            if ( len(receivedFragment) != 0 ):
-                receivedFragment = self.__stringToByte(receivedFragment)
-                ## print 'Received packet fragment = ' + hex(receivedFragment)
-            else:
+                ## The following replies of a batch could not be assigned anymore
+                if ( self.__pipelineState == 'replay' ):
+                    self.__pipelineFailed = True
+                    raise
+
+                if ( retries <= 0 or pendingCommand is None or pendingCommand[9] in FINGERPRINT_TRANSFER_INSTRUCTIONS ):
+                    raise
+
+                if ( not isinstance(e, PacketChecksumError) and self.__canReconnect() == False ):
+                    raise
+
+                retries -= 1
+
+                ## Discard the rest of the corrupted reply (or reopen the failed port) and send the command again
+                if ( isinstance(e, PacketChecksumError) ):
+                    self.__flushInput()
+                else:
+                    self.__reopenSerial()
+
+                self.__writeRawPacket(pendingCommand, True)
                 continue
 
-            ## Insert byte if packet seems valid
-            receivedPacketData.insert(i, receivedFragment)
-            i += 1
+            except Exception as e:
+                if ( self.__pipelineState == 'replay' ):
+                    self.__pipelineFailed = True
+
+                if ( isinstance(e, PacketTimeoutError) ):
+                    self.__staleInput = True
+
+                raise
+
+            pendingCommand = self.__pendingCommand
+
+            ## The sensor was restarted (or the port reconnected) and requests the password verification
+            if ( receivedPacket[0] == FINGERPRINT_ACKPACKET and receivedPacket[1][:1] == bytearray((FINGERPRINT_PASSVERIFY,)) and self.__passwordVerified == True ):
+
+                if ( self.__pipelineState == 'replay' ):
+                    self.__pipelineFailed = True
+                    raise Exception('The sensor requests the password verification!')
+
+                if ( passwordVerifiedAgain == False and pendingCommand is not None and pendingCommand[9] != FINGERPRINT_VERIFYPASSWORD ):
+                    passwordVerifiedAgain = True
+
+                    self.__verifyPasswordAgain()
+                    self.__writeRawPacket(pendingCommand, True)
+                    continue
+
+            self.__pendingCommand = None
+            self.__awaitedInstruction = None
+            return receivedPacket
 
-            ## Packet could be complete (the minimal packet size is 12 bytes)
-            if ( i >= 12 ):
+    def __getReadTimeout(self):
+        """
+        Gets the time to wait for the next packet.
+
+        Returns:
+            The timeout in seconds (float).
+
+        Raises:
+            PacketTimeoutError: if the deadline of the transaction expired
+        """
 
-                ## Check the packet header
-                if ( receivedPacketData[0] != self.__rightShift(FINGERPRINT_STARTCODE, 8) or receivedPacketData[1] != self.__rightShift(FINGERPRINT_STARTCODE, 0) ):
-                    raise Exception('The received packet do not begin with a valid header!')
+        ## Only data packets can follow the reply of a command
+        if ( self.__awaitedInstruction is None ):
+            timeout = FINGERPRINT_DATAPACKET_TIMEOUT
+        else:
+            timeout = self.__commandTimeouts.get(self.__awaitedInstruction, FINGERPRINT_DEFAULT_COMMAND_TIMEOUT)
+
+        if ( self.__deadline is not None ):
+            remainingTime = self.__deadline - monotonicTime()
+
+            if ( remainingTime <= 0 ):
+                raise PacketTimeoutError('The deadline of the operation expired!')
+
+            timeout = min(timeout, remainingTime)
+
+        return timeout
+
+    def __adjustSerialTimeout(self, timeout):
+        """
+        Limits the time a read of the port blocks to about the given timeout.
+
+        Changing the timeout reconfigures the port, so it is only changed if the current timeout
+        exceeds the given one by more than a quarter or is much shorter (the reading loop would
+        poll). The caller enforces the exact timeout.
+
+        Arguments:
+            timeout (float): The timeout in seconds
+        """
+
+        currentTimeout = self.__serial.timeout
+
+        if ( currentTimeout is None or currentTimeout > timeout * 1.25 or currentTimeout < timeout * 0.25 ):
+            self.__serial.timeout = timeout
+
+    def __receivePacket(self):
+        """
+        Receives a single packet from the sensor and resynchronizes on garbage.
+
+        Packets with the address of an other sensor (e.g. on a serial bus) are discarded.
+
+        Returns:
+            A tuple that contain the following information:
+            0: integer(1 byte) The packet type.
+            1: bytearray(n bytes) The packet payload.
+
+        Raises:
+            PacketChecksumError: if checksum is wrong
+            PacketTimeoutError: if the packet is not received in time
+        """
+
+        receivedPacketData = self.__readBuffer
+
+        timeout = self.__getReadTimeout()
+        timeoutTime = monotonicTime() + timeout
+
+        self.__adjustSerialTimeout(timeout)
+
+        while ( True ):
+
+            ## Discard everything in front of the start code
+            startIndex = receivedPacketData.find(FINGERPRINT_STARTCODE_BYTES)
+
+            if ( startIndex > 0 ):
+                del receivedPacketData[:startIndex]
+
+            elif ( startIndex < 0 ):
+                ## Keep a trailing byte because it could be the first byte of the start code
+                del receivedPacketData[:len(receivedPacketData) - 1]
+
+                if ( len(receivedPacketData) > 0 and receivedPacketData[0] != FINGERPRINT_STARTCODE_BYTES[0] ):
+                    del receivedPacketData[:]
+
+            ## The packet header (start code, address, type and length) is 9 bytes
+            if ( startIndex >= 0 and len(receivedPacketData) >= 9 ):
+
+                packetType = receivedPacketData[6]
 
                 ## Calculate packet payload length (combine the 2 length bytes)
                 packetPayloadLength = self.__leftShift(receivedPacketData[7], 8)
                 packetPayloadLength = packetPayloadLength | self.__leftShift(receivedPacketData[8], 0)
 
-                ## Check if the packet is still fully received
-                ## Condition: index counter < packet payload length + packet frame
-                if ( i < packetPayloadLength + 9 ):
+                ## The start code was found by chance inside of garbage: skip it and resynchronize
+                if ( packetType not in FINGERPRINT_REPLY_PACKETS or packetPayloadLength < 2 or packetPayloadLength > FINGERPRINT_MAX_PACKET_LENGTH ):
+                    del receivedPacketData[:2]
                     continue
 
+                packetSize = 9 + packetPayloadLength
+
                 ## At this point the packet should be fully received
+                if ( len(receivedPacketData) >= packetSize ):
 
-                packetType = receivedPacketData[6]
+                    packet = receivedPacketData[:packetSize]
+                    del receivedPacketData[:packetSize]
+
+                    if ( self.__traceRecorder is not None ):
+                        self.__traceRecorder.recordPacket(TRACE_DIRECTION_READ, packet)
+
+                    ## Collect package payload (ignore the last 2 checksum bytes)
+                    packetPayload = packet[9:packetSize - 2]
 
-                ## Calculate checksum:
-                ## checksum = packet type (1 byte) + packet length (2 bytes) + packet payload (n bytes)
-                packetChecksum = packetType + receivedPacketData[7] + receivedPacketData[8]
+                    ## Calculate checksum:
+                    ## checksum = packet type (1 byte) + packet length (2 bytes) + packet payload (n bytes)
+                    packetChecksum = packetType + packet[7] + packet[8] + sum(packetPayload)
 
-                packetPayload = []
+                    ## Calculate full checksum of the 2 separate checksum bytes
+                    receivedChecksum = self.__leftShift(packet[packetSize - 2], 8)
+                    receivedChecksum = receivedChecksum | self.__leftShift(packet[packetSize - 1], 0)
 
-                ## Collect package payload (ignore the last 2 checksum bytes)
-                for j in range(9, 9 + packetPayloadLength - 2):
-                    packetPayload.append(receivedPacketData[j])
-                    packetChecksum += receivedPacketData[j]
+                    if ( receivedChecksum != (packetChecksum & 0xFFFF) ):
+                        raise PacketChecksumError('The received packet is corrupted (the checksum is wrong)!')
 
-                ## Calculate full checksum of the 2 separate checksum bytes
-                receivedChecksum = self.__leftShift(receivedPacketData[i - 2], 8)
-                receivedChecksum = receivedChecksum | self.__leftShift(receivedPacketData[i - 1], 0)
+                    ## Discard a reply of an other sensor on the same line (e.g. a late reply after a timeout),
+                    ## but the sensor may already reply to setAddress() with its new address
+                    packetAddress = struct.unpack('>I', bytes(packet[2:6]))[0]
 
-                if ( receivedChecksum != packetChecksum ):
-                    raise Exception('The received packet is corrupted (the checksum is wrong)!')
+                    if ( packetAddress != self.__address and packetAddress != self.__newAddress ):
+                        continue
 
-                return (packetType, packetPayload)
+                    return (packetType, packetPayload)
 
+                missingBytes = packetSize - len(receivedPacketData)
+
+            elif ( startIndex >= 0 ):
+                missingBytes = 9 - len(receivedPacketData)
+
+            else:
+                missingBytes = 1
+
+            remainingTime = timeoutTime - monotonicTime()
+
+            if ( remainingTime <= 0 ):
+                raise PacketTimeoutError('The sensor did not reply in time!')
+
+            ## The serial timeout must not exceed the remaining time considerably
+            self.__adjustSerialTimeout(remainingTime)
+
+            ## Read the missing bytes (the serial timeout limits the wait)
+            receivedFragment = self.__serial.read(missingBytes)
+            receivedPacketData.extend(bytearray(receivedFragment))
+
+    @contextlib.contextmanager
+    def transaction(self, operation = None, deadline = None):
+        """
+        Context manager which gives the calling thread exclusive access to the sensor.
+
+        The deadline includes the time spent waiting for the access. Nested transactions can
+        only shorten the deadline of the outer transaction.
+
+        Example:
+            with f.transaction(deadline = 5):
+                f.readImage()
+                f.convertImage(FINGERPRINT_CHARBUFFER1)
+                f.searchTemplate()
+
+        Arguments:
+            operation (str): The name of the operation (used by a scheduler to prioritize it)
+            deadline (float): The maximum duration of the transaction in seconds or None
+
+        Returns:
+            This instance (PyFingerprint) as context.
+
+        Raises:
+            ValueError: if the deadline is invalid
+            PacketTimeoutError: if the deadline expired while waiting for the access
+        """
+
+        if ( deadline is not None and deadline <= 0 ):
+            raise ValueError('The given deadline is invalid!')
+
+        if ( deadline is not None ):
+            deadlineTime = monotonicTime() + deadline
+        else:
+            deadlineTime = None
+
+        currentThread = threading.current_thread()
+
+        ## A nested transaction already owns the scheduler and the lock
+        if ( self.__transactionOwner is currentThread ):
+            outerDeadline = self.__deadline
+
+            if ( deadlineTime is not None and (outerDeadline is None or deadlineTime < outerDeadline) ):
+                self.__deadline = deadlineTime
+
+            try:
+                yield self
+
+            finally:
+                self.__deadline = outerDeadline
+
+            return
+
+        ## Wait at the scheduler before taking the lock: otherwise the threads of this sensor
+        ## would queue at the lock and the scheduler could not grant them by priority
+        scheduler = self.__scheduler
+
+        if ( scheduler is not None and scheduler.acquire(operation, self.__getRemainingTime(deadlineTime)) == False ):
+            raise PacketTimeoutError('The deadline of the operation expired while waiting for the sensor!')
+
+        try:
+            if ( acquireLock(self.__lock, self.__getRemainingTime(deadlineTime)) == False ):
+                raise PacketTimeoutError('The deadline of the operation expired while waiting for the sensor!')
+
+            try:
+                self.__transactionOwner = currentThread
+                self.__deadline = deadlineTime
+
+                try:
+                    yield self
+
+                finally:
+                    self.__deadline = None
+                    self.__transactionOwner = None
+
+            finally:
+                self.__lock.release()
+
+        finally:
+            if ( scheduler is not None ):
+                scheduler.release()
+
+    def setScheduler(self, scheduler):
+        """
+        Sets a scheduler which has to grant every transaction (e.g. a `CommandScheduler` of this sensor or of a shared bus).
+
+        Arguments:
+            scheduler (CommandScheduler): The scheduler or None
+        """
+
+        with self.__lock:
+            self.__scheduler = scheduler
+
+    def setCommandRetries(self, commandRetries):
+        """
+        Sets how often a command is sent again if the reply of the sensor is corrupted.
+
+        Commands which transfer data packets (e.g. `downloadImage()`) are never repeated.
+
+        Arguments:
+            commandRetries (int): The number of retries (0 disables retrying)
+
+        Raises:
+            ValueError: if the given number is invalid
+        """
+
+        if ( commandRetries < 0 ):
+            raise ValueError('The given number of retries is invalid!')
+
+        self.__commandRetries = commandRetries
+
+    def setCommandTimeout(self, instruction, timeout):
+        """
+        Sets how long to wait for the reply of an instruction (e.g. for a slow sensor with many templates).
+
+        Arguments:
+            instruction (int): The instruction code, e.g. `FINGERPRINT_SEARCHTEMPLATE`
+            timeout (float): The timeout in seconds
+
+        Raises:
+            ValueError: if the given timeout is invalid
+        """
+
+        if ( timeout <= 0 ):
+            raise ValueError('The given timeout is invalid!')
+
+        with self.__lock:
+            self.__commandTimeouts[instruction] = timeout
+
+    def setTraceRecorder(self, traceRecorder):
+        """
+        Sets a recorder which captures every packet exchanged with the sensor.
+
+        Arguments:
+            traceRecorder (TraceRecorder): The recorder or None to stop recording
+        """
+
+        self.__traceRecorder = traceRecorder
+
+    def __capturePacket(self, command):
+        """
+        Captures the command packet which would be sent by a batch command without sending it.
+
+        Arguments:
+            command (tuple): The bound method followed by its arguments
+
+        Returns:
+            The command packet (bytearray) or None if the command can not be pipelined.
+        """
+
+        method = command[0]
+        instruction = FINGERPRINT_PIPELINE_INSTRUCTIONS.get(getattr(method, '__name__', None))
+
+        if ( instruction is None or getattr(method, '__self__', None) is not self ):
+            return None
+
+        packet = None
+        self.__pipelineState = 'capture'
+
+        try:
+            method(*command[1:])
+
+        except PipelineCapture as capture:
+            packet = capture.packet
+
+        finally:
+            self.__pipelineState = None
+
+        ## The method needs an other command first (e.g. storeTemplate() without position)
+        if ( packet is None or packet[9] != instruction ):
+            return None
+
+        return packet
+
+    @synchronized
+    def executeBatch(self, commands, pipelined = True, maxDepth = 4):
+        """
+        Executes several independent commands and returns their results.
+
+        Consecutive commands which send exactly one command packet (e.g. `getTemplateIndex()`,
+        `getTemplateCount()` or `deleteTemplate()`) are written back-to-back and their replies
+        are read afterwards. All other commands are executed one after another. If the sensor
+        does not cope with pipelined commands, the affected commands are repeated one after
+        another and pipelining is disabled for this instance.
+
+        If a command fails, its exception is raised with the attribute `batchResults` (list): the
+        result at index i belongs to command i and is valid for every index of the list. The
+        commands of a pipelined group were already sent together, so the commands of the group
+        which follow the failing command may have been executed as well (e.g. a `deleteTemplate()`).
+        Their results are included, a failed command of the group has the result None. The commands
+        of the following groups are not executed.
+
+        Arguments:
+            commands (list): Tuples of a bound method of this instance followed by its arguments, e.g. `(f.getTemplateIndex, 0)`
+            pipelined (bool): Pipeline the commands if possible
+            maxDepth (int): The maximum number of commands which are sent without reading the replies
+
+        Returns:
+            The list of the results of the commands.
+
+        Raises:
+            ValueError: if any passed argument is invalid
+            Exception: if any error occurs (see above)
+        """
+
+        if ( maxDepth < 1 ):
+            raise ValueError('The given pipeline depth is invalid!')
+
+        results = []
+        pendingCommands = list(commands)
+
+        if ( pipelined == True and self.__pipeliningSupported == True ):
+            ## Prevent the capacity validation of some methods from sending an other command
+            self.getStorageCapacity()
+
+        while ( len(pendingCommands) > 0 ):
+
+            group = []
+
+            ## Collect consecutive commands which can be pipelined
+            while ( pipelined == True and self.__pipeliningSupported == True and len(group) < maxDepth and len(group) < len(pendingCommands) ):
+
+                packet = self.__capturePacket(pendingCommands[len(group)])
+
+                if ( packet is None ):
+                    break
+
+                group.append(packet)
+
+            ## Execute a single command as usual
+            if ( len(group) <= 1 ):
+                command = pendingCommands.pop(0)
+
+                try:
+                    results.append(command[0](*command[1:]))
+
+                except Exception as e:
+                    e.batchResults = results
+                    raise
+
+                continue
+
+            ## Write all command packets at once
+            self.__pendingCommand = None
+
+            if ( self.__staleInput == True ):
+                self.__flushInput()
+                self.__staleInput = False
+
+            self.__serial.write(bytes(bytearray().join(group)))
+
+            if ( self.__traceRecorder is not None ):
+                for packet in group:
+                    self.__traceRecorder.recordPacket(TRACE_DIRECTION_WRITE, packet)
+
+            ## Parse the replies in order
+            groupResults = []
+            firstError = None
+            self.__pipelineFailed = False
+
+            for packet in group:
+                command = pendingCommands[len(groupResults)]
+
+                self.__pipelineState = 'replay'
+                self.__pipelinedPacket = packet
+
+                try:
+                    groupResults.append(command[0](*command[1:]))
+
+                except Exception as e:
+                    if ( self.__pipelineFailed == True ):
+                        break
+
+                    ## The reply was received but the command failed
+                    groupResults.append(None)
+
+                    if ( firstError is None ):
+                        firstError = e
+
+                finally:
+                    self.__pipelineState = None
+                    self.__pipelinedPacket = None
+
+            ## The sensor did not cope with the pipelined commands: repeat the unanswered commands one after another
+            if ( self.__pipelineFailed == True ):
+                self.__pipeliningSupported = False
+                self.__flushInput()
+
+            if ( firstError is not None ):
+                firstError.batchResults = results + groupResults
+                raise firstError
+
+            results.extend(groupResults)
+            del pendingCommands[:len(groupResults)]
+
+        return results
+
+    @synchronized
     def verifyPassword(self):
         """
         Verifies password of the sensor.
@@ -392,6 +1286,7 @@ class PyFingerprint(object):
 
         ## DEBUG: Sensor password is correct
         if ( receivedPacketPayload[0] == FINGERPRINT_OK ):
+            self.__passwordVerified = True
             return True
 
         elif ( receivedPacketPayload[0] == FINGERPRINT_ERROR_COMMUNICATION ):
@@ -407,6 +1302,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def setPassword(self, newPassword):
         """
         Sets the password of the sensor.
@@ -453,6 +1349,17 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    def getAddress(self):
+        """
+        Gets the sensor address used by this instance.
+
+        Returns:
+            The address (int).
+        """
+
+        return self.__address
+
+    @synchronized
     def setAddress(self, newAddress):
         """
         Sets the sensor address.
@@ -480,7 +1387,13 @@ class PyFingerprint(object):
         )
 
         self.__writePacket(FINGERPRINT_COMMANDPACKET, packetPayload)
-        receivedPacket = self.__readPacket()
+        self.__newAddress = newAddress
+
+        try:
+            receivedPacket = self.__readPacket()
+
+        finally:
+            self.__newAddress = None
 
         receivedPacketType = receivedPacket[0]
         receivedPacketPayload = receivedPacket[1]
@@ -499,6 +1412,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def setSystemParameter(self, parameterNumber, parameterValue):
         """
         Set a system parameter of the sensor.
@@ -565,6 +1479,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def setBaudRate(self, baudRate):
         """
         Sets the baud rate.
@@ -582,6 +1497,7 @@ class PyFingerprint(object):
 
         self.setSystemParameter(FINGERPRINT_SETSYSTEMPARAMETER_BAUDRATE, baudRate // 9600)
 
+    @synchronized
     def setSecurityLevel(self, securityLevel):
         """
         Sets the security level of the sensor.
@@ -595,6 +1511,7 @@ class PyFingerprint(object):
 
         self.setSystemParameter(FINGERPRINT_SETSYSTEMPARAMETER_SECURITY_LEVEL, securityLevel)
 
+    @synchronized
     def setMaxPacketSize(self, packetSize):
         """
         Sets the maximum packet size of sensor.
@@ -616,6 +1533,7 @@ class PyFingerprint(object):
 
         self.setSystemParameter(FINGERPRINT_SETSYSTEMPARAMETER_PACKAGE_SIZE, packetMaxSizeType)
 
+    @synchronized
     def getSystemParameters(self):
         """
         Gets all available system information of the sensor.
@@ -658,6 +1576,9 @@ class PyFingerprint(object):
             packetLength       = self.__leftShift(receivedPacketPayload[13], 8) | self.__leftShift(receivedPacketPayload[14], 0)
             baudRate           = self.__leftShift(receivedPacketPayload[15], 8) | self.__leftShift(receivedPacketPayload[16], 0)
 
+            ## The storage capacity never changes so it is cached
+            self.__storageCapacity = storageCapacity
+
             return (statusRegister, systemID, storageCapacity, securityLevel, deviceAddress, packetLength, baudRate)
 
         elif ( receivedPacketPayload[0] == FINGERPRINT_ERROR_COMMUNICATION ):
@@ -666,10 +1587,13 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def getStorageCapacity(self):
         """
         Gets the sensor storage capacity.
 
+        The value is only requested from the sensor once and cached afterwards.
+
         Returns:
             The storage capacity (int).
 
@@ -677,8 +1601,12 @@ class PyFingerprint(object):
             Exception: if any error occurs
         """
 
-        return self.getSystemParameters()[2]
+        if ( self.__storageCapacity is None ):
+            self.getSystemParameters()
 
+        return self.__storageCapacity
+
+    @synchronized
     def getSecurityLevel(self):
         """
         Gets the security level of the sensor.
@@ -692,6 +1620,7 @@ class PyFingerprint(object):
 
         return self.getSystemParameters()[3]
 
+    @synchronized
     def getMaxPacketSize(self):
         """
         Gets the maximum allowed size of a single packet.
@@ -715,6 +1644,7 @@ class PyFingerprint(object):
 
         return packetSize
 
+    @synchronized
     def getBaudRate(self):
         """
         Gets the baud rate.
@@ -728,6 +1658,7 @@ class PyFingerprint(object):
 
         return self.getSystemParameters()[6] * 9600
 
+    @synchronized
     def getTemplateIndex(self, page):
         """
         Gets a list of the template positions with usage indicator.
@@ -774,6 +1705,7 @@ class PyFingerprint(object):
                     positionIsUsed = (self.__bitAtPosition(pageElement, p) == 1)
                     templateIndex.append(positionIsUsed)
 
+            self.__templateIndexPages[page] = list(templateIndex)
             return templateIndex
 
         elif ( receivedPacketPayload[0] == FINGERPRINT_ERROR_COMMUNICATION ):
@@ -782,6 +1714,100 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    def __updateTemplateIndexCache(self, positionNumber, count, positionIsUsed):
+        """
+        Updates the usage indicators of the cached template index pages.
+
+        Arguments:
+            positionNumber (int): The first position
+            count (int): The number of positions
+            positionIsUsed (bool): The new usage indicator
+        """
+
+        for (page, templateIndex) in self.__templateIndexPages.items():
+            pageOffset = page * len(templateIndex)
+
+            for position in range(max(positionNumber, pageOffset), min(positionNumber + count, pageOffset + len(templateIndex))):
+                templateIndex[position - pageOffset] = positionIsUsed
+
+    def clearTemplateIndexCache(self):
+        """
+        Clears the cached template index.
+
+        Call it if the templates were changed by something else than this instance (e.g. an other program).
+
+        """
+
+        with self.transaction():
+            self.__templateIndexPages = {}
+            self.__templateIndexCheckTime = None
+
+    def __getCachedTemplateIndex(self):
+        """
+        Gets the usage indicators of all positions from the cached template index.
+
+        Missing pages of the template index are requested from the sensor.
+
+        Returns:
+            The list.
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        capacity = self.getStorageCapacity()
+        templateIndex = []
+
+        for page in range(0, 4):
+            if ( len(templateIndex) >= capacity ):
+                break
+
+            if ( page not in self.__templateIndexPages ):
+                self.getTemplateIndex(page)
+
+            templateIndex.extend(self.__templateIndexPages[page])
+
+        return templateIndex[:capacity]
+
+    def __getOccupiedRanges(self, positionStart, maxGap):
+        """
+        Gets the ranges which contain all used positions from the cached template index.
+
+        Arguments:
+            positionStart (int): The first position to consider
+            maxGap (int): The maximum number of unused positions inside of a range or None for only one range
+
+        Returns:
+            A list of tuples that contain the following information:
+            0: integer The first position of the range.
+            1: integer The number of positions of the range.
+        """
+
+        templateIndex = self.__getCachedTemplateIndex()
+
+        occupiedRanges = []
+        rangeStart = None
+        rangeEnd = None
+
+        for position in range(positionStart, len(templateIndex)):
+            if ( templateIndex[position] == False ):
+                continue
+
+            ## Start a new range if the gap to the previous used position is too large
+            if ( rangeStart is None or (maxGap is not None and position - rangeEnd - 1 > maxGap) ):
+                if ( rangeStart is not None ):
+                    occupiedRanges.append((rangeStart, rangeEnd - rangeStart + 1))
+
+                rangeStart = position
+
+            rangeEnd = position
+
+        if ( rangeStart is not None ):
+            occupiedRanges.append((rangeStart, rangeEnd - rangeStart + 1))
+
+        return occupiedRanges
+
+    @synchronized
     def getTemplateCount(self):
         """
         Gets the number of stored templates.
@@ -818,6 +1844,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def readImage(self):
         """
         Reads the image of a finger and stores it in image buffer.
@@ -844,6 +1871,11 @@ class PyFingerprint(object):
 
         ## DEBUG: Image read successful
         if ( receivedPacketPayload[0] == FINGERPRINT_OK ):
+
+            ## Let the scheduler hold back long operations until the finger is identified
+            if ( hasattr(self.__scheduler, 'fingerDetected') ):
+                self.__scheduler.fingerDetected()
+
             return True
 
         elif ( receivedPacketPayload[0] == FINGERPRINT_ERROR_COMMUNICATION ):
@@ -859,25 +1891,74 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
-    ## TODO:
-    ## Implementation of uploadImage()
-
-    def downloadImage(self, imageDestination):
+    @synchronized
+    def uploadImage(self, image):
         """
-        Downloads the image from image buffer.
+        Uploads an image to the image buffer.
 
         Arguments:
-            imageDestination (str): Path to image
+            image (object): A PIL image, a NumPy array or bytes with 256x288 pixels. Bytes with 36864 bytes are sent as already packed image (4 bits per pixel, see `packImage()`).
+
+        Returns:
+            True if successful.
 
         Raises:
-            ValueError: if directory is not writable
+            ValueError: if the image is invalid
             Exception: if any error occurs
         """
 
-        destinationDirectory = os.path.dirname(imageDestination)
+        if ( isinstance(image, (bytes, bytearray, memoryview)) and len(image) == IMAGE_PACKED_SIZE ):
+            packedImage = bytearray(image)
+        else:
+            packedImage = bytearray(packImage(image))
 
-        if ( os.access(destinationDirectory, os.W_OK) == False ):
-            raise ValueError('The given destination directory "' + destinationDirectory + '" is not writable!')
+        maxPacketSize = self.getMaxPacketSize()
+
+        packetPayload = (
+            FINGERPRINT_UPLOADIMAGE,
+        )
+
+        self.__writePacket(FINGERPRINT_COMMANDPACKET, packetPayload)
+
+        ## Get first reply packet
+        receivedPacket = self.__readPacket()
+
+        receivedPacketType = receivedPacket[0]
+        receivedPacketPayload = receivedPacket[1]
+
+        if ( receivedPacketType != FINGERPRINT_ACKPACKET ):
+            raise Exception('The received packet is no ack packet!')
+
+        ## DEBUG: The sensor is ready for the follow-up packets
+        if ( receivedPacketPayload[0] == FINGERPRINT_OK ):
+            pass
+
+        elif ( receivedPacketPayload[0] == FINGERPRINT_ERROR_COMMUNICATION ):
+            raise Exception('Communication error')
+
+        elif ( receivedPacketPayload[0] == FINGERPRINT_PACKETRESPONSEFAIL ):
+            raise Exception('Could not upload image')
+
+        else:
+            raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
+
+        ## Upload data packets
+        self.__writeDataPackets(packedImage, maxPacketSize)
+        return True
+
+    @synchronized
+    def downloadPackedImage(self):
+        """
+        Downloads the image from image buffer as sent by the sensor (4 bits per pixel).
+
+        The left pixel of every pair is stored in the upper 4 bits of a byte (see `unpackImage()`).
+
+        Returns:
+            The packed image (bytes) with 36864 bytes.
+
+        Raises:
+            Exception: if any error occurs
+        """
 
         packetPayload = (
             FINGERPRINT_DOWNLOADIMAGE,
@@ -922,33 +2003,43 @@ class PyFingerprint(object):
 
             imageData.append(receivedPacketPayload)
 
-        ## Initialize image
-        resultImage = Image.new('L', (256, 288), 'white')
-        pixels = resultImage.load()
-        (resultImageWidth, resultImageHeight) = resultImage.size
-        row = 0
-        column = 0
-
-        for y in range(resultImageHeight):
-            for x in range(resultImageWidth):
-
-                ## One byte contains two pixels
-                ## Thanks to Danylo Esterman <soundcracker@gmail.com> for the "multiple with 17" improvement:
-                if (x % 2 == 0):
-                    ## Draw left 4 Bits one byte of package
-                    pixels[x, y] = (imageData[row][column]  >> 4) * 17
-                else:
-                    ## Draw right 4 Bits one byte of package
-                    pixels[x, y] = (imageData[row][column] & 0x0F) * 17
-                    column += 1
+        imageData = bytearray().join(imageData)
+
+        if ( len(imageData) < IMAGE_PACKED_SIZE ):
+            raise Exception('The received image is incomplete!')
+
+        return bytes(imageData[:IMAGE_PACKED_SIZE])
+
+    @synchronized
+    def downloadImage(self, imageDestination):
+        """
+        Downloads the image from image buffer.
+
+        Arguments:
+            imageDestination (str): Path to image
+
+        Raises:
+            ValueError: if directory is not writable
+            Exception: if any error occurs
+        """
+
+        destinationDirectory = os.path.dirname(imageDestination)
+
+        if ( os.access(destinationDirectory, os.W_OK) == False ):
+            raise ValueError('The given destination directory "' + destinationDirectory + '" is not writable!')
 
-                    ## Reset
-                    if (column == len(imageData[row])):
-                        row += 1
-                        column = 0
+        packedImage = self.downloadPackedImage()
+
+        ## PIL is only imported when needed because its import is slow
+        from PIL import Image
+
+        ## One byte contains two pixels
+        ## Thanks to Danylo Esterman <soundcracker@gmail.com> for the "multiple with 17" improvement:
+        resultImage = Image.frombytes('L', (IMAGE_WIDTH, IMAGE_HEIGHT), bytes(unpackImage(packedImage)))
 
         resultImage.save(imageDestination)
 
+    @synchronized
     def convertImage(self, charBufferNumber = FINGERPRINT_CHARBUFFER1):
         """
         Converts the image in image buffer to characteristics and stores it in specified char buffer.
@@ -1000,6 +2091,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def createTemplate(self):
         """
         Combines the characteristics which are stored in char buffer 1 and char buffer 2 into one template.
@@ -1039,6 +2131,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def storeTemplate(self, positionNumber = -1, charBufferNumber = FINGERPRINT_CHARBUFFER1):
         """
         Stores a template from the specified char buffer at the given position.
@@ -1094,6 +2187,7 @@ class PyFingerprint(object):
 
         ## DEBUG: Template stored successful
         if ( receivedPacketPayload[0] == FINGERPRINT_OK ):
+            self.__updateTemplateIndexCache(positionNumber, 1, True)
             return positionNumber
 
         elif ( receivedPacketPayload[0] == FINGERPRINT_ERROR_COMMUNICATION ):
@@ -1108,14 +2202,25 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
-    def searchTemplate(self, charBufferNumber = FINGERPRINT_CHARBUFFER1, positionStart = 0, count = -1):
+    @synchronized
+    def searchTemplate(self, charBufferNumber = FINGERPRINT_CHARBUFFER1, positionStart = 0, count = -1, maxGap = None, bounded = False):
         """
         Searches inside the database for the characteristics in char buffer.
 
+        If no count is given, all positions behind the start position are searched. With
+        `bounded = True` only the range between the first and the last used position is searched
+        (based on the cached template index, which is updated by the methods of this instance).
+        The number of templates of the sensor is compared with the cache after it was cleared and
+        then every `FINGERPRINT_TEMPLATEINDEX_CHECK_INTERVAL` seconds, and the cache is reloaded if
+        it differs (e.g. a template was enrolled by an other program). Call
+        `clearTemplateIndexCache()` right after templates were changed by something else.
+
         Arguments:
             charBufferNumber (int): The char buffer. Use `FINGERPRINT_CHARBUFFER1` or `FINGERPRINT_CHARBUFFER2`.
             positionStart (int): The position to start the search
             count (int): The number of templates
+            maxGap (int): If the search is bounded, split it into several ranges to skip more than this number of unused positions
+            bounded (bool): If no count is given, only search the used positions of the cached template index
 
         Returns:
             A tuple that contain the following information:
@@ -1130,9 +2235,46 @@ class PyFingerprint(object):
             raise ValueError('The given charbuffer number is invalid!')
 
         if ( count > 0 ):
-            templatesCount = count
-        else:
-            templatesCount = self.getStorageCapacity()
+            return self.__searchTemplateRange(charBufferNumber, positionStart, count)
+
+        if ( bounded == False ):
+            return self.__searchTemplateRange(charBufferNumber, positionStart, self.getStorageCapacity() - positionStart)
+
+        ## The cached template index must contain all templates of the sensor (checked after it was cleared and periodically)
+        checkTime = self.__templateIndexCheckTime
+
+        if ( checkTime is None or monotonicTime() - checkTime >= FINGERPRINT_TEMPLATEINDEX_CHECK_INTERVAL ):
+            if ( self.__getCachedTemplateIndex().count(True) != self.getTemplateCount() ):
+                self.__templateIndexPages = {}
+
+            self.__templateIndexCheckTime = monotonicTime()
+
+        ## Search the used ranges one after another (no range means the database is empty)
+        for (rangeStart, rangeCount) in self.__getOccupiedRanges(positionStart, maxGap):
+            result = self.__searchTemplateRange(charBufferNumber, rangeStart, rangeCount)
+
+            if ( result[0] >= 0 ):
+                return result
+
+        return (-1, -1)
+
+    def __searchTemplateRange(self, charBufferNumber, positionStart, templatesCount):
+        """
+        Searches the given range of the database for the characteristics in char buffer.
+
+        Arguments:
+            charBufferNumber (int): The char buffer. Use `FINGERPRINT_CHARBUFFER1` or `FINGERPRINT_CHARBUFFER2`.
+            positionStart (int): The position to start the search
+            templatesCount (int): The number of templates
+
+        Returns:
+            A tuple that contain the following information:
+            0: integer(2 bytes) The position number of found template.
+            1: integer(2 bytes) The accuracy score of found template.
+
+        Raises:
+            Exception: if any error occurs
+        """
 
         packetPayload = (
             FINGERPRINT_SEARCHTEMPLATE,
@@ -1173,6 +2315,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def loadTemplate(self, positionNumber, charBufferNumber = FINGERPRINT_CHARBUFFER1):
         """
         Loads an existing template specified by position number to specified char buffer.
@@ -1227,6 +2370,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def deleteTemplate(self, positionNumber, count = 1):
         """
         Deletes templates from fingerprint database. Per default one.
@@ -1270,6 +2414,7 @@ class PyFingerprint(object):
 
         ## DEBUG: Template deleted successful
         if ( receivedPacketPayload[0] == FINGERPRINT_OK ):
+            self.__updateTemplateIndexCache(positionNumber, count, False)
             return True
 
         elif ( receivedPacketPayload[0] == FINGERPRINT_ERROR_COMMUNICATION ):
@@ -1285,6 +2430,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    @synchronized
     def clearDatabase(self):
         """
         Deletes all templates from the fingeprint database.
@@ -1311,6 +2457,7 @@ class PyFingerprint(object):
 
         ## DEBUG: Database cleared successful
         if ( receivedPacketPayload[0] == FINGERPRINT_OK ):
+            self.__updateTemplateIndexCache(0, self.getStorageCapacity(), False)
             return True
 
         elif ( receivedPacketPayload[0] == FINGERPRINT_ERROR_COMMUNICATION ):
@@ -1323,6 +2470,167 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
+    def __recoverCompaction(self, journalPath):
+        """
+        Completes an interrupted compaction recorded in the given journal.
+
+        Arguments:
+            journalPath (str): Path to the journal
+
+        Returns:
+            The mapping (dict) of the old to the new positions of all moves in the journal.
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        (positionMapping, pendingMove) = readJournal(journalPath)
+
+        ## Repeat the interrupted move from the characteristics saved in the journal
+        if ( pendingMove is not None ):
+            characteristics = binascii.unhexlify(pendingMove['characteristics'])
+
+            self.uploadCharacteristics(FINGERPRINT_CHARBUFFER2, characteristics)
+            self.storeTemplate(pendingMove['to'], FINGERPRINT_CHARBUFFER2)
+
+            if ( self.deleteTemplate(pendingMove['from']) == False ):
+                raise Exception('Could not delete template')
+
+        return positionMapping
+
+    def __getRemainingTime(self, deadlineTime):
+        """
+        Gets the remaining time until a deadline.
+
+        Arguments:
+            deadlineTime (float): The point in time (see monotonicTime()) or None
+
+        Returns:
+            The remaining time in seconds (float) or None if there is no deadline.
+
+        Raises:
+            PacketTimeoutError: if the deadline expired
+        """
+
+        if ( deadlineTime is None ):
+            return None
+
+        remainingTime = deadlineTime - monotonicTime()
+
+        if ( remainingTime <= 0 ):
+            raise PacketTimeoutError('The deadline of the operation expired!')
+
+        return remainingTime
+
+    def __getNextCompactionMove(self):
+        """
+        Gets the next move of a compaction: the first used position behind the first unused position.
+
+        Returns:
+            A tuple that contain the following information or None if there are no gaps:
+            0: integer The current position of the template.
+            1: integer The new position of the template.
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        templateIndex = self.__getCachedTemplateIndex()
+
+        try:
+            freePosition = templateIndex.index(False)
+
+        except ValueError:
+            return None
+
+        for position in range(freePosition + 1, len(templateIndex)):
+            if ( templateIndex[position] == True ):
+                return (position, freePosition)
+
+        return None
+
+    def compactTemplates(self, journalPath, deadline = None, moveCallback = None):
+        """
+        Moves all templates to the lowest positions without gaps (keeping their order).
+
+        Every move is recorded in a journal on the host. If a compaction was interrupted
+        (e.g. by a power failure), calling this method again with the same journal completes it.
+        The journal is removed after the compaction succeeded.
+
+        Every move is a transaction of its own, so other operations (e.g. identifications) are
+        executed between the moves. The moves use char buffer 2: execute operations which need
+        char buffer 2 (e.g. enrollments) within `transaction()` while compacting.
+
+        A moved template is found at its new position by the next identification. Pass a
+        `moveCallback` to update the mapping of positions (e.g. to users) within the transaction
+        of every move, or execute the whole compaction within `transaction()`. The moves of an
+        interrupted compaction are reported again when it is completed.
+
+        Arguments:
+            journalPath (str): Path to the journal
+            deadline (float): The maximum duration of the whole compaction in seconds or None
+            moveCallback (function): Called with the old and the new position right after every move
+
+        Returns:
+            The mapping (dict) of the old to the new positions of the moved templates.
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        if ( deadline is not None ):
+            deadlineTime = monotonicTime() + deadline
+        else:
+            deadlineTime = None
+
+        with self.transaction('compactTemplates', self.__getRemainingTime(deadlineTime)):
+            positionMapping = self.__recoverCompaction(journalPath)
+
+            if ( moveCallback is not None ):
+                for (oldPosition, newPosition) in sorted(positionMapping.items()):
+                    moveCallback(oldPosition, newPosition)
+
+            ## Always start from the real template index of the sensor
+            self.clearTemplateIndexCache()
+
+        with open(journalPath, 'a') as journal:
+            while ( True ):
+                with self.transaction('compactTemplates', self.__getRemainingTime(deadlineTime)):
+
+                    ## The templates may have changed between the moves
+                    move = self.__getNextCompactionMove()
+
+                    if ( move is None ):
+                        break
+
+                    (oldPosition, newPosition) = move
+
+                    self.loadTemplate(oldPosition, FINGERPRINT_CHARBUFFER2)
+                    characteristics = self.downloadCharacteristics(FINGERPRINT_CHARBUFFER2, asBytes = True)
+
+                    writeJournalEntry(journal, {
+                        'from': oldPosition,
+                        'to': newPosition,
+                        'characteristics': binascii.hexlify(characteristics).decode('ascii'),
+                    })
+
+                    ## The char buffer still contains the loaded template
+                    self.storeTemplate(newPosition, FINGERPRINT_CHARBUFFER2)
+
+                    if ( self.deleteTemplate(oldPosition) == False ):
+                        raise Exception('Could not delete template')
+
+                    writeJournalEntry(journal, {'done': oldPosition})
+                    positionMapping[oldPosition] = newPosition
+
+                    ## Report the move before an other operation can use the new position
+                    if ( moveCallback is not None ):
+                        moveCallback(oldPosition, newPosition)
+
+        os.remove(journalPath)
+        return positionMapping
+
+    @synchronized
     def compareCharacteristics(self):
         """
         Compare the finger characteristics of char buffer 1 with char buffer 2 and returns the accuracy score.
@@ -1363,7 +2671,8 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
-    def uploadCharacteristics(self, charBufferNumber = FINGERPRINT_CHARBUFFER1, characteristicsData = [0]):
+    @synchronized
+    def uploadCharacteristics(self, charBufferNumber = FINGERPRINT_CHARBUFFER1, characteristicsData = [0], verify = True):
         """
         Uploads finger characteristics to specified char buffer.
 
@@ -1372,10 +2681,11 @@ class PyFingerprint(object):
 
         Arguments:
             charBufferNumber (int): The char buffer. Use `FINGERPRINT_CHARBUFFER1` or `FINGERPRINT_CHARBUFFER2`.
-            characteristicsData (list): The characteristics
+            characteristicsData (bytes): The characteristics (bytes, bytearray, memoryview or a sequence of integers like a list or a NumPy array)
+            verify (bool): Download the characteristics again and compare them
 
         Returns:
-            True if everything is right.
+            True if everything is right (always True without verification).
 
         Raises:
             ValueError: if passed char buffer or characteristics are invalid
@@ -1385,11 +2695,61 @@ class PyFingerprint(object):
         if ( charBufferNumber != FINGERPRINT_CHARBUFFER1 and charBufferNumber != FINGERPRINT_CHARBUFFER2 ):
             raise ValueError('The given char buffer number is invalid!')
 
-        if ( characteristicsData == [0] ):
+        try:
+            if ( isinstance(characteristicsData, (bytes, bytearray, memoryview)) ):
+                characteristicsData = bytearray(characteristicsData)
+
+            ## A sequence of integers (e.g. a list or a NumPy array of any integer type)
+            else:
+                characteristicsData = bytearray(list(characteristicsData))
+
+        except (TypeError, ValueError):
+            raise ValueError('The given characteristics data is invalid!')
+
+        ## The default value [0] means that no characteristics were given
+        if ( len(characteristicsData) == 0 or (len(characteristicsData) == 1 and characteristicsData[0] == 0) ):
             raise ValueError('The characteristics data is required!')
 
         maxPacketSize = self.getMaxPacketSize()
 
+        self.uploadEncodedCharacteristics(charBufferNumber, encodeDataPackets(self.__address, characteristicsData, maxPacketSize))
+
+        if ( verify == False ):
+            return True
+
+        ## Verify uploaded characteristics
+        characterics = self.downloadCharacteristics(charBufferNumber, asBytes = True)
+        return (bytearray(characterics) == characteristicsData)
+
+    @synchronized
+    def uploadEncodedCharacteristics(self, charBufferNumber, encodedPackets):
+        """
+        Uploads finger characteristics which were already encoded with `encodeDataPackets()` to specified char buffer.
+
+        The packets must be encoded with the address and the maximum packet size of this sensor.
+
+        Arguments:
+            charBufferNumber (int): The char buffer. Use `FINGERPRINT_CHARBUFFER1` or `FINGERPRINT_CHARBUFFER2`.
+            encodedPackets (list): The encoded data packets
+
+        Returns:
+            True if successful.
+
+        Raises:
+            ValueError: if passed char buffer or packets are invalid
+            Exception: if any error occurs
+        """
+
+        if ( charBufferNumber != FINGERPRINT_CHARBUFFER1 and charBufferNumber != FINGERPRINT_CHARBUFFER2 ):
+            raise ValueError('The given char buffer number is invalid!')
+
+        if ( len(encodedPackets) == 0 ):
+            raise ValueError('The characteristics data is required!')
+
+        for packet in encodedPackets:
+            if ( struct.unpack('>I', bytes(packet[2:6]))[0] != self.__address ):
+                raise ValueError('The given packets are encoded for an other address!')
+
         ## Upload command
 
         packetPayload = (
@@ -1422,26 +2782,10 @@ class PyFingerprint(object):
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
         ## Upload data packets
-        packetNumber = int(len(characteristicsData) / maxPacketSize)
-
-        if ( packetNumber <= 1 ):
-            self.__writePacket(FINGERPRINT_ENDDATAPACKET, characteristicsData)
-        else:
-            i = 1
-            while ( i < packetNumber ):
-                lfrom = (i-1) * maxPacketSize
-                lto = lfrom + maxPacketSize
-                self.__writePacket(FINGERPRINT_DATAPACKET, characteristicsData[lfrom:lto])
-                i += 1
-
-            lfrom = (i-1) * maxPacketSize
-            lto = len(characteristicsData)
-            self.__writePacket(FINGERPRINT_ENDDATAPACKET, characteristicsData[lfrom:lto])
-
-        ## Verify uploaded characteristics
-        characterics = self.downloadCharacteristics(charBufferNumber)
-        return (characterics == characteristicsData)
+        self.__writeEncodedPackets(encodedPackets)
+        return True
 
+    @synchronized
     def generateRandomNumber(self):
         """
         Generates a random 32-bit decimal number.
@@ -1484,16 +2828,17 @@ class PyFingerprint(object):
         number = number | self.__leftShift(receivedPacketPayload[4], 0)
         return number
 
-    def downloadCharacteristics(self, charBufferNumber = FINGERPRINT_CHARBUFFER1):
+    @synchronized
+    def downloadCharacteristics(self, charBufferNumber = FINGERPRINT_CHARBUFFER1, asBytes = False):
         """
         Downloads the finger characteristics from the specified char buffer.
 
         Arguments:
             charBufferNumber (int): The char buffer. Use `FINGERPRINT_CHARBUFFER1` or `FINGERPRINT_CHARBUFFER2`.
-            characteristicsData (list): The characteristics
+            asBytes (bool): Return the characteristics as bytes instead of a list of integers
 
         Returns:
-            The characteristics (list).
+            The characteristics (list or bytes).
 
         Raises:
             ValueError: if passed char buffer is invalid
@@ -1532,7 +2877,7 @@ class PyFingerprint(object):
         else:
             raise Exception('Unknown error '+ hex(receivedPacketPayload[0]))
 
-        completePayload = []
+        completePayload = bytearray()
 
         ## Get follow-up data packets until the last data packet is received
         while ( receivedPacketType != FINGERPRINT_ENDDATAPACKET ):
@@ -1545,7 +2890,9 @@ class PyFingerprint(object):
             if ( receivedPacketType != FINGERPRINT_DATAPACKET and receivedPacketType != FINGERPRINT_ENDDATAPACKET ):
                 raise Exception('The received packet is no data packet!')
 
-            for i in range(0, len(receivedPacketPayload)):
-                completePayload.append(receivedPacketPayload[i])
+            completePayload.extend(receivedPacketPayload)
+
+        if ( asBytes == True ):
+            return bytes(completePayload)
 
-        return completePayload
+        return list(completePayload)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+from .imagecodec import IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_PACKED_SIZE, isNumpyArray, getPixels, unpackImage
+
+
+## Standard deviation of the pixels of a block which contains ridges (below it is background)
+QUALITY_FOREGROUND_THRESHOLD = 10.0
+
+## Standard deviation of the pixels of a block which is considered as full contrast
+QUALITY_FULL_CONTRAST = 80.0
+
+
+def getImageArray(image):
+    """
+    Converts an image to a NumPy array (NumPy is required).
+
+    Arguments:
+        image (object): A packed image with 36864 bytes (see `PyFingerprint.downloadPackedImage()`), a PIL image, a NumPy array or bytes with 256x288 pixels
+
+    Returns:
+        The pixels (NumPy array of float32) with the shape (288, 256).
+
+    Raises:
+        ValueError: if the image is invalid
+    """
+
+    import numpy
+
+    if ( isinstance(image, (bytes, bytearray)) and len(image) == IMAGE_PACKED_SIZE ):
+        pixels = unpackImage(image)
+
+    elif ( isNumpyArray(image) ):
+        return numpy.asarray(image, dtype = numpy.float32).reshape((IMAGE_HEIGHT, IMAGE_WIDTH))
+
+    else:
+        pixels = getPixels(image)
+
+    return numpy.frombuffer(bytes(pixels), dtype = numpy.uint8).astype(numpy.float32).reshape((IMAGE_HEIGHT, IMAGE_WIDTH))
+
+def getBlocks(pixels, blockSize):
+    """
+    Splits an image into square blocks (without copying). Remaining rows and columns are ignored.
+
+    Arguments:
+        pixels (NumPy array): The image with two dimensions
+        blockSize (int): The width and height of a block
+
+    Returns:
+        The blocks (NumPy array) with the shape (rows, columns, blockSize, blockSize).
+    """
+
+    rows = pixels.shape[0] // blockSize
+    columns = pixels.shape[1] // blockSize
+
+    return pixels[:rows * blockSize, :columns * blockSize].reshape((rows, blockSize, columns, blockSize)).swapaxes(1, 2)
+
+def getRidgeClarity(pixels, blockSize = 16):
+    """
+    Gets how clearly ridges and valleys run in one direction within each block.
+
+    The clarity is the coherence of the gradients (0 for noise, 1 for perfectly parallel ridges).
+
+    Arguments:
+        pixels (NumPy array): The image with two dimensions
+        blockSize (int): The width and height of a block
+
+    Returns:
+        The clarity of every block (NumPy array).
+    """
+
+    import numpy
+
+    (gradientY, gradientX) = numpy.gradient(pixels)
+
+    gxx = getBlocks(gradientX * gradientX, blockSize).sum(axis = (2, 3))
+    gyy = getBlocks(gradientY * gradientY, blockSize).sum(axis = (2, 3))
+    gxy = getBlocks(gradientX * gradientY, blockSize).sum(axis = (2, 3))
+
+    return numpy.sqrt((gxx - gyy) ** 2 + 4 * gxy ** 2) / numpy.maximum(gxx + gyy, 1e-6)
+
+def scoreImageQuality(image, blockSize = 16):
+    """
+    Scores the quality of a fingerprint image on the host (NumPy is required).
+
+    Arguments:
+        image (object): A packed image with 36864 bytes (see `PyFingerprint.downloadPackedImage()`), a PIL image, a NumPy array or bytes with 256x288 pixels
+        blockSize (int): The width and height of the analyzed blocks
+
+    Returns:
+        A tuple that contain the following information (each between 0 and 1):
+        0: float The contrast of the foreground.
+        1: float The part of the image covered by the finger (foreground).
+        2: float The clarity of the ridges and valleys of the foreground.
+
+    Raises:
+        ValueError: if the image is invalid
+    """
+
+    return checkImageQuality(image, 0.0, 0.0, 0.0, blockSize)[1]
+
+def checkImageQuality(image, minContrast = 0.2, minCoverage = 0.3, minClarity = 0.4, blockSize = 16):
+    """
+    Checks if an image is good enough to be converted (see `PyFingerprint.convertImage()`).
+
+    Obviously bad images (e.g. no or a small finger) are rejected without computing the ridge
+    clarity. Rejected images should be scanned again.
+
+    Note: Downloading an image takes several seconds at 57600 baud, which is much longer than a
+    failed `convertImage()`. The check pays off if the image is downloaded anyway (e.g. for an
+    archive) or at higher baud rates.
+
+    Arguments:
+        image (object): A packed image with 36864 bytes (see `PyFingerprint.downloadPackedImage()`), a PIL image, a NumPy array or bytes with 256x288 pixels
+        minContrast (float): The minimum contrast
+        minCoverage (float): The minimum part of the image covered by the finger
+        minClarity (float): The minimum clarity of the ridges and valleys
+        blockSize (int): The width and height of the analyzed blocks
+
+    Returns:
+        A tuple that contain the following information:
+        0: bool True if the image is good enough or False otherwise.
+        1: tuple The scores (see `scoreImageQuality()`). The clarity is 0 if it was not computed.
+
+    Raises:
+        ValueError: if the image is invalid
+    """
+
+    pixels = getImageArray(image)
+
+    blockDeviations = getBlocks(pixels, blockSize).std(axis = (2, 3))
+    foreground = blockDeviations > QUALITY_FOREGROUND_THRESHOLD
+
+    coverage = float(foreground.mean())
+
+    if ( coverage == 0.0 ):
+        return (False, (0.0, 0.0, 0.0))
+
+    contrast = min(1.0, float(blockDeviations[foreground].mean()) / QUALITY_FULL_CONTRAST)
+
+    ## Fast path: no need to analyze the ridges
+    if ( coverage < minCoverage or contrast < minContrast ):
+        return (False, (contrast, coverage, 0.0))
+
+    clarity = float(getRidgeClarity(pixels, blockSize)[foreground].mean())
+
+    return (clarity >= minClarity, (contrast, coverage, clarity))
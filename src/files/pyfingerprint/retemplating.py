@@ -0,0 +1,505 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import collections
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+from .imagecodec import IMAGE_SIZE, IMAGE_PACKED_SIZE, packImage
+from .pyfingerprint import FINGERPRINT_CHARBUFFER1, FINGERPRINT_CHARBUFFER2, PacketChecksumError, PacketTimeoutError
+
+
+## File extensions which are considered as images
+IMAGE_EXTENSIONS = ('.bmp', '.png', '.jpg', '.jpeg', '.tif', '.tiff', '.pgm', '.gif')
+
+## Signatures of the encoded image formats (BMP, PNG, JPEG, GIF, TIFF and PGM)
+IMAGE_SIGNATURES = (b'BM', b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff', b'GIF87a', b'GIF89a', b'II*\x00', b'MM\x00*', b'P2', b'P5')
+
+## Errors of the connection to a sensor (a worker is retired after repeated errors)
+TRANSPORT_ERRORS = (PacketChecksumError, PacketTimeoutError, IOError, OSError)
+
+
+def isImageFile(fileName):
+    """
+    Checks if a file name has an image extension.
+
+    Arguments:
+        fileName (str): The file name
+
+    Returns:
+        True if it is an image or False otherwise.
+    """
+
+    return os.path.splitext(fileName)[1].lower() in IMAGE_EXTENSIONS
+
+def iterateImageFiles(imageSource):
+    """
+    Iterates over the encoded images of a directory, a ZIP or a TAR archive.
+
+    Arguments:
+        imageSource (str): Path to the directory or archive
+
+    Returns:
+        A generator of tuples that contain the following information:
+        0: str The name of the image.
+        1: bytes The encoded image (e.g. PNG).
+
+    Raises:
+        ValueError: if the source is neither a directory nor an archive
+    """
+
+    if ( os.path.isdir(imageSource) ):
+        for fileName in sorted(os.listdir(imageSource)):
+            if ( isImageFile(fileName) ):
+                with open(os.path.join(imageSource, fileName), 'rb') as imageFile:
+                    yield (fileName, imageFile.read())
+
+    elif ( zipfile.is_zipfile(imageSource) ):
+        with zipfile.ZipFile(imageSource) as archive:
+            for fileName in sorted(archive.namelist()):
+                if ( isImageFile(fileName) ):
+                    yield (fileName, archive.read(fileName))
+
+    elif ( tarfile.is_tarfile(imageSource) ):
+        with tarfile.open(imageSource) as archive:
+            for member in archive:
+                if ( member.isfile() and isImageFile(member.name) ):
+                    yield (member.name, archive.extractfile(member).read())
+
+    else:
+        raise ValueError('The given image source "' + imageSource + '" is no directory or archive!')
+
+def decodeImage(image):
+    """
+    Decodes and packs an image to be uploaded to the sensor.
+
+    Arguments:
+        image (object): Encoded image (bytes), a PIL image, a NumPy array, bytes with 256x288 pixels or an already packed image
+
+    Returns:
+        The packed image (bytes).
+
+    Raises:
+        ValueError: if the image is invalid
+    """
+
+    if ( isinstance(image, bytes) ):
+        ## An encoded image file is recognized by its signature, because its size can be the size of a raw image
+        if ( image.startswith(IMAGE_SIGNATURES) ):
+            from PIL import Image
+
+            try:
+                return packImage(Image.open(io.BytesIO(image)))
+
+            except IOError:
+                ## Raw pixels which start like a signature by chance
+                if ( len(image) not in (IMAGE_SIZE, IMAGE_PACKED_SIZE) ):
+                    raise
+
+        if ( len(image) == IMAGE_PACKED_SIZE ):
+            return image
+
+        ## Other encoded image files (e.g. without a known signature) are decoded with PIL as well
+        if ( len(image) != IMAGE_SIZE ):
+            from PIL import Image
+            image = Image.open(io.BytesIO(image))
+
+    return packImage(image)
+
+
+class RetemplatingStatistics(object):
+    """
+    Progress and throughput of a `RetemplatingPipeline` run.
+
+    """
+    processedCount = 0
+    failedCount = 0
+    startTime = None
+    endTime = None
+
+    def __init__(self):
+        self.startTime = time.time()
+
+    def getElapsedTime(self):
+        """
+        Gets the duration of the run so far.
+
+        Returns:
+            The duration in seconds (float).
+        """
+
+        endTime = self.endTime if self.endTime is not None else time.time()
+        return endTime - self.startTime
+
+    def getThroughput(self):
+        """
+        Gets the number of processed images per second.
+
+        Returns:
+            The throughput (float).
+        """
+
+        elapsedTime = self.getElapsedTime()
+
+        if ( elapsedTime <= 0 ):
+            return 0.0
+
+        return (self.processedCount + self.failedCount) / elapsedTime
+
+
+class RetemplatingQueue(object):
+    """
+    Internally used by `RetemplatingPipeline` to hand the decoded images from the producer to the workers.
+
+    Unlike `queue.Queue` an image can be put back by a failing worker (even if the queue is full),
+    and the producer stops as soon as all workers are retired.
+
+    """
+    __condition = None
+    __images = None
+    __maxSize = 0
+    __workerCount = 0
+    __takenCount = 0
+    __finished = False
+
+    def __init__(self, maxSize, workerCount):
+        """
+        Constructor
+
+        Arguments:
+            maxSize (int): The maximum number of images put by the producer
+            workerCount (int): The number of workers
+        """
+
+        self.__condition = threading.Condition(threading.Lock())
+        self.__images = collections.deque()
+        self.__maxSize = maxSize
+        self.__workerCount = workerCount
+
+    def put(self, item):
+        """
+        Waits until the queue is not full and appends an image.
+
+        Arguments:
+            item (tuple): The name and the packed image
+
+        Returns:
+            True if the image was appended or False if all workers are retired.
+        """
+
+        with self.__condition:
+            while ( self.__workerCount > 0 and len(self.__images) >= self.__maxSize ):
+                self.__condition.wait()
+
+            if ( self.__workerCount == 0 ):
+                return False
+
+            self.__images.append(item)
+            self.__condition.notify_all()
+
+            return True
+
+    def putBack(self, item):
+        """
+        Puts back a taken image which could not be processed, so it is taken next.
+
+        Arguments:
+            item (tuple): The name and the packed image
+        """
+
+        with self.__condition:
+            self.__images.appendleft(item)
+            self.__takenCount -= 1
+            self.__condition.notify_all()
+
+    def taskDone(self):
+        """
+        Tells that a taken image is processed (successfully or not).
+
+        """
+
+        with self.__condition:
+            self.__takenCount -= 1
+            self.__condition.notify_all()
+
+    def get(self):
+        """
+        Waits for the next image.
+
+        Returns:
+            The name and the packed image (tuple) or None if all images are processed.
+        """
+
+        with self.__condition:
+            ## A taken image may still be put back by its worker
+            while ( len(self.__images) == 0 and (self.__finished == False or self.__takenCount > 0) ):
+                self.__condition.wait()
+
+            if ( len(self.__images) == 0 ):
+                return None
+
+            item = self.__images.popleft()
+            self.__takenCount += 1
+            self.__condition.notify_all()
+
+            return item
+
+    def finish(self):
+        """
+        Tells the workers that no further images are put.
+
+        """
+
+        with self.__condition:
+            self.__finished = True
+            self.__condition.notify_all()
+
+    def retireWorker(self):
+        """
+        Removes a worker (e.g. because its sensor fails repeatedly).
+
+        Returns:
+            The number of remaining workers (int).
+        """
+
+        with self.__condition:
+            self.__workerCount -= 1
+            self.__condition.notify_all()
+
+            return self.__workerCount
+
+
+class RetemplatingPipeline(object):
+    """
+    Regenerates templates from archived images on one or more sensors.
+
+    A producer thread decodes and packs the next images while the sensors upload and convert
+    the current ones. Every sensor is driven by its own worker thread which takes the next
+    image from a shared bounded queue, so faster sensors process more images.
+
+    If a sensor fails with a transport error (see `TRANSPORT_ERRORS`), the image is put back for
+    the next worker. After `maxTransportErrors` consecutive transport errors the worker of the
+    sensor is retired, so a dead sensor does not fail the images of the other sensors.
+
+    """
+    __sensors = None
+    __templateStore = None
+    __createTemplate = True
+    __queueSize = 0
+    __maxTransportErrors = 3
+    __progressCallback = None
+
+    def __init__(self, sensors, templateStore, createTemplate = True, queueSize = 8, progressCallback = None, maxTransportErrors = 3):
+        """
+        Constructor
+
+        Arguments:
+            sensors (list): The sensors (PyFingerprint)
+            templateStore (object): Path to a directory or a function called with the image name and the characteristics (bytes)
+            createTemplate (bool): Create a template of the image converted twice (like an enrolled finger) instead of storing the plain characteristics
+            queueSize (int): The maximum number of decoded images waiting for a sensor
+            progressCallback (function): Called with the image name, the exception (or None) and the `RetemplatingStatistics` after every image
+            maxTransportErrors (int): The number of consecutive transport errors after which the worker of a sensor is retired
+
+        Raises:
+            ValueError: if no sensor is given, the queue size or the number of transport errors is invalid
+        """
+
+        if ( len(sensors) == 0 ):
+            raise ValueError('At least one sensor is required!')
+
+        if ( queueSize < 1 ):
+            raise ValueError('The given queue size is invalid!')
+
+        if ( maxTransportErrors < 1 ):
+            raise ValueError('The given number of transport errors is invalid!')
+
+        ## Store the templates as files in the given directory
+        if ( isinstance(templateStore, str) ):
+            templateDirectory = templateStore
+
+            def templateStore(imageName, characteristics):
+                templateName = os.path.splitext(os.path.basename(imageName))[0] + '.bin'
+
+                with open(os.path.join(templateDirectory, templateName), 'wb') as templateFile:
+                    templateFile.write(characteristics)
+
+        self.__sensors = list(sensors)
+        self.__templateStore = templateStore
+        self.__createTemplate = createTemplate
+        self.__queueSize = queueSize
+        self.__maxTransportErrors = maxTransportErrors
+        self.__progressCallback = progressCallback
+
+    def __produce(self, images, imageQueue, statistics, lock, errors):
+        """
+        Decodes the images and puts them into the queue.
+
+        Arguments:
+            images (iterable): Tuples of image name and image
+            imageQueue (RetemplatingQueue): The queue
+            statistics (RetemplatingStatistics): The statistics
+            lock (Lock): The lock of the statistics
+            errors (list): The list to append an error of the image source to
+        """
+
+        try:
+            for (imageName, image) in images:
+                try:
+                    packedImage = decodeImage(image)
+
+                except Exception as e:
+                    self.__reportProgress(imageName, e, statistics, lock)
+                    continue
+
+                ## All workers are retired
+                if ( imageQueue.put((imageName, packedImage)) == False ):
+                    break
+
+        ## The image source failed (e.g. the directory does not exist)
+        except Exception as e:
+            errors.append(e)
+
+        finally:
+            ## Tell every worker to stop
+            imageQueue.finish()
+
+    def __work(self, sensor, imageQueue, statistics, lock, errors):
+        """
+        Regenerates the templates of the queued images on one sensor.
+
+        Arguments:
+            sensor (PyFingerprint): The sensor
+            imageQueue (RetemplatingQueue): The queue
+            statistics (RetemplatingStatistics): The statistics
+            lock (Lock): The lock of the statistics
+            errors (list): The list to append the last transport error to if the last worker is retired
+        """
+
+        transportErrorCount = 0
+
+        while ( True ):
+            item = imageQueue.get()
+
+            if ( item is None ):
+                break
+
+            (imageName, packedImage) = item
+
+            try:
+                with sensor.transaction():
+                    sensor.uploadImage(packedImage)
+                    sensor.convertImage(FINGERPRINT_CHARBUFFER1)
+
+                    if ( self.__createTemplate == True ):
+                        sensor.convertImage(FINGERPRINT_CHARBUFFER2)
+
+                        if ( sensor.createTemplate() == False ):
+                            raise Exception('The characteristics do not match')
+
+                    characteristics = sensor.downloadCharacteristics(FINGERPRINT_CHARBUFFER1, asBytes = True)
+
+            ## The image is not at fault: put it back for the next worker
+            except TRANSPORT_ERRORS as e:
+                imageQueue.putBack(item)
+                transportErrorCount += 1
+
+                if ( transportErrorCount >= self.__maxTransportErrors ):
+                    if ( imageQueue.retireWorker() == 0 ):
+                        errors.append(e)
+
+                    break
+
+                continue
+
+            except Exception as e:
+                imageQueue.taskDone()
+                transportErrorCount = 0
+                self.__reportProgress(imageName, e, statistics, lock)
+                continue
+
+            imageQueue.taskDone()
+            transportErrorCount = 0
+
+            try:
+                self.__templateStore(imageName, characteristics)
+
+            except Exception as e:
+                self.__reportProgress(imageName, e, statistics, lock)
+                continue
+
+            self.__reportProgress(imageName, None, statistics, lock)
+
+    def __reportProgress(self, imageName, error, statistics, lock):
+        """
+        Counts a processed image and calls the progress callback.
+
+        Arguments:
+            imageName (str): The name of the image
+            error (Exception): The error or None if successful
+            statistics (RetemplatingStatistics): The statistics
+            lock (Lock): The lock of the statistics
+        """
+
+        with lock:
+            if ( error is None ):
+                statistics.processedCount += 1
+            else:
+                statistics.failedCount += 1
+
+            if ( self.__progressCallback is not None ):
+                self.__progressCallback(imageName, error, statistics)
+
+    def run(self, images):
+        """
+        Regenerates the templates of all given images.
+
+        Arguments:
+            images (object): Path to a directory or archive (see `iterateImageFiles()`) or an iterable of tuples of image name and image
+
+        Returns:
+            The statistics (RetemplatingStatistics).
+
+        Raises:
+            ValueError: if the image source is neither a directory nor an archive
+            Exception: if the image source failed or all sensors were retired because of transport errors
+        """
+
+        if ( isinstance(images, str) ):
+            images = iterateImageFiles(images)
+
+        statistics = RetemplatingStatistics()
+        lock = threading.Lock()
+        imageQueue = RetemplatingQueue(self.__queueSize, len(self.__sensors))
+        errors = []
+
+        threads = [threading.Thread(target = self.__produce, args = (images, imageQueue, statistics, lock, errors))]
+
+        for sensor in self.__sensors:
+            threads.append(threading.Thread(target = self.__work, args = (sensor, imageQueue, statistics, lock, errors)))
+
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        statistics.endTime = time.time()
+
+        ## Raise the error of the image source or of the last retired worker
+        if ( len(errors) > 0 ):
+            raise errors[0]
+
+        return statistics
@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import struct
+import threading
+import time
+
+from .imagecodec import IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_SIZE, IMAGE_PACKED_SIZE, UNPACK_HIGH_TABLE, UNPACK_LOW_TABLE, getPixels
+
+
+## Magic bytes of the shared memory
+RING_MAGIC = b'PFRB'
+
+## Version of the layout
+RING_VERSION = 1
+
+## Header: magic (4 bytes), version (4 bytes), number of slots (4 bytes), number of written images (8 bytes)
+RING_HEADER_FORMAT = '<4sIIQ'
+RING_HEADER_SIZE = 64
+
+## Position of the number of written images in the header
+RING_WRITECOUNT_OFFSET = 12
+
+## Slot header: sequence (8 bytes) and capture time (8 bytes) followed by the pixels (8 bits per pixel)
+RING_SLOT_HEADER_SIZE = 64
+RING_SLOT_SIZE = RING_SLOT_HEADER_SIZE + IMAGE_SIZE
+
+## Serializes the suppression of the resource tracker registration
+trackerLock = threading.Lock()
+
+
+def openSharedMemory(name = None, size = 0):
+    """
+    Creates or attaches to a shared memory block (Python 3.8 or newer).
+
+    Arguments:
+        name (str): The name of an existing block or None to create a new one
+        size (int): The size of a new block
+
+    Returns:
+        The shared memory (SharedMemory).
+
+    Raises:
+        Exception: if shared memory is not supported
+    """
+
+    try:
+        from multiprocessing import shared_memory
+
+    except ImportError:
+        raise Exception('The shared memory ring buffer requires Python 3.8 or newer!')
+
+    if ( name is None ):
+        return shared_memory.SharedMemory(create = True, size = size)
+
+    ## The block is owned by the writer and must not be removed when a reader exits
+    try:
+        return shared_memory.SharedMemory(name = name, track = False)
+
+    except TypeError:
+        pass
+
+    ## Older versions always register the block at the resource tracker, which removes it
+    ## when the reader exits: suppress the registration while attaching
+    try:
+        from multiprocessing import resource_tracker
+
+    except ImportError:
+        return shared_memory.SharedMemory(name = name)
+
+    with trackerLock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+
+        try:
+            return shared_memory.SharedMemory(name = name)
+
+        finally:
+            resource_tracker.register = register
+
+def getSlotOffset(slotCount, imageNumber):
+    """
+    Gets the position of the slot of an image.
+
+    Arguments:
+        slotCount (int): The number of slots
+        imageNumber (int): The number of the image
+
+    Returns:
+        The position in the shared memory (int).
+    """
+
+    return RING_HEADER_SIZE + (imageNumber % slotCount) * RING_SLOT_SIZE
+
+
+class ImageRingBuffer(object):
+    """
+    Hands downloaded images over to other processes through shared memory.
+
+    The shared memory contains a fixed number of slots with 256x288 pixels (8 bits per
+    pixel). Every image gets the next number and overwrites the slot of the oldest image.
+    The pixels are written only once, directly from the packed image of the sensor, and
+    readers (see `ImageRingReader`) access them without pickling or file I/O. While a slot
+    is written its sequence is odd, so readers detect incomplete and overwritten images.
+
+    There must be only one writer. The ring buffer requires Python 3.8 or newer.
+
+    Example:
+        ringBuffer = ImageRingBuffer(slotCount = 16)
+        ## Pass ringBuffer.getName() to the consumer processes
+
+        while ( f.readImage() == False ):
+            pass
+
+        ringBuffer.downloadImage(f)
+
+    """
+    __sharedMemory = None
+    __slotCount = 0
+    __writeCount = 0
+
+    def __init__(self, slotCount = 8):
+        """
+        Constructor
+
+        Arguments:
+            slotCount (int): The number of images kept in the ring buffer
+
+        Raises:
+            ValueError: if the number of slots is invalid
+            Exception: if shared memory is not supported
+        """
+
+        if ( slotCount < 1 ):
+            raise ValueError('The given number of slots is invalid!')
+
+        self.__slotCount = slotCount
+        self.__sharedMemory = openSharedMemory(size = RING_HEADER_SIZE + slotCount * RING_SLOT_SIZE)
+
+        struct.pack_into(RING_HEADER_FORMAT, self.__sharedMemory.buf, 0, RING_MAGIC, RING_VERSION, slotCount, 0)
+
+    def getName(self):
+        """
+        Gets the name of the shared memory which is used by the readers.
+
+        Returns:
+            The name (str).
+        """
+
+        return self.__sharedMemory.name
+
+    def getWriteCount(self):
+        """
+        Gets the number of written images.
+
+        Returns:
+            The number of images (int).
+        """
+
+        return self.__writeCount
+
+    def writeImage(self, image, captureTime = None):
+        """
+        Writes an image into the next slot.
+
+        Arguments:
+            image (object): A packed image with 36864 bytes (see `PyFingerprint.downloadPackedImage()`), a PIL image, a NumPy array or bytes with 256x288 pixels
+            captureTime (float): The capture time in seconds since the epoch or None for the current time
+
+        Returns:
+            The number of the image (int).
+
+        Raises:
+            ValueError: if the image is invalid
+        """
+
+        if ( captureTime is None ):
+            captureTime = time.time()
+
+        buffer = self.__sharedMemory.buf
+        imageNumber = self.__writeCount
+        offset = getSlotOffset(self.__slotCount, imageNumber)
+        pixelOffset = offset + RING_SLOT_HEADER_SIZE
+
+        ## Mark the slot as being written
+        struct.pack_into('<Qd', buffer, offset, 2 * imageNumber + 1, captureTime)
+
+        ## Unpack a packed image directly into the slot
+        if ( isinstance(image, (bytes, bytearray)) and len(image) == IMAGE_PACKED_SIZE ):
+            packedImage = bytes(image)
+            buffer[pixelOffset:pixelOffset + IMAGE_SIZE:2] = packedImage.translate(UNPACK_HIGH_TABLE)
+            buffer[pixelOffset + 1:pixelOffset + IMAGE_SIZE:2] = packedImage.translate(UNPACK_LOW_TABLE)
+
+        else:
+            buffer[pixelOffset:pixelOffset + IMAGE_SIZE] = getPixels(image)
+
+        ## Mark the slot as complete and publish the image
+        struct.pack_into('<Q', buffer, offset, 2 * imageNumber + 2)
+
+        self.__writeCount = imageNumber + 1
+        struct.pack_into('<Q', buffer, RING_WRITECOUNT_OFFSET, self.__writeCount)
+
+        return imageNumber
+
+    def downloadImage(self, fingerprint):
+        """
+        Downloads the image from the image buffer of a sensor into the next slot.
+
+        Arguments:
+            fingerprint (PyFingerprint): The sensor
+
+        Returns:
+            The number of the image (int).
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        return self.writeImage(fingerprint.downloadPackedImage())
+
+    def close(self, unlink = True):
+        """
+        Closes the shared memory.
+
+        Arguments:
+            unlink (bool): Remove the shared memory (the readers can not attach anymore)
+        """
+
+        self.__sharedMemory.close()
+
+        if ( unlink == True ):
+            self.__sharedMemory.unlink()
+
+
+class ImageRingReader(object):
+    """
+    Reads the images of an `ImageRingBuffer` in another process.
+
+    Every reader has its own cursor (the number of the next image). If the writer is faster
+    than the reader, the overwritten images are skipped and counted as lost.
+
+    Images can be read zero-copy (`copy = False`). A zero-copy image is only valid until its
+    slot is overwritten: check it with `isImageValid()` after processing and release all
+    views before `close()`.
+
+    """
+    __sharedMemory = None
+    __slotCount = 0
+    __cursor = 0
+    __lostCount = 0
+    __pollInterval = 0.001
+
+    def __init__(self, name, startAtOldest = False, pollInterval = 0.001):
+        """
+        Constructor
+
+        Arguments:
+            name (str): The name of the shared memory (see `ImageRingBuffer.getName()`)
+            startAtOldest (bool): Start with the oldest image in the ring buffer instead of the next written image
+            pollInterval (float): The time in seconds between checks for new images
+
+        Raises:
+            Exception: if the shared memory is no image ring buffer
+        """
+
+        self.__sharedMemory = openSharedMemory(name)
+        self.__pollInterval = pollInterval
+
+        (magic, version, slotCount, writeCount) = struct.unpack_from(RING_HEADER_FORMAT, self.__sharedMemory.buf, 0)
+
+        if ( magic != RING_MAGIC or version != RING_VERSION ):
+            self.__sharedMemory.close()
+            raise Exception('The shared memory is no image ring buffer!')
+
+        self.__slotCount = slotCount
+
+        if ( startAtOldest == True ):
+            self.__cursor = max(0, writeCount - slotCount)
+        else:
+            self.__cursor = writeCount
+
+    def getLostCount(self):
+        """
+        Gets the number of images which were overwritten before they were read.
+
+        Returns:
+            The number of images (int).
+        """
+
+        return self.__lostCount
+
+    def getCursor(self):
+        """
+        Gets the number of the next image to read.
+
+        Returns:
+            The number of the image (int).
+        """
+
+        return self.__cursor
+
+    def isImageValid(self, imageNumber):
+        """
+        Checks if an image is still in its slot (i.e. a zero-copy image was not overwritten).
+
+        Arguments:
+            imageNumber (int): The number of the image
+
+        Returns:
+            True if the image is valid or False otherwise.
+        """
+
+        offset = getSlotOffset(self.__slotCount, imageNumber)
+        return struct.unpack_from('<Q', self.__sharedMemory.buf, offset)[0] == 2 * imageNumber + 2
+
+    def readImage(self, timeout = None, copy = True, asNumpy = False):
+        """
+        Reads the next image and waits for it if necessary.
+
+        Arguments:
+            timeout (float): The maximum time in seconds to wait or None to wait forever
+            copy (bool): Copy the pixels out of the shared memory
+            asNumpy (bool): Return the pixels as NumPy array with the shape (288, 256)
+
+        Returns:
+            A tuple that contain the following information or None if no image was written in time:
+            0: integer The number of the image.
+            1: float The capture time in seconds since the epoch.
+            2: bytes The pixels row by row (a memoryview if not copied) or a NumPy array.
+        """
+
+        buffer = self.__sharedMemory.buf
+
+        if ( timeout is not None ):
+            timeoutTime = time.time() + timeout
+
+        while ( True ):
+            writeCount = struct.unpack_from('<Q', buffer, RING_WRITECOUNT_OFFSET)[0]
+
+            if ( writeCount <= self.__cursor ):
+                if ( timeout is not None and time.time() >= timeoutTime ):
+                    return None
+
+                time.sleep(self.__pollInterval)
+                continue
+
+            ## The oldest unread images were already overwritten
+            if ( writeCount - self.__cursor > self.__slotCount ):
+                self.__lostCount += writeCount - self.__slotCount - self.__cursor
+                self.__cursor = writeCount - self.__slotCount
+
+            imageNumber = self.__cursor
+            offset = getSlotOffset(self.__slotCount, imageNumber)
+            pixelOffset = offset + RING_SLOT_HEADER_SIZE
+
+            (sequence, captureTime) = struct.unpack_from('<Qd', buffer, offset)
+
+            if ( sequence == 2 * imageNumber + 2 ):
+                if ( asNumpy == True ):
+                    import numpy
+                    pixels = numpy.frombuffer(buffer, dtype = numpy.uint8, count = IMAGE_SIZE, offset = pixelOffset).reshape((IMAGE_HEIGHT, IMAGE_WIDTH))
+
+                    if ( copy == True ):
+                        pixels = pixels.copy()
+
+                elif ( copy == True ):
+                    pixels = bytes(buffer[pixelOffset:pixelOffset + IMAGE_SIZE])
+
+                else:
+                    pixels = buffer[pixelOffset:pixelOffset + IMAGE_SIZE]
+
+                ## The copied image is only consistent if the slot was not overwritten meanwhile
+                if ( copy == False or self.isImageValid(imageNumber) == True ):
+                    self.__cursor += 1
+                    return (imageNumber, captureTime, pixels)
+
+            ## The image was overwritten before or while it was read
+            self.__lostCount += 1
+            self.__cursor += 1
+
+    def close(self):
+        """
+        Detaches from the shared memory (all zero-copy images must be released before).
+
+        """
+
+        self.__sharedMemory.close()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import contextlib
+import threading
+import time
+
+
+## Operation priorities (lower values are served first)
+##
+
+SCHEDULER_PRIORITY_INTERACTIVE = 0
+"""
+Operations of identifications and enrollments which a user is waiting for
+"""
+
+SCHEDULER_PRIORITY_SHORT = 1
+"""
+Operations which need a single round trip
+"""
+
+SCHEDULER_PRIORITY_LONG = 2
+"""
+Operations which transfer data packets and block the line for a long time
+"""
+
+SCHEDULER_PRIORITY_MAINTENANCE = 3
+"""
+Background operations (e.g. backups, occupancy polling or image archival)
+"""
+
+## Methods of PyFingerprint which are part of identifications and enrollments
+SCHEDULER_INTERACTIVE_OPERATIONS = (
+    'readImage',
+    'convertImage',
+    'searchTemplate',
+    'createTemplate',
+    'storeTemplate',
+    'loadTemplate',
+    'compareCharacteristics',
+)
+
+## Methods of PyFingerprint which transfer data packets
+SCHEDULER_LONG_OPERATIONS = (
+    'uploadImage',
+    'uploadCharacteristics',
+    'uploadEncodedCharacteristics',
+    'downloadCharacteristics',
+)
+
+## Methods of PyFingerprint which are typically used by background jobs
+SCHEDULER_MAINTENANCE_OPERATIONS = (
+    'downloadImage',
+    'downloadPackedImage',
+    'getTemplateIndex',
+    'compactTemplates',
+    'rebalance',
+)
+
+## Clock of the finger hold (not affected by changes of the system time if available)
+monotonicTime = getattr(time, 'monotonic', time.time)
+
+
+class CommandScheduler(object):
+    """
+    Grants exclusive access to a sensor or a line (e.g. a serial bus shared by several sensors) to one transaction at a time.
+
+    Waiting transactions are granted by priority: interactive operations (identifications and
+    enrollments) first, then other short operations, long transfers and finally maintenance
+    operations, so background jobs do not delay identifications. As every method (and every
+    move of `PyFingerprint.compactTemplates()` and every swap of `TieredSearch.rebalance()`) is
+    a transaction of its own, a running background job is preempted at the next command.
+    A waiting transaction which was passed over `maxDeferrals` times is granted before other
+    short operations and after `2 * maxDeferrals` times like an interactive operation, so
+    even a polling loop of interactive operations cannot delay it forever. Transactions of the
+    same priority are granted in the order of their arrival.
+
+    After `fingerDetected()` long transfers and maintenance operations of other threads are
+    held back for `fingerHoldTime` seconds, so the identification of the detected finger is
+    not delayed by a transfer which was granted between its commands. The thread which
+    detected the finger is not held back (e.g. to download the characteristics for an
+    identification on an other sensor). `PyFingerprint.readImage()` calls it automatically.
+
+    The scheduler is reentrant: a thread which owns the line can acquire it again.
+
+    Use it with `PyFingerprint.setScheduler()` (one scheduler per sensor or per bus).
+
+    """
+    __condition = None
+    __owner = None
+    __depth = 0
+    __waiters = None
+    __sequence = 0
+    __maxDeferrals = 4
+    __priorities = None
+    __fingerHoldTime = 2.0
+    __holdUntil = None
+    __holdThread = None
+
+    def __init__(self, maxDeferrals = 4, fingerHoldTime = 2.0):
+        """
+        Constructor
+
+        Arguments:
+            maxDeferrals (int): How often a waiting transaction can be passed over
+            fingerHoldTime (float): The time in seconds to hold back long operations after a finger was detected
+
+        Raises:
+            ValueError: if the number of deferrals or the hold time is invalid
+        """
+
+        if ( maxDeferrals < 0 ):
+            raise ValueError('The given number of deferrals is invalid!')
+
+        if ( fingerHoldTime < 0 ):
+            raise ValueError('The given hold time is invalid!')
+
+        self.__condition = threading.Condition(threading.Lock())
+        self.__waiters = []
+        self.__maxDeferrals = maxDeferrals
+        self.__fingerHoldTime = fingerHoldTime
+        self.__priorities = {}
+
+        for operation in SCHEDULER_INTERACTIVE_OPERATIONS:
+            self.__priorities[operation] = SCHEDULER_PRIORITY_INTERACTIVE
+
+        for operation in SCHEDULER_LONG_OPERATIONS:
+            self.__priorities[operation] = SCHEDULER_PRIORITY_LONG
+
+        for operation in SCHEDULER_MAINTENANCE_OPERATIONS:
+            self.__priorities[operation] = SCHEDULER_PRIORITY_MAINTENANCE
+
+    def setPriority(self, operation, priority):
+        """
+        Sets the priority of an operation (e.g. of a custom transaction name).
+
+        Arguments:
+            operation (str): The name of the PyFingerprint method or transaction
+            priority (int): The priority. Use one of `SCHEDULER_PRIORITY_*` constants.
+
+        Raises:
+            ValueError: if the priority is invalid
+        """
+
+        if ( priority not in (SCHEDULER_PRIORITY_INTERACTIVE, SCHEDULER_PRIORITY_SHORT, SCHEDULER_PRIORITY_LONG, SCHEDULER_PRIORITY_MAINTENANCE) ):
+            raise ValueError('The given priority is invalid!')
+
+        with self.__condition:
+            self.__priorities[operation] = priority
+
+    def getPriority(self, operation):
+        """
+        Gets the priority of an operation.
+
+        Arguments:
+            operation (str): The name of the PyFingerprint method or None
+
+        Returns:
+            The priority (int). Use one of `SCHEDULER_PRIORITY_*` constants.
+        """
+
+        return self.__priorities.get(operation, SCHEDULER_PRIORITY_SHORT)
+
+    def fingerDetected(self):
+        """
+        Holds back long transfers and maintenance operations of other threads for the finger hold time.
+
+        """
+
+        with self.__condition:
+            self.__holdUntil = monotonicTime() + self.__fingerHoldTime
+            self.__holdThread = threading.current_thread()
+
+    def __getHoldTime(self):
+        """
+        Gets the remaining time of the finger hold.
+
+        Returns:
+            The time in seconds (float) or 0 if nothing is held back.
+        """
+
+        if ( self.__holdUntil is None ):
+            return 0
+
+        holdTime = self.__holdUntil - monotonicTime()
+
+        if ( holdTime <= 0 ):
+            self.__holdUntil = None
+            self.__holdThread = None
+            return 0
+
+        return holdTime
+
+    def __selectWaiter(self):
+        """
+        Selects the waiting transaction which is granted next.
+
+        Returns:
+            The waiter (list) or None if all waiters are held back.
+        """
+
+        def getPriority(waiter):
+            (priority, sequence, thread, deferrals) = waiter
+
+            ## A transaction which was deferred too often is served before other operations
+            if ( deferrals >= 2 * self.__maxDeferrals ):
+                return SCHEDULER_PRIORITY_INTERACTIVE
+
+            if ( deferrals >= self.__maxDeferrals ):
+                return min(priority, SCHEDULER_PRIORITY_SHORT)
+
+            return priority
+
+        waiters = self.__waiters
+
+        if ( self.__getHoldTime() > 0 ):
+            waiters = [waiter for waiter in waiters if waiter[2] is self.__holdThread or getPriority(waiter) < SCHEDULER_PRIORITY_LONG]
+
+        if ( len(waiters) == 0 ):
+            return None
+
+        return min(waiters, key = lambda waiter: (getPriority(waiter), waiter[1]))
+
+    def acquire(self, operation = None, timeout = None):
+        """
+        Waits until the calling thread is granted the line.
+
+        Arguments:
+            operation (str): The name of the PyFingerprint method or None
+            timeout (float): The maximum time in seconds to wait or None to wait forever
+
+        Returns:
+            True if the line was granted or False if the timeout expired.
+        """
+
+        currentThread = threading.current_thread()
+
+        if ( timeout is not None ):
+            timeoutTime = monotonicTime() + timeout
+
+        with self.__condition:
+            if ( self.__owner is currentThread ):
+                self.__depth += 1
+                return True
+
+            waiter = [self.getPriority(operation), self.__sequence, currentThread, 0]
+            self.__sequence += 1
+            self.__waiters.append(waiter)
+
+            try:
+                while ( self.__owner is not None or self.__selectWaiter() is not waiter ):
+
+                    ## Wake up when the finger hold or the timeout expires
+                    waitTime = self.__getHoldTime()
+
+                    if ( timeout is not None ):
+                        remainingTime = timeoutTime - monotonicTime()
+
+                        if ( remainingTime <= 0 ):
+                            ## An other waiter may be next now
+                            self.__waiters.remove(waiter)
+                            self.__condition.notify_all()
+                            return False
+
+                        if ( waitTime <= 0 or remainingTime < waitTime ):
+                            waitTime = remainingTime
+
+                    if ( waitTime > 0 ):
+                        self.__condition.wait(waitTime)
+                    else:
+                        self.__condition.wait()
+
+            except BaseException:
+                ## An other waiter may be next now
+                self.__waiters.remove(waiter)
+                self.__condition.notify_all()
+                raise
+
+            self.__waiters.remove(waiter)
+
+            ## The transactions which arrived earlier were passed over
+            for otherWaiter in self.__waiters:
+                if ( otherWaiter[1] < waiter[1] ):
+                    otherWaiter[3] += 1
+
+            self.__owner = currentThread
+            self.__depth = 1
+
+            return True
+
+    def release(self):
+        """
+        Releases the line.
+
+        Raises:
+            RuntimeError: if the calling thread does not own the line
+        """
+
+        with self.__condition:
+            if ( self.__owner is not threading.current_thread() ):
+                raise RuntimeError('The line is not owned by the calling thread!')
+
+            self.__depth -= 1
+
+            if ( self.__depth == 0 ):
+                self.__owner = None
+                self.__condition.notify_all()
+
+    @contextlib.contextmanager
+    def schedule(self, operation = None):
+        """
+        Context manager which owns the line while executing.
+
+        Arguments:
+            operation (str): The name of the PyFingerprint method or None
+        """
+
+        self.acquire(operation)
+
+        try:
+            yield
+
+        finally:
+            self.release()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import binascii
+import os
+import threading
+
+from .pyfingerprint import FINGERPRINT_CHARBUFFER1, FINGERPRINT_CHARBUFFER2, writeJournalEntry, readJournal
+
+
+class TieredSearch(object):
+    """
+    Searches the most frequently matched templates first.
+
+    The templates which are matched most often are kept in the lowest positions (the "hot tier").
+    A search first looks at the hot tier and only searches the remaining positions if nothing
+    was found there. `rebalance()` moves the templates between the tiers.
+
+    An automatic rebalance (see `rebalanceInterval`) runs in a background thread after the
+    search which triggered it, so its moves do not delay that identification.
+
+    """
+    __fingerprint = None
+    __hotSize = 0
+    __rebalanceInterval = None
+    __relocationCallback = None
+    __errorCallback = None
+    __moveCallback = None
+    __journalPath = None
+    __matchCounts = None
+    __searchCount = 0
+    __rebalanceThread = None
+    __lock = None
+
+    def __init__(self, fingerprint, hotSize, rebalanceInterval = None, relocationCallback = None, errorCallback = None, moveCallback = None, journalPath = None):
+        """
+        Constructor
+
+        Arguments:
+            fingerprint (PyFingerprint): The sensor
+            hotSize (int): The number of positions of the hot tier
+            rebalanceInterval (int): Rebalance automatically after this number of searches (None disables it)
+            relocationCallback (function): Called with the position mapping (dict) after an automatic rebalance
+            errorCallback (function): Called with the exception and the position mapping of the completed moves if an automatic rebalance failed
+            moveCallback (function): Called with the old and the new position right after every move (see `rebalance()`)
+            journalPath (str): Path to a journal of the moves or None (see `rebalance()`)
+
+        Raises:
+            ValueError: if hot tier size or interval is invalid
+        """
+
+        if ( hotSize < 1 ):
+            raise ValueError('The given hot tier size is invalid!')
+
+        if ( rebalanceInterval is not None and rebalanceInterval < 1 ):
+            raise ValueError('The given rebalance interval is invalid!')
+
+        self.__fingerprint = fingerprint
+        self.__hotSize = hotSize
+        self.__rebalanceInterval = rebalanceInterval
+        self.__relocationCallback = relocationCallback
+        self.__errorCallback = errorCallback
+        self.__moveCallback = moveCallback
+        self.__journalPath = journalPath
+        self.__matchCounts = {}
+        self.__lock = threading.Lock()
+
+    def getMatchCounts(self):
+        """
+        Gets the number of matches per position.
+
+        Returns:
+            The counts (dict). Can be restored with `setMatchCounts()`.
+        """
+
+        with self.__lock:
+            return dict(self.__matchCounts)
+
+    def setMatchCounts(self, matchCounts):
+        """
+        Sets the number of matches per position (e.g. saved from an earlier run).
+
+        Arguments:
+            matchCounts (dict): The counts
+        """
+
+        with self.__lock:
+            self.__matchCounts = dict(matchCounts)
+
+    def searchTemplate(self, charBufferNumber = FINGERPRINT_CHARBUFFER1):
+        """
+        Searches the hot tier first and then the remaining positions for the characteristics in char buffer.
+
+        Note: An automatic rebalance is started after the search and overwrites char buffer 2
+        (see `rebalance()`).
+
+        Arguments:
+            charBufferNumber (int): The char buffer. Use `FINGERPRINT_CHARBUFFER1` or `FINGERPRINT_CHARBUFFER2`.
+
+        Returns:
+            A tuple that contain the following information:
+            0: integer(2 bytes) The position number of found template.
+            1: integer(2 bytes) The accuracy score of found template.
+
+        Raises:
+            Exception: if any error occurs
+        """
+
+        fingerprint = self.__fingerprint
+
+        with fingerprint.transaction('searchTemplate'):
+            hotSize = min(self.__hotSize, fingerprint.getStorageCapacity())
+            result = fingerprint.searchTemplate(charBufferNumber, 0, hotSize)
+
+            if ( result[0] < 0 and hotSize < fingerprint.getStorageCapacity() ):
+                result = fingerprint.searchTemplate(charBufferNumber, hotSize)
+
+            with self.__lock:
+                if ( result[0] >= 0 ):
+                    self.__matchCounts[result[0]] = self.__matchCounts.get(result[0], 0) + 1
+
+                self.__searchCount += 1
+                rebalanceNeeded = (self.__rebalanceInterval is not None and self.__searchCount % self.__rebalanceInterval == 0)
+
+                ## Skip it if the previous automatic rebalance is still running
+                if ( rebalanceNeeded == True and (self.__rebalanceThread is None or self.__rebalanceThread.is_alive() == False) ):
+                    self.__rebalanceThread = threading.Thread(target = self.__rebalanceAutomatically)
+                    self.__rebalanceThread.daemon = True
+                    self.__rebalanceThread.start()
+
+        return result
+
+    def waitForRebalance(self, timeout = None):
+        """
+        Waits until a running automatic rebalance is finished (e.g. before shutting down).
+
+        Arguments:
+            timeout (float): The maximum time in seconds to wait or None to wait forever
+
+        Returns:
+            True if no automatic rebalance is running or False if the timeout expired.
+        """
+
+        with self.__lock:
+            rebalanceThread = self.__rebalanceThread
+
+        if ( rebalanceThread is not None ):
+            rebalanceThread.join(timeout)
+            return rebalanceThread.is_alive() == False
+
+        return True
+
+    def __rebalanceAutomatically(self):
+        """
+        Rebalances in the background and calls the relocation or error callback.
+
+        """
+
+        try:
+            positionMapping = self.rebalance()
+
+        except Exception as e:
+            if ( self.__errorCallback is not None ):
+                self.__errorCallback(e, getattr(e, 'positionMapping', {}))
+
+            return
+
+        if ( self.__relocationCallback is not None and len(positionMapping) > 0 ):
+            self.__relocationCallback(positionMapping)
+
+    def __getTemplateIndex(self):
+        """
+        Gets the usage indicators of all positions.
+
+        Returns:
+            The list.
+        """
+
+        fingerprint = self.__fingerprint
+        capacity = fingerprint.getStorageCapacity()
+        templateIndex = []
+
+        for page in range(0, 4):
+            if ( len(templateIndex) >= capacity ):
+                break
+
+            templateIndex.extend(fingerprint.getTemplateIndex(page))
+
+        return templateIndex[:capacity]
+
+    def __isUsed(self, positions):
+        """
+        Gets the usage indicators of the given positions from the sensor.
+
+        Arguments:
+            positions (list): The positions
+
+        Returns:
+            The list of usage indicators (bool).
+        """
+
+        fingerprint = self.__fingerprint
+        templateIndexPages = {}
+
+        for position in positions:
+            if ( position // 256 not in templateIndexPages ):
+                templateIndexPages[position // 256] = fingerprint.getTemplateIndex(position // 256)
+
+        return [templateIndexPages[position // 256][position % 256] for position in positions]
+
+    def __moveTemplate(self, fromPosition, toPosition, journal, positionMapping):
+        """
+        Copies a template to an unused position, deletes the original and reports the move.
+
+        Arguments:
+            fromPosition (int): The current position
+            toPosition (int): The new (unused) position
+            journal (file): The journal file or None
+            positionMapping (dict): The mapping of the old to the new positions to update
+        """
+
+        fingerprint = self.__fingerprint
+
+        fingerprint.loadTemplate(fromPosition, FINGERPRINT_CHARBUFFER2)
+
+        if ( journal is not None ):
+            characteristics = fingerprint.downloadCharacteristics(FINGERPRINT_CHARBUFFER2, asBytes = True)
+
+            writeJournalEntry(journal, {
+                'from': fromPosition,
+                'to': toPosition,
+                'characteristics': binascii.hexlify(characteristics).decode('ascii'),
+            })
+
+        ## The char buffer still contains the loaded template
+        fingerprint.storeTemplate(toPosition, FINGERPRINT_CHARBUFFER2)
+
+        if ( fingerprint.deleteTemplate(fromPosition) == False ):
+            raise Exception('Could not delete template')
+
+        if ( journal is not None ):
+            writeJournalEntry(journal, {'done': fromPosition})
+
+        ## Move the counter along with the template
+        with self.__lock:
+            if ( fromPosition in self.__matchCounts ):
+                self.__matchCounts[toPosition] = self.__matchCounts.pop(fromPosition)
+
+        self.__reportMove(fromPosition, toPosition, positionMapping)
+
+    def __reportMove(self, fromPosition, toPosition, positionMapping):
+        """
+        Records a move and calls the move callback.
+
+        Arguments:
+            fromPosition (int): The old position
+            toPosition (int): The new position
+            positionMapping (dict): The mapping of the old to the new positions to update
+        """
+
+        positionMapping[fromPosition] = toPosition
+
+        if ( self.__moveCallback is not None ):
+            self.__moveCallback(fromPosition, toPosition)
+
+    def __swapTemplates(self, fromPosition, toPosition, freePosition, journal, positionMapping):
+        """
+        Moves a template into the hot tier (within a transaction of its own).
+
+        Arguments:
+            fromPosition (int): The current position of the hot template
+            toPosition (int): The position in the hot tier
+            freePosition (int): The unused position for the cold template at `toPosition` or None if `toPosition` is unused
+            journal (file): The journal file or None
+            positionMapping (dict): The mapping of the old to the new positions to update
+
+        Returns:
+            True if the template was moved or False if the positions changed meanwhile.
+        """
+
+        fingerprint = self.__fingerprint
+
+        with fingerprint.transaction('rebalance'):
+
+            ## An other thread may have changed the templates since the moves were planned
+            if ( freePosition is None ):
+                if ( self.__isUsed([fromPosition, toPosition]) != [True, False] ):
+                    return False
+
+            elif ( self.__isUsed([fromPosition, toPosition, freePosition]) != [True, True, False] ):
+                return False
+
+            ## Move the cold template out of the hot tier first
+            if ( freePosition is not None ):
+                self.__moveTemplate(toPosition, freePosition, journal, positionMapping)
+
+            self.__moveTemplate(fromPosition, toPosition, journal, positionMapping)
+
+        return True
+
+    def __recoverRebalance(self, positionMapping):
+        """
+        Completes the interrupted move of a rebalance recorded in the journal and reports its moves.
+
+        Arguments:
+            positionMapping (dict): The mapping of the old to the new positions to update
+        """
+
+        fingerprint = self.__fingerprint
+        (journalMapping, pendingMove) = readJournal(self.__journalPath)
+
+        ## Repeat the interrupted move from the characteristics saved in the journal
+        if ( pendingMove is not None ):
+            characteristics = binascii.unhexlify(pendingMove['characteristics'])
+
+            fingerprint.uploadCharacteristics(FINGERPRINT_CHARBUFFER2, characteristics)
+            fingerprint.storeTemplate(pendingMove['to'], FINGERPRINT_CHARBUFFER2)
+
+            if ( fingerprint.deleteTemplate(pendingMove['from']) == False ):
+                raise Exception('Could not delete template')
+
+        for (fromPosition, toPosition) in sorted(journalMapping.items()):
+            self.__reportMove(fromPosition, toPosition, positionMapping)
+
+    def rebalance(self):
+        """
+        Moves the most frequently matched templates into the hot tier.
+
+        A cold template is moved out of the hot tier to an unused position before a hot
+        template takes its place, so every template exists on the sensor at any time.
+        Afterwards the match counts are halved to let old matches fade out.
+
+        Every swap (moving the cold template out and the hot template in) is a transaction of
+        its own, so other operations (e.g. identifications) are executed between the swaps. The
+        moves use char buffer 2: execute operations which need char buffer 2 (e.g. enrollments)
+        within `transaction()` while rebalancing.
+
+        A moved template is found at its new position by the next identification. Use the
+        `moveCallback` to update the mapping of positions (e.g. to users) within the transaction
+        of every move. If a `journalPath` was given, every move is recorded in the journal and an
+        interrupted rebalance (e.g. by a power failure) is completed and its moves are reported
+        again by the next rebalance. The journal is removed after the rebalance succeeded.
+
+        Returns:
+            The mapping (dict) of the old to the new positions of the moved templates.
+
+        Raises:
+            Exception: if any error occurs. The mapping of the moves completed before is set as
+            attribute `positionMapping` of the exception.
+        """
+
+        fingerprint = self.__fingerprint
+        positionMapping = {}
+
+        try:
+            with fingerprint.transaction('rebalance'):
+                if ( self.__journalPath is not None ):
+                    self.__recoverRebalance(positionMapping)
+
+                templateIndex = self.__getTemplateIndex()
+
+            hotSize = min(self.__hotSize, len(templateIndex))
+
+            with self.__lock:
+                matchCounts = dict(self.__matchCounts)
+
+            ## The most frequently matched used positions belong to the hot tier
+            rankedPositions = sorted([position for position in matchCounts if position < len(templateIndex) and templateIndex[position] == True], key = lambda position: -matchCounts[position])
+            hotPositions = set(rankedPositions[:hotSize])
+
+            promotions = [position for position in rankedPositions[:hotSize] if position >= hotSize]
+
+            ## Hot tier positions which are unused or contain a cold template (least matched first)
+            targets = sorted([position for position in range(0, hotSize) if position not in hotPositions], key = lambda position: (templateIndex[position], matchCounts.get(position, 0)))
+
+            if ( self.__journalPath is not None ):
+                journal = open(self.__journalPath, 'a')
+            else:
+                journal = None
+
+            try:
+                for (fromPosition, toPosition) in zip(promotions, targets):
+                    freePosition = None
+
+                    if ( templateIndex[toPosition] == True ):
+                        try:
+                            freePosition = templateIndex.index(False, hotSize)
+                        except ValueError:
+                            break
+
+                    if ( self.__swapTemplates(fromPosition, toPosition, freePosition, journal, positionMapping) == False ):
+                        break
+
+                    if ( freePosition is not None ):
+                        templateIndex[freePosition] = True
+
+                    templateIndex[fromPosition] = False
+
+            finally:
+                if ( journal is not None ):
+                    journal.close()
+
+        except Exception as e:
+            e.positionMapping = positionMapping
+            raise
+
+        if ( self.__journalPath is not None ):
+            os.remove(self.__journalPath)
+
+        ## Let old matches fade out
+        with self.__lock:
+            for position in list(self.__matchCounts):
+                self.__matchCounts[position] //= 2
+
+                if ( self.__matchCounts[position] == 0 ):
+                    del self.__matchCounts[position]
+
+        return positionMapping
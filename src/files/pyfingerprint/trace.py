@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import struct
+import threading
+import time
+
+
+## Trace file header: magic (4 bytes) + version (1 byte)
+TRACE_MAGIC = b'PFTR'
+TRACE_VERSION = 0x01
+
+TRACE_HEADER_FORMAT = '>4sB'
+TRACE_HEADER_SIZE = struct.calcsize(TRACE_HEADER_FORMAT)
+
+## Trace record header: direction (1 byte) + time since previous record in microseconds (4 bytes) + packet length (2 bytes)
+TRACE_RECORD_FORMAT = '>BIH'
+TRACE_RECORD_SIZE = struct.calcsize(TRACE_RECORD_FORMAT)
+
+## Packet directions
+##
+
+TRACE_DIRECTION_WRITE = 0x01
+"""
+Packet sent from host to sensor
+"""
+
+TRACE_DIRECTION_READ = 0x02
+"""
+Packet received from sensor
+"""
+
+## Clock of the timestamps (not affected by changes of the system time if available)
+monotonicTime = getattr(time, 'monotonic', time.time)
+
+
+class TraceRecorder(object):
+    """
+    Records packets exchanged with a sensor to a compact binary trace file.
+
+    Use it with `PyFingerprint.setTraceRecorder()`.
+
+    """
+    __file = None
+    __lock = None
+    __lastTimestamp = None
+
+    def __init__(self, traceDestination):
+        """
+        Constructor
+
+        Arguments:
+            traceDestination (str): Path to the trace file (will be overwritten)
+        """
+
+        self.__file = open(traceDestination, 'wb')
+        self.__file.write(struct.pack(TRACE_HEADER_FORMAT, TRACE_MAGIC, TRACE_VERSION))
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.close()
+
+    def recordPacket(self, direction, packet):
+        """
+        Appends a packet to the trace.
+
+        Arguments:
+            direction (int): Use `TRACE_DIRECTION_WRITE` or `TRACE_DIRECTION_READ`.
+            packet (bytearray): The complete packet including header and checksum
+        """
+
+        with self.__lock:
+            now = monotonicTime()
+
+            if ( self.__lastTimestamp is None ):
+                delta = 0
+            else:
+                delta = min(int((now - self.__lastTimestamp) * 1000000), 0xFFFFFFFF)
+
+            self.__lastTimestamp = now
+
+            self.__file.write(struct.pack(TRACE_RECORD_FORMAT, direction, delta, len(packet)))
+            self.__file.write(bytes(packet))
+
+    def close(self):
+        """
+        Flushes and closes the trace file.
+
+        """
+
+        with self.__lock:
+            if ( self.__file.closed == False ):
+                self.__file.close()
+
+
+def readTrace(traceSource):
+    """
+    Reads all records of a trace file.
+
+    Arguments:
+        traceSource (str): Path to the trace file
+
+    Returns:
+        A list of tuples that contain the following information:
+        0: integer The packet direction.
+        1: float The time of the packet in seconds since the first record.
+        2: bytes The complete packet.
+
+    Raises:
+        ValueError: if the file is no valid trace
+    """
+
+    with open(traceSource, 'rb') as traceFile:
+        data = traceFile.read()
+
+    if ( len(data) < TRACE_HEADER_SIZE ):
+        raise ValueError('The given file is no valid trace!')
+
+    (magic, version) = struct.unpack_from(TRACE_HEADER_FORMAT, data, 0)
+
+    if ( magic != TRACE_MAGIC or version != TRACE_VERSION ):
+        raise ValueError('The given file is no valid trace!')
+
+    records = []
+    timestamp = 0.0
+    offset = TRACE_HEADER_SIZE
+
+    while ( offset + TRACE_RECORD_SIZE <= len(data) ):
+        (direction, delta, packetLength) = struct.unpack_from(TRACE_RECORD_FORMAT, data, offset)
+        offset += TRACE_RECORD_SIZE
+
+        if ( offset + packetLength > len(data) ):
+            raise ValueError('The given trace is truncated!')
+
+        timestamp += delta / 1000000.0
+        records.append((direction, timestamp, data[offset:offset + packetLength]))
+        offset += packetLength
+
+    return records
+
+
+class TraceReplayer(object):
+    """
+    Serial-like object which feeds a recorded trace back into `PyFingerprint`.
+
+    Pass an instance as `port` to the `PyFingerprint` constructor.
+
+    """
+    __records = None
+    __position = 0
+    __receiveBuffer = None
+    __expectedWrite = None
+    __realTime = False
+    __strict = True
+    __isOpen = True
+
+    ## Anchor of real-time pacing: (monotonic clock time, trace time)
+    __anchor = None
+
+    timeout = None
+
+    def __init__(self, traceSource, realTime = False, strict = True):
+        """
+        Constructor
+
+        Arguments:
+            traceSource (str): Path to the trace file
+            realTime (bool): Delay received packets like they were recorded instead of replaying at full speed
+            strict (bool): Verify that the written packets are equal to the recorded ones
+
+        Raises:
+            ValueError: if the file is no valid trace
+        """
+
+        self.__records = readTrace(traceSource)
+        self.__realTime = realTime
+        self.__strict = strict
+        self.rewind()
+
+    def rewind(self):
+        """
+        Restarts the replay from the beginning of the trace.
+
+        """
+
+        self.__position = 0
+        self.__receiveBuffer = bytearray()
+        self.__expectedWrite = bytearray()
+        self.__anchor = None
+
+    def __nextRecord(self):
+        """
+        Gets the next record of the trace.
+
+        Returns:
+            The record (tuple).
+
+        Raises:
+            Exception: if the end of the trace was reached
+        """
+
+        if ( self.__position >= len(self.__records) ):
+            raise Exception('The end of the trace was reached!')
+
+        record = self.__records[self.__position]
+        self.__position += 1
+        return record
+
+    def write(self, data):
+        """
+        Receives data written by the host.
+
+        Arguments:
+            data (bytes): The data
+
+        Returns:
+            The number of written bytes (int).
+
+        Raises:
+            Exception: if the data does not match the trace in strict mode
+        """
+
+        data = bytearray(data)
+
+        while ( len(self.__expectedWrite) < len(data) ):
+            (direction, timestamp, packet) = self.__nextRecord()
+
+            if ( direction == TRACE_DIRECTION_WRITE ):
+                self.__expectedWrite.extend(packet)
+                self.__anchor = (monotonicTime(), timestamp)
+
+            elif ( self.__strict == True ):
+                raise Exception('The host wrote data while the trace expects it to read!')
+
+        expected = self.__expectedWrite[:len(data)]
+        del self.__expectedWrite[:len(data)]
+
+        if ( self.__strict == True and expected != data ):
+            raise Exception('The written data does not match the trace!')
+
+        return len(data)
+
+    def read(self, size = 1):
+        """
+        Reads data as the sensor sent it.
+
+        Arguments:
+            size (int): The maximum number of bytes
+
+        Returns:
+            The data (bytes).
+
+        Raises:
+            Exception: if the end of the trace was reached
+        """
+
+        while ( len(self.__receiveBuffer) == 0 ):
+            (direction, timestamp, packet) = self.__nextRecord()
+
+            if ( direction == TRACE_DIRECTION_WRITE ):
+                if ( self.__strict == True ):
+                    raise Exception('The host reads data while the trace expects it to write!')
+
+                continue
+
+            if ( self.__realTime == True and self.__anchor is not None ):
+                delay = self.__anchor[0] + (timestamp - self.__anchor[1]) - monotonicTime()
+
+                if ( delay > 0 ):
+                    time.sleep(delay)
+
+            self.__receiveBuffer.extend(packet)
+
+        data = self.__receiveBuffer[:size]
+        del self.__receiveBuffer[:size]
+        return bytes(data)
+
+    @property
+    def in_waiting(self):
+        return len(self.__receiveBuffer)
+
+    def inWaiting(self):
+        return self.in_waiting
+
+    def flushInput(self):
+        self.__receiveBuffer = bytearray()
+
+    reset_input_buffer = flushInput
+
+    def isOpen(self):
+        return self.__isOpen
+
+    def open(self):
+        self.__isOpen = True
+
+    def close(self):
+        self.__isOpen = False
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import struct
+import threading
+
+from pyfingerprint.imagecodec import IMAGE_PACKED_SIZE
+
+
+def encodeFakePacket(address, packetType, packetPayload):
+    """
+    Encodes a packet as the sensor sends it.
+
+    """
+
+    packetPayload = bytearray(packetPayload)
+    packetLength = len(packetPayload) + 2
+    packetChecksum = packetType + (packetLength >> 8) + (packetLength & 0xFF) + sum(packetPayload)
+
+    return bytearray(struct.pack('>HIBH', 0xEF01, address, packetType, packetLength)) + packetPayload + bytearray(struct.pack('>H', packetChecksum & 0xFFFF))
+
+
+class FakeSensor(object):
+    """
+    Serial-like object which simulates a sensor (like `TraceReplayer` replays one).
+
+    The templates are kept in `templates` (position -> characteristics) and every received
+    instruction is appended to `instructions`. Bytes in `garbage` are sent in front of the next
+    reply and `corruptReplies` replies are sent with a wrong checksum.
+
+    """
+
+    def __init__(self, storageCapacity = 1000, address = 0xFFFFFFFF, packetSize = 128):
+        self.timeout = 2
+        self.storageCapacity = storageCapacity
+        self.address = address
+        self.packetSize = packetSize
+        self.templates = {}
+        self.charBuffers = {0x01: bytearray(512), 0x02: bytearray(512)}
+        self.image = bytearray(IMAGE_PACKED_SIZE)
+        self.instructions = []
+        self.searches = []
+        self.garbage = bytearray()
+        self.corruptReplies = 0
+        self.__received = bytearray()
+        self.__replies = bytearray()
+        self.__upload = None
+        self.__uploadData = bytearray()
+        self.__lock = threading.Lock()
+
+    def isOpen(self):
+        return True
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def reset_input_buffer(self):
+        with self.__lock:
+            self.__replies = bytearray()
+
+    flushInput = reset_input_buffer
+
+    def write(self, data):
+        with self.__lock:
+            self.__received.extend(bytearray(data))
+            self.__processPackets()
+
+        return len(data)
+
+    def read(self, size = 1):
+        with self.__lock:
+            data = bytes(self.__replies[:size])
+            del self.__replies[:size]
+
+        return data
+
+    def __sendPacket(self, packetType, packetPayload):
+        packet = encodeFakePacket(self.address, packetType, packetPayload)
+
+        if ( self.corruptReplies > 0 ):
+            self.corruptReplies -= 1
+            packet[-1] ^= 0xFF
+
+        self.__replies.extend(self.garbage + packet)
+        self.garbage = bytearray()
+
+    def __sendAck(self, *payload):
+        self.__sendPacket(0x07, payload)
+
+    def __sendData(self, data):
+        for i in range(0, len(data), self.packetSize):
+            packetType = 0x08 if i + self.packetSize >= len(data) else 0x02
+            self.__sendPacket(packetType, data[i:i + self.packetSize])
+
+    def __processPackets(self):
+        while ( len(self.__received) >= 9 ):
+            packetLength = (self.__received[7] << 8) | self.__received[8]
+
+            if ( len(self.__received) < 9 + packetLength ):
+                return
+
+            packet = self.__received[:9 + packetLength]
+            del self.__received[:9 + packetLength]
+
+            packetType = packet[6]
+            packetPayload = packet[9:-2]
+
+            if ( packetType == 0x01 ):
+                self.__executeCommand(packetPayload)
+                continue
+
+            self.__uploadData.extend(packetPayload)
+
+            ## The last data packet completes the upload
+            if ( packetType == 0x08 ):
+                if ( self.__upload == 'image' ):
+                    self.image = self.__uploadData
+                else:
+                    self.charBuffers[self.__upload] = self.__uploadData
+
+                self.__upload = None
+                self.__uploadData = bytearray()
+
+    def __executeCommand(self, payload):
+        instruction = payload[0]
+        self.instructions.append(instruction)
+
+        ## verifyPassword()
+        if ( instruction == 0x13 ):
+            return self.__sendAck(0x00)
+
+        ## getSystemParameters()
+        if ( instruction == 0x0F ):
+            packetSizeType = {32: 0, 64: 1, 128: 2, 256: 3}[self.packetSize]
+            parameters = struct.pack('>HHHHIHH', 0, 0, self.storageCapacity, 3, self.address, packetSizeType, 6)
+            return self.__sendAck(0x00, *bytearray(parameters))
+
+        ## getTemplateIndex()
+        if ( instruction == 0x1F ):
+            page = payload[1]
+            bits = bytearray(32)
+
+            for position in self.templates:
+                if ( page * 256 <= position < (page + 1) * 256 ):
+                    bits[(position % 256) // 8] |= 1 << (position % 8)
+
+            return self.__sendAck(0x00, *bits)
+
+        ## getTemplateCount()
+        if ( instruction == 0x1D ):
+            return self.__sendAck(0x00, len(self.templates) >> 8, len(self.templates) & 0xFF)
+
+        ## readImage(), createTemplate()
+        if ( instruction in (0x01, 0x05) ):
+            return self.__sendAck(0x00)
+
+        ## convertImage() takes the characteristics from the image
+        if ( instruction == 0x02 ):
+            self.charBuffers[payload[1]] = bytearray(self.image[:512])
+            return self.__sendAck(0x00)
+
+        ## storeTemplate()
+        if ( instruction == 0x06 ):
+            position = (payload[2] << 8) | payload[3]
+
+            if ( position >= self.storageCapacity ):
+                return self.__sendAck(0x0B)
+
+            self.templates[position] = bytearray(self.charBuffers[payload[1]])
+            return self.__sendAck(0x00)
+
+        ## searchTemplate()
+        if ( instruction == 0x04 ):
+            (positionStart, count) = struct.unpack('>HH', bytes(payload[2:6]))
+            self.searches.append((positionStart, count))
+
+            for position in sorted(self.templates):
+                if ( positionStart <= position < positionStart + count and self.templates[position] == self.charBuffers[payload[1]] ):
+                    return self.__sendAck(0x00, position >> 8, position & 0xFF, 0x00, 100)
+
+            return self.__sendAck(0x09)
+
+        ## loadTemplate()
+        if ( instruction == 0x07 ):
+            position = (payload[2] << 8) | payload[3]
+
+            if ( position not in self.templates ):
+                return self.__sendAck(0x0C)
+
+            self.charBuffers[payload[1]] = bytearray(self.templates[position])
+            return self.__sendAck(0x00)
+
+        ## deleteTemplate()
+        if ( instruction == 0x0C ):
+            (position, count) = struct.unpack('>HH', bytes(payload[1:5]))
+
+            for deletedPosition in range(position, position + count):
+                self.templates.pop(deletedPosition, None)
+
+            return self.__sendAck(0x00)
+
+        ## clearDatabase()
+        if ( instruction == 0x0D ):
+            self.templates.clear()
+            return self.__sendAck(0x00)
+
+        ## compareCharacteristics()
+        if ( instruction == 0x03 ):
+            if ( self.charBuffers[0x01] == self.charBuffers[0x02] ):
+                return self.__sendAck(0x00, 0x00, 50)
+
+            return self.__sendAck(0x08)
+
+        ## generateRandomNumber()
+        if ( instruction == 0x14 ):
+            return self.__sendAck(0x00, 0x01, 0x02, 0x03, 0x04)
+
+        ## uploadCharacteristics(), uploadImage()
+        if ( instruction == 0x09 ):
+            self.__upload = payload[1]
+            return self.__sendAck(0x00)
+
+        if ( instruction == 0x0B ):
+            self.__upload = 'image'
+            return self.__sendAck(0x00)
+
+        ## downloadCharacteristics(), downloadPackedImage()
+        if ( instruction == 0x08 ):
+            self.__sendAck(0x00)
+            return self.__sendData(self.charBuffers[payload[1]])
+
+        if ( instruction == 0x0A ):
+            self.__sendAck(0x00)
+            return self.__sendData(self.image)
+
+        return self.__sendAck(0xFF)
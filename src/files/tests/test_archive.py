@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyfingerprint.archive import ImageArchiveWriter, ImageArchiveReader, ARCHIVE_HEADER_SIZE, ARCHIVE_RECORD_SIZE
+from pyfingerprint.imagecodec import IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_PACKED_SIZE, unpackImage
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ImageArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.archivePath = os.path.join(self.directory, 'images.pfia')
+        self.packedImages = [bytes(bytearray([(i * 16 + j) % 256 for j in range(256)]) * (IMAGE_PACKED_SIZE // 256)) for i in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writeArchive(self):
+        archive = ImageArchiveWriter(self.archivePath)
+
+        for (index, packedImage) in enumerate(self.packedImages):
+            self.assertEqual(archive.appendImage(packedImage, 1000.5 + index), index)
+
+        archive.close()
+
+    def test_round_trip(self):
+        self.writeArchive()
+
+        archive = ImageArchiveReader(self.archivePath)
+
+        self.assertEqual(archive.getImageCount(), 3)
+        self.assertEqual(archive.readPackedImage(1), (1001.5, self.packedImages[1]))
+        self.assertEqual(archive.readImage(2), unpackImage(self.packedImages[2]))
+        self.assertEqual(archive.readImages(1), ([1001.5, 1002.5], [unpackImage(packedImage) for packedImage in self.packedImages[1:]]))
+        self.assertRaises(IndexError, archive.readPackedImage, 3)
+
+        archive.close()
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_read_images_as_numpy_array(self):
+        self.writeArchive()
+
+        archive = ImageArchiveReader(self.archivePath)
+        (captureTimes, images) = archive.readImages(asNumpy = True)
+        archive.close()
+
+        self.assertEqual(captureTimes, [1000.5, 1001.5, 1002.5])
+        self.assertEqual(images.shape, (3, IMAGE_HEIGHT, IMAGE_WIDTH))
+        self.assertEqual(images[2].tobytes(), bytes(unpackImage(self.packedImages[2])))
+
+    def test_incomplete_record_is_overwritten(self):
+        self.writeArchive()
+
+        ## Simulate a crash while the last image was written
+        with open(self.archivePath, 'r+b') as archiveFile:
+            archiveFile.truncate(ARCHIVE_HEADER_SIZE + 2 * ARCHIVE_RECORD_SIZE + 100)
+
+        archive = ImageArchiveReader(self.archivePath)
+        self.assertEqual(archive.getImageCount(), 2)
+        archive.close()
+
+        archive = ImageArchiveWriter(self.archivePath)
+        self.assertEqual(archive.getImageCount(), 2)
+        self.assertEqual(archive.appendImage(self.packedImages[0], 2000.0), 2)
+        archive.close()
+
+        archive = ImageArchiveReader(self.archivePath)
+        self.assertEqual(archive.readPackedImage(2), (2000.0, self.packedImages[0]))
+        archive.close()
+
+    def test_other_file_is_rejected(self):
+        with open(self.archivePath, 'wb') as otherFile:
+            otherFile.write(b'\x89PNG\r\n\x1a\n' + bytes(bytearray(100)))
+
+        self.assertRaises(Exception, ImageArchiveReader, self.archivePath)
+        self.assertRaises(Exception, ImageArchiveWriter, self.archivePath)
+
+    def test_invalid_image_size(self):
+        archive = ImageArchiveWriter(self.archivePath)
+        self.assertRaises(ValueError, archive.appendImage, bytes(bytearray(IMAGE_PACKED_SIZE - 1)))
+        archive.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
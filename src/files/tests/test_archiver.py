@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import threading
+import unittest
+
+from pyfingerprint.archiver import ImageArchiver, ARCHIVER_POLICY_BLOCK
+from pyfingerprint.imagecodec import IMAGE_PACKED_SIZE
+
+
+class FailingArchive(object):
+    """
+    Archive-like destination which fails to append every other image.
+
+    """
+
+    def __init__(self):
+        self.captureTimes = []
+
+    def appendImage(self, packedImage, captureTime = None):
+        if ( len(self.captureTimes) % 2 == 0 ):
+            self.captureTimes.append(None)
+            raise IOError('The disk is full!')
+
+        self.captureTimes.append(captureTime)
+
+    def flush(self, sync = False):
+        pass
+
+
+class ImageArchiverTest(unittest.TestCase):
+
+    def test_failing_error_callback_does_not_stop_the_worker(self):
+        errors = []
+
+        def errorCallback(name, error):
+            errors.append(name)
+            raise RuntimeError('The callback failed!')
+
+        archive = FailingArchive()
+        archiver = ImageArchiver(archive, queueSize = 1, batchSize = 1, policy = ARCHIVER_POLICY_BLOCK, errorCallback = errorCallback)
+
+        for i in range(0, 4):
+            self.assertTrue(archiver.submitImage(bytes(bytearray(IMAGE_PACKED_SIZE)), 'image' + str(i), captureTime = i, timeout = 2))
+
+        closer = threading.Thread(target = archiver.close)
+        closer.daemon = True
+        closer.start()
+        closer.join(5)
+
+        self.assertFalse(closer.is_alive())
+        self.assertEqual(errors, ['image0', 'image2'])
+        self.assertEqual(archive.captureTimes, [None, 1, None, 3])
+        self.assertEqual((archiver.getWrittenCount(), archiver.getFailedCount()), (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import unittest
+
+from fakesensor import FakeSensor
+from pyfingerprint.pyfingerprint import PyFingerprint, FINGERPRINT_TEMPLATECOUNT, FINGERPRINT_LOADTEMPLATE, FINGERPRINT_DELETETEMPLATE
+
+
+class CountingSensor(FakeSensor):
+    """
+    Fake sensor which counts the writes of the host.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        FakeSensor.__init__(self, *args, **kwargs)
+        self.writeCount = 0
+
+    def write(self, data):
+        self.writeCount += 1
+        return FakeSensor.write(self, data)
+
+
+class ExecuteBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sensor = CountingSensor()
+        self.sensor.templates[3] = bytearray(512)
+        self.sensor.templates[300] = bytearray(512)
+        self.fingerprint = PyFingerprint(self.sensor)
+
+    def test_pipelined_commands_are_written_at_once(self):
+        ## The storage capacity is requested before the batch
+        self.fingerprint.getStorageCapacity()
+        self.sensor.writeCount = 0
+
+        results = self.fingerprint.executeBatch([
+            (self.fingerprint.getTemplateIndex, 0),
+            (self.fingerprint.getTemplateIndex, 1),
+            (self.fingerprint.getTemplateCount,),
+        ])
+
+        self.assertEqual(self.sensor.writeCount, 1)
+        self.assertEqual(results[0][3], True)
+        self.assertEqual(results[1][300 - 256], True)
+        self.assertEqual(results[2], 2)
+
+    def test_results_equal_sequential_execution(self):
+        commands = [
+            (self.fingerprint.getTemplateCount,),
+            (self.fingerprint.deleteTemplate, 3),
+            (self.fingerprint.getTemplateCount,),
+            (self.fingerprint.generateRandomNumber,),
+        ]
+
+        self.assertEqual(self.fingerprint.executeBatch(commands), [2, True, 1, 0x01020304])
+
+    def test_failing_command_within_a_group(self):
+        try:
+            self.fingerprint.executeBatch([
+                (self.fingerprint.getTemplateCount,),
+                (self.fingerprint.loadTemplate, 7),
+                (self.fingerprint.deleteTemplate, 3),
+            ])
+
+        except Exception as e:
+            batchResults = e.batchResults
+
+        else:
+            self.fail('The failing command did not raise an exception!')
+
+        ## The following command of the group was already sent and executed
+        self.assertEqual(batchResults, [2, None, True])
+        self.assertNotIn(3, self.sensor.templates)
+        self.assertEqual(self.sensor.instructions[-3:], [FINGERPRINT_TEMPLATECOUNT, FINGERPRINT_LOADTEMPLATE, FINGERPRINT_DELETETEMPLATE])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import unittest
+
+from fakesensor import FakeSensor
+from pyfingerprint.pyfingerprint import PyFingerprint, FINGERPRINT_CHARBUFFER1, FINGERPRINT_CHARBUFFER2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class CharacteristicsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sensor = FakeSensor()
+        self.fingerprint = PyFingerprint(self.sensor)
+        self.characteristics = bytes(bytearray((i * 7) % 256 for i in range(512)))
+
+    def test_upload_types(self):
+        for characteristicsData in (self.characteristics, bytearray(self.characteristics), memoryview(self.characteristics), list(bytearray(self.characteristics))):
+            self.sensor.charBuffers[FINGERPRINT_CHARBUFFER2] = bytearray(512)
+
+            self.assertTrue(self.fingerprint.uploadCharacteristics(FINGERPRINT_CHARBUFFER2, characteristicsData))
+            self.assertEqual(bytes(self.sensor.charBuffers[FINGERPRINT_CHARBUFFER2]), self.characteristics)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_upload_numpy_arrays(self):
+        for dtype in (numpy.uint8, numpy.int64):
+            characteristicsData = numpy.frombuffer(self.characteristics, dtype = numpy.uint8).astype(dtype)
+
+            self.assertTrue(self.fingerprint.uploadCharacteristics(FINGERPRINT_CHARBUFFER1, characteristicsData))
+            self.assertEqual(bytes(self.sensor.charBuffers[FINGERPRINT_CHARBUFFER1]), self.characteristics)
+
+        self.assertRaises(ValueError, self.fingerprint.uploadCharacteristics, FINGERPRINT_CHARBUFFER1, numpy.zeros(1, dtype = numpy.int64))
+
+    def test_upload_without_characteristics(self):
+        self.assertRaises(ValueError, self.fingerprint.uploadCharacteristics, FINGERPRINT_CHARBUFFER1)
+        self.assertRaises(ValueError, self.fingerprint.uploadCharacteristics, FINGERPRINT_CHARBUFFER1, b'')
+        self.assertRaises(ValueError, self.fingerprint.uploadCharacteristics, FINGERPRINT_CHARBUFFER1, [256])
+        self.assertEqual(self.sensor.instructions, [])
+
+    def test_download_as_bytes_or_list(self):
+        self.sensor.charBuffers[FINGERPRINT_CHARBUFFER1] = bytearray(self.characteristics)
+
+        self.assertEqual(self.fingerprint.downloadCharacteristics(FINGERPRINT_CHARBUFFER1, asBytes = True), self.characteristics)
+        self.assertEqual(self.fingerprint.downloadCharacteristics(FINGERPRINT_CHARBUFFER1), list(bytearray(self.characteristics)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fakesensor import FakeSensor
+from pyfingerprint.pyfingerprint import PyFingerprint, PacketTimeoutError, FINGERPRINT_DELETETEMPLATE
+
+
+class CrashingSensor(FakeSensor):
+    """
+    Fake sensor which stops replying at the first deletion of a template.
+
+    """
+
+    crashed = False
+
+    def write(self, data):
+        if ( bytearray(data)[9] == FINGERPRINT_DELETETEMPLATE ):
+            self.crashed = True
+
+        if ( self.crashed == True ):
+            return len(data)
+
+        return FakeSensor.write(self, data)
+
+
+class CompactTemplatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.journalPath = os.path.join(self.directory, 'compaction.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def createTemplates(self, sensor, positions):
+        for position in positions:
+            sensor.templates[position] = bytearray([position % 256]) * 512
+
+    def test_compaction_reports_every_move(self):
+        sensor = FakeSensor(storageCapacity = 300)
+        self.createTemplates(sensor, (2, 5, 9, 260))
+        fingerprint = PyFingerprint(sensor)
+
+        moves = []
+        positionMapping = fingerprint.compactTemplates(self.journalPath, moveCallback = lambda oldPosition, newPosition: moves.append((oldPosition, newPosition, sorted(sensor.templates))))
+
+        self.assertEqual(positionMapping, {2: 0, 5: 1, 9: 2, 260: 3})
+        self.assertEqual([move[:2] for move in moves], [(2, 0), (5, 1), (9, 2), (260, 3)])
+
+        ## Every move is reported right after it was completed
+        self.assertEqual(moves[0][2], [0, 5, 9, 260])
+        self.assertEqual(sorted(sensor.templates), [0, 1, 2, 3])
+        self.assertEqual(sensor.templates[3], bytearray([260 % 256]) * 512)
+        self.assertFalse(os.path.exists(self.journalPath))
+
+    def test_compaction_without_gaps(self):
+        sensor = FakeSensor()
+        self.createTemplates(sensor, (0, 1))
+
+        self.assertEqual(PyFingerprint(sensor).compactTemplates(self.journalPath), {})
+        self.assertEqual(sorted(sensor.templates), [0, 1])
+
+    def test_interrupted_compaction_is_completed(self):
+        sensor = CrashingSensor()
+        self.createTemplates(sensor, (4, 7))
+        fingerprint = PyFingerprint(sensor)
+        fingerprint.setCommandTimeout(FINGERPRINT_DELETETEMPLATE, 0.1)
+
+        ## The sensor stops replying after the first template was copied
+        self.assertRaises(PacketTimeoutError, fingerprint.compactTemplates, self.journalPath)
+        self.assertEqual(sorted(sensor.templates), [0, 4, 7])
+        self.assertTrue(os.path.exists(self.journalPath))
+
+        ## Restart with the same templates
+        restartedSensor = FakeSensor()
+        restartedSensor.templates = sensor.templates
+
+        moves = []
+        positionMapping = PyFingerprint(restartedSensor).compactTemplates(self.journalPath, moveCallback = lambda oldPosition, newPosition: moves.append((oldPosition, newPosition)))
+
+        self.assertEqual(positionMapping, {4: 0, 7: 1})
+        self.assertEqual(moves, [(4, 0), (7, 1)])
+        self.assertEqual(restartedSensor.templates, {0: bytearray([4]) * 512, 1: bytearray([7]) * 512})
+        self.assertFalse(os.path.exists(self.journalPath))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import unittest
+
+from fakesensor import FakeSensor
+from pyfingerprint.pyfingerprint import PyFingerprint
+from pyfingerprint.imagecodec import IMAGE_WIDTH, IMAGE_HEIGHT, IMAGE_SIZE, IMAGE_PACKED_SIZE, packImage, unpackImage
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ImageCodecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pixels = bytes(bytearray((i * 37 + i // IMAGE_WIDTH) % 256 for i in range(IMAGE_SIZE)))
+
+    def test_left_pixel_is_stored_in_the_upper_bits(self):
+        packedImage = bytearray(packImage(bytearray([0xAB, 0x3C]) + bytearray(IMAGE_SIZE - 2)))
+
+        self.assertEqual(len(packedImage), IMAGE_PACKED_SIZE)
+        self.assertEqual(packedImage[0], 0xA3)
+        self.assertEqual(unpackImage(packedImage)[:2], bytearray([0xAA, 0x33]))
+
+    def test_round_trip(self):
+        packedImage = packImage(self.pixels)
+
+        ## Only the upper 4 bits of every pixel are kept
+        self.assertEqual(unpackImage(packedImage), bytearray((pixel >> 4) * 17 for pixel in bytearray(self.pixels)))
+        self.assertEqual(packImage(unpackImage(packedImage)), packedImage)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_numpy_array_is_packed_like_bytes(self):
+        image = numpy.frombuffer(self.pixels, dtype = numpy.uint8).reshape((IMAGE_HEIGHT, IMAGE_WIDTH))
+
+        self.assertEqual(packImage(image), packImage(self.pixels))
+
+    def test_invalid_sizes(self):
+        self.assertRaises(ValueError, packImage, bytearray(IMAGE_SIZE - 1))
+        self.assertRaises(ValueError, unpackImage, bytearray(IMAGE_PACKED_SIZE + 1))
+
+    def test_upload_and_download(self):
+        sensor = FakeSensor()
+        fingerprint = PyFingerprint(sensor)
+
+        self.assertTrue(fingerprint.uploadImage(self.pixels))
+        self.assertEqual(bytes(sensor.image), packImage(self.pixels))
+        self.assertEqual(fingerprint.downloadPackedImage(), packImage(self.pixels))
+
+        ## A packed image is sent as it is
+        packedImage = bytes(bytearray(range(256)) * (IMAGE_PACKED_SIZE // 256))
+        fingerprint.uploadImage(packedImage)
+        self.assertEqual(bytes(sensor.image), packedImage)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import ast
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+import pyfingerprint
+
+## Directory which contains the package
+PACKAGE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(pyfingerprint.__file__)))
+
+
+class ImportsTest(unittest.TestCase):
+
+    def test_optional_dependencies_are_not_imported(self):
+        modules = sorted(fileName[:-3] for fileName in os.listdir(os.path.dirname(pyfingerprint.__file__)) if fileName.endswith('.py') and fileName != '__init__.py')
+
+        ## A fresh interpreter is needed, because other tests may have imported them already
+        code = '; '.join([
+            'import sys',
+            'import pyfingerprint',
+        ] + ['import pyfingerprint.' + module for module in modules] + [
+            'print(sorted(module for module in (\'PIL\', \'numpy\') if module in sys.modules))',
+        ])
+
+        output = subprocess.check_output([sys.executable, '-c', code], cwd = PACKAGE_DIRECTORY)
+
+        self.assertEqual(output.decode('ascii').strip(), '[]')
+
+    def test_setup_reads_the_version(self):
+        with open(os.path.join(PACKAGE_DIRECTORY, '..', 'setup.py'), 'r') as setupFile:
+            setupCode = setupFile.read()
+
+        ## Apply the expression of setup.py to the module of the package
+        versionPattern = re.search(r're\.search\((r"[^"]+")', setupCode).group(1)
+
+        with open(os.path.join(PACKAGE_DIRECTORY, 'pyfingerprint', '__init__.py'), 'r') as initFile:
+            version = re.search(ast.literal_eval(versionPattern), initFile.read(), re.MULTILINE).group(1)
+
+        self.assertEqual(version, pyfingerprint.__version__)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import struct
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if ( numpy is not None ):
+    from pyfingerprint.iso19794 import encodeMinutiaeRecord, encodeMinutiaeRecords, decodeMinutiaeRecord, decodeMinutiaeRecords, packMinutiae, ISO_HEADER_SIZE, ISO_MAX_MINUTIAE
+    from pyfingerprint.minutiae import MINUTIAE_COLUMN_QUALITY
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class MinutiaeRecordTest(unittest.TestCase):
+
+    def setUp(self):
+        ## Columns: x, y, angle (multiples of 45 degrees are stored exactly), type, quality
+        self.minutiae = numpy.array([
+            [10, 20, 0, 1, 80],
+            [255, 287, 45, 2, 60],
+            [128, 1, 315, 1, 100],
+        ], dtype = numpy.uint16)
+
+    def test_round_trip(self):
+        record = encodeMinutiaeRecord(self.minutiae, fingerPosition = 2)
+
+        self.assertEqual(record[:8], b'FMR\x00 20\x00')
+        self.assertEqual(struct.unpack_from('>I', record, 8)[0], len(record))
+
+        views = decodeMinutiaeRecord(record)
+
+        self.assertEqual(len(views), 1)
+        self.assertEqual(views[0][:2], (2, 80))
+        self.assertEqual(views[0][2].tolist(), self.minutiae.tolist())
+
+    def test_concatenated_records(self):
+        records = encodeMinutiaeRecords([self.minutiae, self.minutiae[:0], self.minutiae[1:]], [1, 0, 10])
+
+        decodedRecords = decodeMinutiaeRecords(records)
+
+        self.assertEqual([[view[:2] for view in views] for views in decodedRecords], [[(1, 80)], [(0, 0)], [(10, 80)]])
+        self.assertEqual(decodedRecords[1][0][2].shape, (0, 5))
+        self.assertEqual(decodedRecords[2][0][2].tolist(), self.minutiae[1:].tolist())
+
+    def test_minutiae_of_the_best_quality_are_kept(self):
+        minutiae = numpy.zeros((ISO_MAX_MINUTIAE + 10, 5), dtype = numpy.uint16)
+        minutiae[:, 0] = numpy.arange(len(minutiae))
+        minutiae[:, MINUTIAE_COLUMN_QUALITY] = 50
+        minutiae[:10, MINUTIAE_COLUMN_QUALITY] = 10
+
+        decodedMinutiae = decodeMinutiaeRecord(encodeMinutiaeRecord(minutiae))[0][2]
+
+        self.assertEqual(decodedMinutiae[:, 0].tolist(), list(range(10, len(minutiae))))
+
+    def test_invalid_data(self):
+        record = encodeMinutiaeRecord(self.minutiae)
+
+        self.assertRaises(ValueError, decodeMinutiaeRecord, record[:-1])
+        self.assertRaises(ValueError, decodeMinutiaeRecord, record[:ISO_HEADER_SIZE - 1])
+        self.assertRaises(ValueError, decodeMinutiaeRecord, b'XYZ' + record[3:])
+        self.assertRaises(ValueError, decodeMinutiaeRecord, record + record)
+
+    def test_invalid_minutiae(self):
+        self.assertRaises(ValueError, packMinutiae, [[0x4000, 0, 0, 1, 50]])
+        self.assertRaises(ValueError, packMinutiae, [[0, 0, 0, 3, 50]])
+        self.assertRaises(ValueError, packMinutiae, [[0, 0, 0, 1, 101]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import unittest
+
+from fakesensor import FakeSensor
+from pyfingerprint.pyfingerprint import PyFingerprint
+from pyfingerprint.loadbalancing import SearchScheduler
+from pyfingerprint.scheduler import CommandScheduler, SCHEDULER_PRIORITY_INTERACTIVE
+
+
+class RecordingScheduler(CommandScheduler):
+    """
+    Scheduler which records the priorities of the acquired transactions.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        CommandScheduler.__init__(self, *args, **kwargs)
+        self.priorities = []
+
+    def acquire(self, operation = None, timeout = None):
+        self.priorities.append(self.getPriority(operation))
+        return CommandScheduler.acquire(self, operation, timeout)
+
+
+class SearchSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.characteristics = bytes(bytearray(range(256)) * 2)
+        self.sensors = []
+        self.schedulers = []
+        fingerprints = []
+
+        for i in range(0, 2):
+            sensor = FakeSensor()
+            sensor.templates[7] = bytearray(self.characteristics)
+
+            scheduler = RecordingScheduler()
+            fingerprint = PyFingerprint(sensor)
+            fingerprint.setScheduler(scheduler)
+
+            self.sensors.append(sensor)
+            self.schedulers.append(scheduler)
+            fingerprints.append(fingerprint)
+
+        self.searchScheduler = SearchScheduler(fingerprints)
+
+    def test_searches_are_distributed(self):
+        self.assertEqual(self.searchScheduler.searchCharacteristics(self.characteristics), (7, 100))
+        self.assertEqual(self.searchScheduler.searchCharacteristics(self.characteristics), (7, 100))
+
+        self.assertEqual([len(sensor.searches) for sensor in self.sensors], [1, 1])
+        self.assertEqual(self.searchScheduler.getQueueDepths(), [0, 0])
+
+    def test_search_is_scheduled_as_interactive(self):
+        self.searchScheduler.searchCharacteristics(self.characteristics)
+
+        self.assertEqual(self.schedulers[0].priorities, [SCHEDULER_PRIORITY_INTERACTIVE])
+
+
+if __name__ == '__main__':
+    unittest.main()
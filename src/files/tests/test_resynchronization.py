@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import time
+import unittest
+
+from fakesensor import FakeSensor
+from pyfingerprint.pyfingerprint import PyFingerprint, PacketChecksumError, FINGERPRINT_TEMPLATECOUNT
+
+
+class ResynchronizationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sensor = FakeSensor()
+        self.sensor.templates[3] = bytearray(512)
+        self.fingerprint = PyFingerprint(self.sensor)
+
+    def test_garbage_in_front_of_the_reply(self):
+        self.sensor.garbage = bytearray(b'\x00\xEF\x55\xEF\x01\x12\x34')
+
+        self.assertEqual(self.fingerprint.getTemplateCount(), 1)
+
+    def test_start_code_with_an_invalid_packet_type(self):
+        self.sensor.garbage = bytearray(b'\xEF\x01\xFF\xFF\xFF\xFF\x55\x00\x03')
+
+        self.assertEqual(self.fingerprint.getTemplateCount(), 1)
+
+    def test_start_code_with_an_impossible_length(self):
+        self.sensor.garbage = bytearray(b'\xEF\x01\xFF\xFF\xFF\xFF\x07\xF0\x00')
+
+        startTime = time.time()
+        self.assertEqual(self.fingerprint.getTemplateCount(), 1)
+        self.assertLess(time.time() - startTime, 0.5)
+
+    def test_corrupted_reply_is_requested_again(self):
+        self.sensor.corruptReplies = 1
+
+        self.assertEqual(self.fingerprint.getTemplateCount(), 1)
+        self.assertEqual(self.sensor.instructions, [FINGERPRINT_TEMPLATECOUNT] * 2)
+
+    def test_corrupted_replies_exceeding_the_retries(self):
+        self.fingerprint.setCommandRetries(1)
+        self.sensor.corruptReplies = 2
+
+        self.assertRaises(PacketChecksumError, self.fingerprint.getTemplateCount)
+        self.assertEqual(self.sensor.instructions, [FINGERPRINT_TEMPLATECOUNT] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
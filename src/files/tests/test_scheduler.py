@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import struct
+import threading
+import time
+import unittest
+
+from pyfingerprint.pyfingerprint import PyFingerprint, PacketTimeoutError, FINGERPRINT_CONVERTIMAGE, FINGERPRINT_TEMPLATEINDEX, FINGERPRINT_READIMAGE
+from pyfingerprint.scheduler import CommandScheduler
+
+
+def encodeReply(payload):
+    """
+    Encodes an ack packet of the sensor.
+
+    """
+
+    payload = bytearray(payload)
+    length = len(payload) + 2
+    checksum = 0x07 + (length >> 8) + (length & 0xFF) + sum(payload)
+
+    return bytearray(struct.pack('>HIBH', 0xEF01, 0xFFFFFFFF, 0x07, length)) + payload + bytearray(struct.pack('>H', checksum & 0xFFFF))
+
+
+class FakeSerial(object):
+    """
+    Serial-like object which answers every command of `PyFingerprint` successfully.
+
+    """
+
+    def __init__(self):
+        self.timeout = 2
+        self.instructions = []
+        self.__replies = bytearray()
+        self.__lock = threading.Lock()
+
+    def write(self, data):
+        data = bytearray(data)
+        instruction = data[9]
+
+        with self.__lock:
+            self.instructions.append(instruction)
+
+            if ( instruction == FINGERPRINT_TEMPLATEINDEX ):
+                self.__replies += encodeReply([0x00] + [0x00] * 32)
+            else:
+                self.__replies += encodeReply([0x00])
+
+        return len(data)
+
+    def read(self, size = 1):
+        with self.__lock:
+            data = bytes(self.__replies[:size])
+            del self.__replies[:size]
+
+        return data
+
+    def reset_input_buffer(self):
+        with self.__lock:
+            self.__replies = bytearray()
+
+    def isOpen(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class CommandSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.serial = FakeSerial()
+        self.fingerprint = PyFingerprint(self.serial)
+
+    def startThread(self, target):
+        thread = threading.Thread(target = target)
+        thread.daemon = True
+        thread.start()
+
+        ## Give the thread the time to queue at the scheduler
+        time.sleep(0.1)
+        return thread
+
+    def test_interactive_overtakes_queued_maintenance(self):
+        self.fingerprint.setScheduler(CommandScheduler(fingerHoldTime = 0))
+
+        release = threading.Event()
+
+        def holdSensor():
+            with self.fingerprint.transaction():
+                release.wait()
+
+        holder = self.startThread(holdSensor)
+        maintenance = self.startThread(lambda: self.fingerprint.getTemplateIndex(0))
+        interactive = self.startThread(lambda: self.fingerprint.convertImage())
+
+        release.set()
+
+        for thread in (holder, maintenance, interactive):
+            thread.join(5)
+
+        self.assertEqual(self.serial.instructions, [FINGERPRINT_CONVERTIMAGE, FINGERPRINT_TEMPLATEINDEX])
+
+    def test_finger_hold_does_not_delay_interactive(self):
+        self.fingerprint.setScheduler(CommandScheduler(fingerHoldTime = 2.0))
+
+        self.assertTrue(self.fingerprint.readImage())
+
+        maintenance = self.startThread(lambda: self.fingerprint.getTemplateIndex(0))
+
+        startTime = time.time()
+        self.fingerprint.convertImage()
+        self.assertLess(time.time() - startTime, 0.5)
+
+        maintenance.join(5)
+        self.assertEqual(self.serial.instructions, [FINGERPRINT_READIMAGE, FINGERPRINT_CONVERTIMAGE, FINGERPRINT_TEMPLATEINDEX])
+
+    def test_finger_hold_does_not_delay_the_detecting_thread(self):
+        self.fingerprint.setScheduler(CommandScheduler(fingerHoldTime = 2.0))
+
+        self.assertTrue(self.fingerprint.readImage())
+
+        startTime = time.time()
+        self.fingerprint.getTemplateIndex(0)
+        self.assertLess(time.time() - startTime, 0.5)
+
+    def test_deferred_maintenance_is_not_starved_by_polling(self):
+        self.fingerprint.setScheduler(CommandScheduler(maxDeferrals = 2, fingerHoldTime = 2.0))
+
+        release = threading.Event()
+
+        def holdSensor():
+            with self.fingerprint.transaction():
+                release.wait()
+
+        def pollFinger():
+            for i in range(0, 20):
+                self.fingerprint.readImage()
+
+        holder = self.startThread(holdSensor)
+        maintenance = self.startThread(lambda: self.fingerprint.getTemplateIndex(0))
+        polling = self.startThread(pollFinger)
+
+        release.set()
+
+        for thread in (holder, maintenance, polling):
+            thread.join(5)
+
+        ## The maintenance operation is granted after it was passed over 2 * maxDeferrals times
+        self.assertIn(FINGERPRINT_TEMPLATEINDEX, self.serial.instructions)
+        self.assertLessEqual(self.serial.instructions.index(FINGERPRINT_TEMPLATEINDEX), 4)
+
+    def test_deadline_while_waiting(self):
+        self.fingerprint.setScheduler(CommandScheduler())
+
+        release = threading.Event()
+
+        def holdSensor():
+            with self.fingerprint.transaction():
+                release.wait()
+
+        holder = self.startThread(holdSensor)
+
+        startTime = time.time()
+        self.assertRaises(PacketTimeoutError, self.fingerprint.getTemplateCount, deadline = 0.2)
+        self.assertLess(time.time() - startTime, 0.5)
+
+        release.set()
+        holder.join(5)
+
+        self.assertEqual(self.serial.instructions, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import unittest
+
+from fakesensor import FakeSensor
+import pyfingerprint.pyfingerprint
+from pyfingerprint.pyfingerprint import PyFingerprint, FINGERPRINT_CHARBUFFER1, FINGERPRINT_TEMPLATECOUNT
+
+
+class SearchTemplateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sensor = FakeSensor(storageCapacity = 1000)
+        self.fingerprint = PyFingerprint(self.sensor)
+
+        for position in (3, 4, 10, 600):
+            self.sensor.templates[position] = bytearray([position % 256]) * 512
+
+        self.sensor.charBuffers[FINGERPRINT_CHARBUFFER1] = bytearray(self.sensor.templates[600])
+
+    def test_default_searches_all_positions(self):
+        self.assertEqual(self.fingerprint.searchTemplate(), (600, 100))
+        self.assertEqual(self.fingerprint.searchTemplate(positionStart = 5), (600, 100))
+        self.assertEqual(self.sensor.searches, [(0, 1000), (5, 995)])
+
+    def test_bounded_search_skips_unused_positions(self):
+        self.assertEqual(self.fingerprint.searchTemplate(bounded = True), (600, 100))
+        self.assertEqual(self.fingerprint.searchTemplate(bounded = True, maxGap = 50), (600, 100))
+        self.assertEqual(self.sensor.searches, [(3, 598), (3, 8), (600, 1)])
+
+    def test_bounded_search_of_an_empty_database(self):
+        self.sensor.templates.clear()
+
+        self.assertEqual(self.fingerprint.searchTemplate(bounded = True), (-1, -1))
+        self.assertEqual(self.sensor.searches, [])
+
+    def test_bounded_search_uses_the_updated_cache(self):
+        self.fingerprint.searchTemplate(bounded = True)
+        self.fingerprint.storeTemplate(700)
+        self.sensor.instructions = []
+
+        self.assertEqual(self.fingerprint.searchTemplate(bounded = True), (600, 100))
+        self.assertEqual(self.sensor.searches[-1], (3, 698))
+
+        ## The template count is only requested once
+        self.assertNotIn(FINGERPRINT_TEMPLATECOUNT, self.sensor.instructions)
+
+    def test_bounded_search_finds_templates_of_other_programs(self):
+        self.fingerprint.searchTemplate(bounded = True)
+        self.sensor.templates[900] = bytearray([0xAA]) * 512
+        self.sensor.charBuffers[FINGERPRINT_CHARBUFFER1] = bytearray(self.sensor.templates[900])
+
+        self.fingerprint.clearTemplateIndexCache()
+        self.assertEqual(self.fingerprint.searchTemplate(bounded = True), (900, 100))
+
+        ## Without clearing the cache the template count is checked periodically
+        self.sensor.templates[950] = bytearray([0xBB]) * 512
+        self.sensor.charBuffers[FINGERPRINT_CHARBUFFER1] = bytearray(self.sensor.templates[950])
+
+        checkInterval = pyfingerprint.pyfingerprint.FINGERPRINT_TEMPLATEINDEX_CHECK_INTERVAL
+        pyfingerprint.pyfingerprint.FINGERPRINT_TEMPLATEINDEX_CHECK_INTERVAL = 0
+
+        try:
+            self.assertEqual(self.fingerprint.searchTemplate(bounded = True), (950, 100))
+
+        finally:
+            pyfingerprint.pyfingerprint.FINGERPRINT_TEMPLATEINDEX_CHECK_INTERVAL = checkInterval
+
+
+if __name__ == '__main__':
+    unittest.main()
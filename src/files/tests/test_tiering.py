@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fakesensor import FakeSensor
+from pyfingerprint.pyfingerprint import PyFingerprint, PacketTimeoutError, FINGERPRINT_DELETETEMPLATE
+from pyfingerprint.tiering import TieredSearch
+
+
+class CrashingSensor(FakeSensor):
+    """
+    Fake sensor which stops replying at the given deletion of a template.
+
+    """
+
+    def __init__(self, deletionsBeforeCrash, *args, **kwargs):
+        FakeSensor.__init__(self, *args, **kwargs)
+        self.deletionsBeforeCrash = deletionsBeforeCrash
+
+    def write(self, data):
+        if ( bytearray(data)[9] == FINGERPRINT_DELETETEMPLATE ):
+            self.deletionsBeforeCrash -= 1
+
+        if ( self.deletionsBeforeCrash < 0 ):
+            return len(data)
+
+        return FakeSensor.write(self, data)
+
+
+class TieredSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.journalPath = os.path.join(self.directory, 'rebalance.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def createTemplates(self, sensor):
+        for position in (0, 1, 500, 600):
+            sensor.templates[position] = bytearray([position % 256 + 1]) * 512
+
+    def test_rebalance_reports_every_move(self):
+        sensor = FakeSensor()
+        self.createTemplates(sensor)
+
+        moves = []
+        tieredSearch = TieredSearch(PyFingerprint(sensor), 2, moveCallback = lambda oldPosition, newPosition: moves.append((oldPosition, newPosition, sorted(sensor.templates))), journalPath = self.journalPath)
+        tieredSearch.setMatchCounts({500: 10, 600: 5})
+
+        positionMapping = tieredSearch.rebalance()
+
+        self.assertEqual(positionMapping, {0: 2, 500: 0, 1: 3, 600: 1})
+        self.assertEqual([move[:2] for move in moves], [(0, 2), (500, 0), (1, 3), (600, 1)])
+
+        ## Every move is reported right after it was completed
+        self.assertEqual(moves[0][2], [1, 2, 500, 600])
+        self.assertEqual(sensor.templates[0], bytearray([500 % 256 + 1]) * 512)
+        self.assertEqual(tieredSearch.getMatchCounts(), {0: 5, 1: 2})
+        self.assertFalse(os.path.exists(self.journalPath))
+
+    def test_failed_rebalance_reports_the_completed_moves(self):
+        sensor = CrashingSensor(2)
+        self.createTemplates(sensor)
+        fingerprint = PyFingerprint(sensor)
+        fingerprint.setCommandTimeout(FINGERPRINT_DELETETEMPLATE, 0.1)
+
+        errors = []
+        tieredSearch = TieredSearch(fingerprint, 2, rebalanceInterval = 1, errorCallback = lambda exception, positionMapping: errors.append((exception, positionMapping)), journalPath = self.journalPath)
+        tieredSearch.setMatchCounts({500: 10, 600: 5})
+
+        ## The sensor stops replying within the second swap
+        tieredSearch.searchTemplate()
+        self.assertTrue(tieredSearch.waitForRebalance(5))
+
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(isinstance(errors[0][0], PacketTimeoutError))
+        self.assertEqual(errors[0][1], {0: 2, 500: 0})
+        self.assertEqual(tieredSearch.getMatchCounts(), {0: 10, 600: 5})
+
+        ## Restart with the same templates: the interrupted move is completed
+        restartedSensor = FakeSensor()
+        restartedSensor.templates = sensor.templates
+
+        moves = []
+        positionMapping = TieredSearch(PyFingerprint(restartedSensor), 2, moveCallback = lambda oldPosition, newPosition: moves.append((oldPosition, newPosition)), journalPath = self.journalPath).rebalance()
+
+        self.assertEqual(positionMapping, {0: 2, 500: 0, 1: 3})
+        self.assertEqual(moves, [(0, 2), (1, 3), (500, 0)])
+        self.assertEqual(sorted(restartedSensor.templates), [0, 2, 3, 600])
+        self.assertEqual(restartedSensor.templates[3], bytearray([2]) * 512)
+        self.assertFalse(os.path.exists(self.journalPath))
+
+
+if __name__ == '__main__':
+    unittest.main()
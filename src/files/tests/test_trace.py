@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PyFingerprint
+Copyright (C) 2015 Bastian Raschke <bastian.raschke@posteo.de>
+All rights reserved.
+
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from fakesensor import FakeSensor
+from pyfingerprint.pyfingerprint import PyFingerprint
+from pyfingerprint.trace import TraceRecorder, TraceReplayer, readTrace, TRACE_DIRECTION_READ, TRACE_DIRECTION_WRITE
+
+
+class TraceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.tracePath = os.path.join(self.directory, 'session.trace')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def runSession(self, fingerprint):
+        fingerprint.uploadCharacteristics(0x01, bytes(bytearray(range(256)) * 2))
+
+        return (
+            fingerprint.verifyPassword(),
+            fingerprint.storeTemplate(5),
+            fingerprint.getTemplateCount(),
+            fingerprint.searchTemplate(),
+            fingerprint.downloadCharacteristics(0x01, asBytes = True),
+        )
+
+    def test_replay_returns_the_recorded_results(self):
+        fingerprint = PyFingerprint(FakeSensor())
+
+        with TraceRecorder(self.tracePath) as traceRecorder:
+            fingerprint.setTraceRecorder(traceRecorder)
+            recordedResults = self.runSession(fingerprint)
+
+        replayedResults = self.runSession(PyFingerprint(TraceReplayer(self.tracePath)))
+
+        self.assertEqual(replayedResults, recordedResults)
+        self.assertEqual(recordedResults[3], (5, 100))
+
+    def test_replay_rejects_other_commands(self):
+        fingerprint = PyFingerprint(FakeSensor())
+
+        with TraceRecorder(self.tracePath) as traceRecorder:
+            fingerprint.setTraceRecorder(traceRecorder)
+            fingerprint.getTemplateCount()
+
+        replayedFingerprint = PyFingerprint(TraceReplayer(self.tracePath))
+        self.assertRaises(Exception, replayedFingerprint.clearDatabase)
+
+    def test_timestamps_ignore_changes_of_the_system_time(self):
+        fingerprint = PyFingerprint(FakeSensor())
+        originalTime = time.time
+
+        ## The system time jumps back by an hour after every call
+        offsets = [0]
+
+        def steppingTime():
+            offsets[0] -= 3600
+            return originalTime() + offsets[0]
+
+        time.time = steppingTime
+
+        try:
+            with TraceRecorder(self.tracePath) as traceRecorder:
+                fingerprint.setTraceRecorder(traceRecorder)
+                fingerprint.getTemplateCount()
+                fingerprint.getTemplateCount()
+
+        finally:
+            time.time = originalTime
+
+        records = readTrace(self.tracePath)
+
+        self.assertEqual([record[0] for record in records], [TRACE_DIRECTION_WRITE, TRACE_DIRECTION_READ] * 2)
+        self.assertLess(records[-1][1], 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
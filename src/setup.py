@@ -3,17 +3,18 @@
 
 from setuptools import setup
 
-import sys
-sys.path.insert(0, './files/')
+import re
 
-import pyfingerprint
+## Read the version without importing the package (and its dependencies)
+with open('files/pyfingerprint/__init__.py', 'r') as initFile:
+    version = re.search(r"^__version__ = '([^']+)'", initFile.read(), re.MULTILINE).group(1)
 
 with open('README.md', 'r') as readme:
     long_description = readme.read()
 
 setup(
     name            = 'pyfingerprint',
-    version         = pyfingerprint.__version__,
+    version         = version,
     author          = 'Bastian Raschke',
     author_email    = 'bastian.raschke@posteo.de',
     maintainer      = 'Philipp Meisberger',
@@ -29,6 +30,9 @@ setup(
         'pyserial',
         'Pillow'
     ],
+    extras_require  = {
+        'numpy': ['numpy'],
+    },
     classifiers     = [
         'Development Status :: 5 - Production/Stable'
         'Intended Audience :: Developers',